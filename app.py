@@ -10,18 +10,33 @@ Ce fichier initialise l'application Flask, configure les routes et importe les a
 L'objet session de Flask est utilisé pour stocker les données globales nécessaires à ce projet.
 '''
 
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash, Response
-import numpy as np
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash, Response, g
 import json
 
 from models.app_manager import AppManager
+from models.registre_salles import RegistreSalles
+from models.canal_evenements import FIN_DU_FLUX, formater_sse
+from models.depouillement import depouiller
+from models.metriques import Metriques
+from models.journalisation import configurer_journalisation
+from models.profilage import Profileur
+from models.traces import RegistreTraces
+import atexit
+import functools
+import hashlib
+import hmac
 import os
+import queue
+import time
 import uuid
 from constantes import *
 
 # Chemin vers le fichier backlog.json
 BACKLOG_FILE = os.path.join(os.path.dirname(__file__), 'data', 'backlog.json')
 
+# journalisation par file : écrire un message ne bloque pas la requête
+configurer_journalisation()
+
 # créer l'application Flask
 app = Flask(__name__)
 
@@ -31,8 +46,170 @@ app.secret_key = CLE_SECRETE
 # Configurer le nom du serveur
 app.config['SERVER_NAME'] = NOM_SERVEUR
 
-# création de l'objet AppManager avec chargement du backlog
-app_manager = AppManager(backlog_file=BACKLOG_FILE)
+# registre des salles de vote : un AppManager indépendant par salle
+registre_salles = RegistreSalles(backlog_file=BACKLOG_FILE, fichier_etat=FICHIER_ETAT_PARTAGE)
+
+# jeton du routeur frontal : présent si ce processus est un worker derrière le routeur (voir routeur.py)
+JETON_ROUTEUR = os.environ.get(VARIABLE_JETON_ROUTEUR)
+
+# création de l'objet AppManager de la salle par défaut avec chargement du backlog ;
+# derrière le routeur, seul le worker qui sert la salle par défaut l'ouvre (à la première connexion)
+app_manager = None if JETON_ROUTEUR else registre_salles.obtenir_salle(SALLE_PAR_DEFAUT)
+
+# écrire les backlogs modifiés non encore sauvegardés à l'arrêt du serveur
+atexit.register(registre_salles.fermer_tout)
+
+# compteurs et latences des requêtes, exposés par /metrics
+metriques_requetes = Metriques()
+
+# profilage cProfile à la demande (variables d'environnement ou route /profilage)
+profileur = Profileur.depuis_environnement(os.path.join(os.path.dirname(__file__), DOSSIER_PROFILS))
+
+# traces des dernières requêtes (spans des méthodes d'AppManager), exportées par /traces
+traces_requetes = RegistreTraces.depuis_environnement()
+
+# routes accessibles sans que la salle soit déjà ouverte
+ROUTES_SANS_SALLE = {"home", "login", "entrer_salle", "static", "metriques"}
+
+# routes appelées par le routeur frontal, indépendantes de la salle de la session
+ROUTES_INTERNES = {"liberer_salle"}
+
+@app.before_request
+def demarrer_chronometre():
+    """
+    @brief Note l'instant de début de la requête, pour mesurer sa durée.
+
+    @details Enregistré avant `resoudre_salle` : la résolution de la salle est incluse dans la mesure.
+    """
+    g.debut_requete = time.perf_counter()
+
+@app.before_request
+def demarrer_profilage():
+    """
+    @brief Démarre le profil cProfile de la requête si sa route est sélectionnée pour le profilage.
+    """
+    if profileur.doit_profiler(request.endpoint):
+        g.profil = profileur.demarrer()
+
+@app.before_request
+def demarrer_trace():
+    """
+    @brief Commence la trace de la requête si le traçage est actif.
+    """
+    g.jeton_trace = traces_requetes.demarrer(f"{request.method} {request.endpoint}")
+
+@app.before_request
+def resoudre_salle():
+    """
+    @brief Détermine la salle de vote visée par la requête.
+
+    @details
+    La salle est lue dans l'URL (paramètre `salle`) puis dans la session, et vaut
+    la salle par défaut sinon. Les salles ne sont créées qu'à la connexion : une
+    salle inconnue renvoie vers la page de connexion.
+
+    @return None si la salle est résolue, sinon une redirection vers la connexion.
+    """
+    if request.endpoint in ROUTES_INTERNES:
+        return
+    id_salle = request.args.get('salle') or session.get('salle') or SALLE_PAR_DEFAUT
+    try:
+        id_salle = RegistreSalles.valider_id_salle(id_salle)
+    except ValueError as e:
+        flash(str(e), "danger")
+        id_salle = SALLE_PAR_DEFAUT
+
+    g.id_salle = id_salle
+    g.gestionnaire = registre_salles.salle_ouverte(id_salle)
+    if g.gestionnaire is not None:
+        # état publié par un autre processus depuis la dernière requête
+        g.gestionnaire.synchroniser_etat()
+    if g.gestionnaire is None and request.endpoint not in ROUTES_SANS_SALLE:
+        session.pop('salle', None)
+        flash(f"La salle '{id_salle}' n'est pas ouverte. Connectez-vous pour la créer.", "warning")
+        return redirect(url_for('login', salle=id_salle))
+
+def gestionnaire_courant():
+    """
+    @brief Retourne l'AppManager de la salle de la requête en cours.
+
+    @return L'objet AppManager de la salle courante, ou None si elle n'est pas encore ouverte.
+    """
+    return g.gestionnaire
+
+def verrouiller_salle(vue):
+    """
+    @brief Décorateur de route : exécute la vue dans une transaction sur l'état de la salle.
+
+    @details
+    Les routes du déroulement du vote lisent puis modifient `state` en plusieurs étapes
+    (vérifier qu'un participant n'a pas voté, puis enregistrer son vote...). La transaction
+    rend ces étapes atomiques pour la salle ; les autres salles ne sont pas bloquées.
+    Avec un état partagé entre processus, la vue peut être rejouée après un conflit :
+    les messages flash de la tentative abandonnée sont alors oubliés.
+
+    @param vue Fonction de vue Flask.
+    """
+    @functools.wraps(vue)
+    def enveloppe(*args, **kwargs):
+        messages = list(session.get('_flashes', []))
+        tentatives = []
+
+        def executer():
+            if tentatives:
+                session['_flashes'] = list(messages)
+            tentatives.append(True)
+            return vue(*args, **kwargs)
+
+        return gestionnaire_courant().executer_transaction(executer)
+    return enveloppe
+
+def etag_salle():
+    """
+    @brief Calcule l'ETag des pages de la salle courante pour la session en cours.
+
+    @details
+    Ces pages ne dépendent que du backlog, de `state`, de la salle, du participant
+    (session et pseudo actif) et des paramètres de l'URL (page du backlog) : l'ETag
+    combine leurs compteurs de version. Il ne change
+    donc que si l'une de ces données a changé.
+
+    @return str: ETag (sans guillemets).
+    """
+    gestionnaire = gestionnaire_courant()
+    with gestionnaire.verrou_backlog:
+        version_backlog = gestionnaire.backlog.version
+    cle = repr((
+        gestionnaire.instance, g.id_salle, request.endpoint, request.query_string, version_backlog,
+        gestionnaire.revision_etat, session.get('session_id'), session.get('pseudo_actif'),
+    ))
+    return hashlib.sha1(cle.encode('utf-8')).hexdigest()[:20]
+
+def reponse_conditionnelle(vue):
+    """
+    @brief Décorateur de route : répond `304 Not Modified` si la page du client est à jour.
+
+    @details
+    L'ETag est calculé avant la vue : si l'en-tête `If-None-Match` le contient, la
+    page n'est pas générée. Une page qui doit afficher des messages flash est
+    toujours générée (les messages sont consommés par le rendu).
+
+    @param vue Fonction de vue Flask.
+    """
+    @functools.wraps(vue)
+    def enveloppe(*args, **kwargs):
+        if session.get('_flashes'):
+            return vue(*args, **kwargs)
+        etag = etag_salle()
+        if request.if_none_match.contains_weak(etag):
+            reponse = Response(status=304)
+        else:
+            reponse = app.make_response(vue(*args, **kwargs))
+            if reponse.status_code != 200:
+                return reponse
+        reponse.set_etag(etag, weak=True)
+        return reponse
+    return enveloppe
 
 # supprimer le cache du navigateur
 @app.after_request
@@ -40,15 +217,68 @@ def add_header(response):
     """
     @brief Désactive le cache du navigateur.
 
+    @details Une réponse avec ETag peut être gardée par le navigateur, mais doit être
+    revalidée à chaque affichage (requête conditionnelle, réponse 304 si inchangée).
+
     @param response La réponse HTTP générée par Flask.
     
     @return La réponse modifiée avec les en-têtes pour désactiver le cache.
     """
+    if response.headers.get('ETag'):
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
     response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, post-check=0, pre-check=0, max-age=0'
     response.headers['Pragma'] = 'no-cache'
     response.headers['Expires'] = '-1'
     return response
 
+@app.after_request
+def mesurer_requete(response):
+    """
+    @brief Enregistre la durée et le code de statut de la requête dans les métriques de sa route.
+
+    @details Pour un flux (SSE), seule la préparation de la réponse est mesurée.
+
+    @param response La réponse HTTP générée par Flask.
+
+    @return La réponse, inchangée.
+    """
+    debut = g.get('debut_requete')
+    if debut is not None:
+        metriques_requetes.observer_requete(
+            request.endpoint or "inconnue", request.method, response.status_code, time.perf_counter() - debut
+        )
+    return response
+
+@app.after_request
+def terminer_profilage(response):
+    """
+    @brief Arrête le profil de la requête, s'il y en a un, et l'enregistre dans le dossier des profils.
+
+    @param response La réponse HTTP générée par Flask.
+
+    @return La réponse, inchangée.
+    """
+    profil = g.pop('profil', None)
+    if profil is not None:
+        chemin = profileur.terminer(profil, request.endpoint)
+        app.logger.info("Profil enregistré : %s", chemin)
+    return response
+
+@app.after_request
+def terminer_trace(response):
+    """
+    @brief Termine et conserve la trace de la requête, s'il y en a une.
+
+    @param response La réponse HTTP générée par Flask.
+
+    @return La réponse, inchangée.
+    """
+    jeton = g.pop('jeton_trace', None)
+    if jeton is not None:
+        traces_requetes.terminer(jeton)
+    return response
+
 # injecter les variables globales dans les templates 
 @app.context_processor
 def inject_globals():
@@ -57,19 +287,21 @@ def inject_globals():
 
     @return Dictionnaire contenant les variables globales (is_sm et is_po).
     """
+    gestionnaire = gestionnaire_courant()
     # Récupérer le pseudo actif depuis la session
     pseudo_actif = session.get('pseudo_actif')
     participant_actif = None
 
     # Si un pseudo actif est défini, récupérer ses données
-    if pseudo_actif:
-        participant_actif = next((p for p in app_manager.state["participants"] if p["pseudo"] == pseudo_actif), None)
+    if pseudo_actif and gestionnaire:
+        participant_actif = gestionnaire.participants.par_pseudo(pseudo_actif)
 
     # Injecter les données dans les templates
     return {
         "pseudo_actif": pseudo_actif,
         "participant_actif": participant_actif,
-        "state": app_manager.state,
+        "state": gestionnaire.state if gestionnaire else {},
+        "id_salle": g.get('id_salle', SALLE_PAR_DEFAUT),
     }
 
 # Route par défaut
@@ -99,15 +331,23 @@ def login():
     """
     if request.method == 'POST':
         pseudo = request.form['pseudo'].strip().lower()
+
+        # Ouvrir la salle choisie, créée à la première connexion
+        try:
+            id_salle = RegistreSalles.valider_id_salle(request.form.get('salle') or g.id_salle)
+        except ValueError as e:
+            flash(str(e), "danger")
+            return redirect(url_for('login'))
+        gestionnaire = registre_salles.obtenir_salle(id_salle)
         
         # Générer un ID de session unique
         session_id = str(uuid.uuid4())  
-        print(f"Pseudo reçu : {pseudo}, Session ID généré : {session_id}")
+        app.logger.debug("Pseudo reçu : %s, Session ID généré : %s", pseudo, session_id)
 
          # Vérifier si le pseudo est valide
-        fonctionnalite_prioritaire = app_manager.afficher_fonctionnalite_prioritaire()
+        fonctionnalite_prioritaire = gestionnaire.afficher_fonctionnalite_prioritaire()
         participants_backlog = fonctionnalite_prioritaire.participants if fonctionnalite_prioritaire else []
-        print("participants_backlog : ",participants_backlog)
+        app.logger.debug("participants_backlog : %s", participants_backlog)
 
        # Autoriser uniquement PO, SM ou participants du backlog
         if pseudo not in ["po","PO","sm", "SM"] and pseudo not in participants_backlog:
@@ -115,9 +355,10 @@ def login():
             return redirect(url_for('login'))
         
         try:
-            app_manager.ajouter_participant(pseudo, session_id)
+            gestionnaire.ajouter_participant(pseudo, session_id)
             # Stocker la session et rediriger vers la salle de vote
             session['session_id'] = session_id
+            session['salle'] = id_salle
             session.modified = True
 
             reponse = redirect(url_for('salle_de_vote'))
@@ -127,7 +368,27 @@ def login():
             flash(str(e), "danger")
             return redirect(url_for('login'))
 
-    return render_template('login.html')
+    return render_template('login.html', salle=g.id_salle)
+
+
+# Entrée directe dans une salle
+@app.route('/salle/<id_salle>')
+def entrer_salle(id_salle):
+    """
+    @brief Sélectionne une salle de vote à partir de l'URL.
+
+    @details La salle est mémorisée dans la session puis l'utilisateur est
+    redirigé vers la connexion, qui crée la salle si nécessaire.
+
+    @param id_salle Identifiant de la salle.
+
+    @return Redirection vers la page de connexion.
+    """
+    try:
+        session['salle'] = RegistreSalles.valider_id_salle(id_salle)
+    except ValueError as e:
+        flash(str(e), "danger")
+    return redirect(url_for('login'))
 
 
 # Route de déconnexion
@@ -146,21 +407,20 @@ def logout():
     - Redirection vers la page de connexion si le Scrum Master déconnecte tout le monde.
     - Redirection vers la salle de vote avec un message d'avertissement sinon.
     """
+    gestionnaire = gestionnaire_courant()
     session_id = session.get('session_id')
     pseudo_actif = session.get('pseudo_actif')
     
     # Vérifier si le participant est le Scrum Master
-    participant = next(
-        (p for p in app_manager.state["participants"] if p["session_id"] == session_id),
-        None
-    )
-    print("Participant trouvé : ", participant)
+    participant = gestionnaire.participants.par_session(session_id)
+    app.logger.debug("Participant trouvé : %s", participant)
 
     if pseudo_actif == "sm":
         # Déconnecter tout le monde
-        app_manager.state["participants"] = []
-        app_manager.state["mapper_session"] = {}
-        app_manager.sauvegarder_backlog()
+        gestionnaire.deconnecter_tous_les_participants()
+
+        # Fermer la salle pour libérer sa mémoire (le backlog reste sur le disque)
+        registre_salles.fermer_salle(g.id_salle)
 
         # Effacer toutes les sessions Flask
         session.clear()
@@ -174,6 +434,7 @@ def logout():
 
 # Route de participants_debug
 @app.route('/participants_debug')
+@reponse_conditionnelle
 def participants_debug():
     """
     @brief Retourne la liste des participants connectés pour le débogage.
@@ -186,12 +447,14 @@ def participants_debug():
     @return
     JSON contenant les informations sur les participants connectés.
     """
-    participants = app_manager.state.get("participants", [])
-    print(f"Participants connectés : {participants}")
+    gestionnaire = gestionnaire_courant()
+    participants = list(gestionnaire.participants)
+    app.logger.debug("Participants connectés : %s", participants)
     return jsonify(participants)
 
 # Route de salle_de_vote
 @app.route('/salle_de_vote')
+@reponse_conditionnelle
 def salle_de_vote():
     """
     @brief Affiche la salle de vote pour les participants connectés.
@@ -212,33 +475,34 @@ def salle_de_vote():
     - Page HTML de la salle de vote si toutes les vérifications sont réussies.
     - Redirection vers la page de connexion ou le backlog avec des messages en cas d'erreur.
     """
+    gestionnaire = gestionnaire_courant()
     session_id = session.get('session_id')
     if 'session_id' not in session:
         flash("Vous devez être connecté pour accéder à cette page.", "danger")
         return redirect(url_for('login')) 
 
     # Vérifier si le participant existe dans les données d'AppManager
-    participant = next((p for p in app_manager.state["participants"] if p["session_id"] == session['session_id']), None)
+    participant = gestionnaire.participants.par_session(session['session_id'])
     if not participant:
         flash("Session invalide ou expirée.", "danger")
         return redirect(url_for('login'))
 
-    fonctionnalite_prioritaire = app_manager.afficher_fonctionnalite_prioritaire()
+    fonctionnalite_prioritaire = gestionnaire.afficher_fonctionnalite_prioritaire()
     if not fonctionnalite_prioritaire:
         flash("Aucune fonctionnalité prioritaire.", "warning")
         return redirect(url_for('backlog'))
 
     # Vérifier si l'équipe est complète
-    equipe_complete = app_manager.is_team_complete(fonctionnalite_prioritaire)
+    equipe_complete = gestionnaire.is_team_complete(fonctionnalite_prioritaire)
 
     # Récupérer les participants connectés
-    participants = app_manager.state["participants"]
+    participants = gestionnaire.participants
 
     # Récupérer le pseudo actif
     pseudo_actif = session.get('pseudo_actif', None)
 
     # État du vote
-    vote_commence = app_manager.state["indicateurs"]["vote_commence"]
+    vote_commence = gestionnaire.state["indicateurs"]["vote_commence"]
 
     return render_template(
         'salle_de_vote.html',
@@ -251,6 +515,110 @@ def salle_de_vote():
     )
 
 
+# Libération d'une salle confiée à un autre worker, demandée par le routeur
+@app.route(PREFIXE_ROUTES_INTERNES + 'liberer_salle', methods=['POST'])
+def liberer_salle():
+    """
+    @brief Retire de ce worker une salle que le routeur confie désormais à un autre worker.
+
+    @details Le backlog de la salle est écrit sur le disque avant que le nouveau worker
+    ne l'ouvre, et ses flux SSE sont terminés. Réservée au routeur : la requête doit
+    porter son jeton (en-tête `EN_TETE_JETON_ROUTEUR`).
+
+    @return JSON {"liberee": bool}, 400 si la salle est invalide, ou 404 sans le jeton du routeur.
+    """
+    jeton = request.headers.get(EN_TETE_JETON_ROUTEUR, "")
+    if not JETON_ROUTEUR or not hmac.compare_digest(jeton, JETON_ROUTEUR):
+        return jsonify({"erreur": "Route inconnue."}), 404
+    try:
+        id_salle = RegistreSalles.valider_id_salle(request.form.get('salle'))
+    except ValueError as e:
+        return jsonify({"erreur": str(e)}), 400
+    return jsonify({"liberee": registre_salles.liberer_salle(id_salle)})
+
+
+# Flux Server-Sent Events de la salle de vote
+@app.route('/flux_salle')
+def flux_salle():
+    """
+    @brief Diffuse en continu les changements d'état de la salle (Server-Sent Events).
+
+    @details
+    Le client reçoit immédiatement l'état courant, puis un événement après chaque
+    vote, révélation, initiation, validation ou réinitialisation. Un commentaire
+    est envoyé périodiquement pour maintenir la connexion ouverte. Avec un état partagé
+    entre processus, l'état est relu toutes les `DELAI_SYNCHRONISATION_ATTENTE` secondes,
+    comme pour l'attente longue : une modification publiée par un autre processus est
+    diffusée (événement "etat"). Le flux se termine quand la salle est fermée
+    (déconnexion de tous par le Scrum Master).
+
+    @return Réponse HTTP `text/event-stream`, ou 401 si le client n'est pas connecté.
+    """
+    gestionnaire = gestionnaire_courant()
+    session_id = session.get('session_id')
+    if not session_id or not gestionnaire.participants.par_session(session_id):
+        return jsonify({"erreur": "Session invalide ou expirée."}), 401
+
+    id_salle = g.id_salle
+    file = gestionnaire.evenements.abonner()
+
+    attente = DELAI_KEEPALIVE_SSE if gestionnaire.stockage_etat is None else DELAI_SYNCHRONISATION_ATTENTE
+
+    def generer():
+        try:
+            yield formater_sse("etat", gestionnaire.etat_public())
+            dernier_envoi = time.monotonic()
+            while True:
+                try:
+                    message = file.get(timeout=attente)
+                except queue.Empty:
+                    # salle fermée avant l'abonnement : la fin du flux n'a pas été reçue
+                    if registre_salles.salles.get(id_salle) is not gestionnaire:
+                        return
+                    # un état publié par un autre processus arrive dans la file
+                    gestionnaire.synchroniser_etat()
+                    if time.monotonic() - dernier_envoi >= DELAI_KEEPALIVE_SSE:
+                        dernier_envoi = time.monotonic()
+                        yield ": keepalive\n\n"
+                    continue
+                if message is FIN_DU_FLUX:
+                    return
+                dernier_envoi = time.monotonic()
+                yield message
+        finally:
+            gestionnaire.evenements.desabonner(file)
+
+    reponse = Response(generer(), mimetype='text/event-stream')
+    reponse.headers['X-Accel-Buffering'] = 'no'
+    return reponse
+
+
+# État de la salle en JSON, avec attente longue (clients sans Server-Sent Events)
+@app.route('/etat_salle')
+def etat_salle():
+    """
+    @brief Retourne l'état de la salle en JSON dès qu'il diffère de la version connue du client.
+
+    @details
+    Sans paramètre `version`, l'état est retourné immédiatement. Avec `version` (champ
+    `version` d'une réponse précédente), la requête attend un changement d'état pendant
+    au plus `attente` secondes (plafonnée à `ATTENTE_MAX_ETAT`). Les identifiants de
+    session et les votes non révélés ne sont pas exposés.
+
+    @return JSON de l'état, 204 si rien n'a changé pendant l'attente, ou 401 si le client n'est pas connecté.
+    """
+    gestionnaire = gestionnaire_courant()
+    session_id = session.get('session_id')
+    if not session_id or not gestionnaire.participants.par_session(session_id):
+        return jsonify({"erreur": "Session invalide ou expirée."}), 401
+
+    version = request.args.get('version', type=int)
+    if version is not None:
+        attente = min(max(request.args.get('attente', ATTENTE_MAX_ETAT, type=float), 0), ATTENTE_MAX_ETAT)
+        if not gestionnaire.attendre_changement(version, attente):
+            return Response(status=204)
+    return jsonify(gestionnaire.etat_public())
+
 
 # activation si on clique sur l'avatar
 @app.route('/set_pseudo_actif', methods=['POST'])
@@ -271,13 +639,14 @@ def set_pseudo_actif():
     - Redirection vers la salle de vote avec un message de succès si le pseudo est activé.
     - Redirection vers la salle de vote avec un message d'erreur en cas de problème.
     """
+    gestionnaire = gestionnaire_courant()
     pseudo = request.form.get("pseudo")  # Obtenu depuis le clic sur l'avatar
     if not pseudo:
         flash("Aucun pseudo sélectionné.", "danger")
         return redirect(url_for('salle_de_vote'))
 
     # Vérifier que le pseudo existe dans `state`
-    participant = next((p for p in app_manager.state["participants"] if p["pseudo"] == pseudo), None)
+    participant = gestionnaire.participants.par_pseudo(pseudo)
 
     if not participant:
         flash(f"Le participant '{pseudo}' n'existe pas.", "danger")
@@ -302,13 +671,14 @@ def afficher_ajout_fonctionnalite():
 
     @return La page HTML pour ajouter une fonctionnalité ou une redirection vers la salle de vote.
     """
+    gestionnaire = gestionnaire_courant()
     pseudo_actif = session.get('pseudo_actif')
     if not pseudo_actif:
         flash("Aucun participant actif sélectionné.", "danger")
         return redirect(url_for('salle_de_vote'))
     
 
-    participant_actif = next((p for p in app_manager.state["participants"] if p["pseudo"] == pseudo_actif), None)
+    participant_actif = gestionnaire.participants.par_pseudo(pseudo_actif)
     
     if not participant_actif or participant_actif["fonction"] != "Product Owner":
         flash("Accès réservé au Product Owner.", "danger")
@@ -337,6 +707,7 @@ def ajouter_fonctionnalite():
 
     @return Redirection vers le backlog ou la page d'ajout en cas d'erreur.
     """
+    gestionnaire = gestionnaire_courant()
     erreurs = {}
     pseudo_actif = session.get('pseudo_actif')
     if not pseudo_actif or pseudo_actif.lower() != "po":
@@ -360,10 +731,11 @@ def ajouter_fonctionnalite():
         if erreurs:
             return render_template('ajout_fonctionnalite.html', errors=erreurs, form_data=request.form)
 
-        print(f"nom {nom} description {description} int(priorite) {int(priorite)} int(difficulte) {int(difficulte)} mode_de_vote {mode_de_vote} statut {statut} participants {participants} ")
+        app.logger.debug("Ajout de la fonctionnalité %s (priorité %s, difficulté %s, mode %s, statut %s, participants %s)",
+                         nom, priorite, difficulte, mode_de_vote, statut, participants)
         
         # Ajouter la fonctionnalité via AppManager
-        app_manager.ajout_fonctionnalite(nom, description, int(priorite), int(difficulte),statut, mode_de_vote,  participants)
+        gestionnaire.ajout_fonctionnalite(nom, description, int(priorite), int(difficulte),statut, mode_de_vote,  participants)
 
         # Nettoyer les données temporaires
         session.pop('participants_temp', None)
@@ -387,7 +759,7 @@ def ajouter_participant_route():
     @return Redirection vers la page d'ajout de fonctionnalité.
     """
     pseudo = request.form.get('participant_pseudo', '').strip()
-    print("participant ajouté dans fonctionnalité :", pseudo)
+    app.logger.debug("Participant ajouté dans la fonctionnalité : %s", pseudo)
 
     # Initialiser la liste si elle n'existe pas
     if 'participants_temp' not in session:
@@ -421,8 +793,9 @@ def edit_fonctionnalite_route(fonctionnalite_id):
 
     @return Redirection vers le backlog ou la page d'édition.
     """
+    gestionnaire = gestionnaire_courant()
     # Récupérer la fonctionnalité à modifier via AppManager
-    fonctionnalite = app_manager.get_fonctionnalite(fonctionnalite_id)
+    fonctionnalite = gestionnaire.get_fonctionnalite(fonctionnalite_id)
     if not fonctionnalite:
         flash("Fonctionnalité non trouvée.", "danger")
         return redirect(url_for('backlog'))
@@ -440,7 +813,7 @@ def edit_fonctionnalite_route(fonctionnalite_id):
             }
 
             # Déléguer la mise à jour à AppManager
-            app_manager.modifier_fonctionnalite(fonctionnalite_id, **updated_data)
+            gestionnaire.modifier_fonctionnalite(fonctionnalite_id, **updated_data)
 
             flash("La fonctionnalité a été mise à jour avec succès.", "success")
             return redirect(url_for('backlog'))
@@ -449,7 +822,7 @@ def edit_fonctionnalite_route(fonctionnalite_id):
             flash(str(e), "danger")
         except Exception as e:
             flash("Une erreur est survenue lors de la mise à jour de la fonctionnalité.", "danger")
-            print(f"Erreur dans edit_fonctionnalite : {e}")
+            app.logger.error("Erreur dans edit_fonctionnalite : %s", e)
 
     # Charger la page avec les données actuelles de la fonctionnalité
     return render_template('edit_fonctionnalite.html', fonctionnalite=fonctionnalite)
@@ -466,22 +839,24 @@ def supprimer_fonctionnalite_route(fonctionnalite_id):
 
     @return Redirection vers le backlog après suppression.
     """
+    gestionnaire = gestionnaire_courant()
 
     try:
         # Déléguer la suppression à AppManager
-        app_manager.supprimer_fonctionnalite(fonctionnalite_id)
+        gestionnaire.supprimer_fonctionnalite(fonctionnalite_id)
         flash("La fonctionnalité a été supprimée avec succès.", "success")
     except ValueError as e:
         flash(str(e), "danger")
     except Exception as e:
         flash("Une erreur est survenue lors de la suppression de la fonctionnalité.", "danger")
-        print(f"Erreur dans supprimer_fonctionnalite : {e}")
+        app.logger.error("Erreur dans supprimer_fonctionnalite : %s", e)
 
     # Redirection vers le backlog
     return redirect(url_for('backlog'))
 
 
 @app.route('/passer_a_fonctionnalite_suivante', methods=['POST'])
+@verrouiller_salle
 def passer_a_fonctionnalite_suivante():
     """
     @brief Permet au Product Owner de passer à la fonctionnalité suivante après validation.
@@ -491,7 +866,6 @@ def passer_a_fonctionnalite_suivante():
     - Vérifie que le participant actif est un Product Owner.
     - Recherche la prochaine fonctionnalité non terminée dans le backlog.
     - Met à jour l'état de l'application pour définir la fonctionnalité suivante comme prioritaire.
-    - Sauvegarde le backlog.
 
     Si aucune fonctionnalité suivante n'est trouvée, un message d'avertissement est affiché.
 
@@ -499,19 +873,17 @@ def passer_a_fonctionnalite_suivante():
     - Redirection vers la salle de vote avec un message de succès si une fonctionnalité suivante est trouvée.
     - Redirection vers la salle de vote avec un message d'avertissement si aucune fonctionnalité n'est disponible.
     """
+    gestionnaire = gestionnaire_courant()
     pseudo_actif = session.get('pseudo_actif')
     if pseudo_actif != 'po':
         flash("Accès réservé au Product Owner.", "danger")
         return redirect(url_for('salle_de_vote'))
 
     # Récupérer la prochaine fonctionnalité non terminée dans le backlog
-    prochaine_fonctionnalite = next(
-        (f for f in app_manager.backlog if f.statut != "Terminé"), None
-    )
+    prochaine_fonctionnalite = gestionnaire.passer_a_fonctionnalite_suivante()
 
     if prochaine_fonctionnalite:
-        app_manager.state["id_fonctionnalite"] = prochaine_fonctionnalite.id
-        app_manager.sauvegarder_backlog()
+        gestionnaire.notifier("fonctionnalite_suivante")
         flash(f"La fonctionnalité '{prochaine_fonctionnalite.nom}' est maintenant prioritaire.", "success")
     else:
         flash("Aucune fonctionnalité suivante disponible dans le backlog.", "warning")
@@ -521,12 +893,14 @@ def passer_a_fonctionnalite_suivante():
 
 
 @app.route('/soumettre_vote', methods=['POST'])
+@verrouiller_salle
 def soumettre_vote():
     """
     @brief Enregistre un vote pour la fonctionnalité prioritaire dans la structure state.
 
     @details
     Cette fonction gère l'enregistrement des votes pour une fonctionnalité prioritaire. Elle réalise les étapes suivantes :
+    - Vérifie que la carte fait partie du jeu (`CARTES_VOTE`).
     - Vérifie que le vote a été initié par le Scrum Master.
     - Vérifie que le participant existe et qu'il n'a pas encore voté.
     - Imposent des restrictions de vote pour le Product Owner et le Scrum Master (carte café uniquement).
@@ -542,16 +916,22 @@ def soumettre_vote():
     - Succès si le vote est enregistré.
     - Erreur ou avertissement si des conditions ne sont pas respectées.
     """
+    gestionnaire = gestionnaire_courant()
     pseudo = request.form.get("pseudo")
     vote = request.form.get("vote")
     
+    # Refuser les cartes qui ne font pas partie du jeu (le dépouillement ne saurait pas les compter)
+    if vote not in CARTES_VOTE:
+        flash(f"Carte de vote inconnue : {vote}.", "danger")
+        return redirect(url_for('salle_de_vote'))
+
     # Vérifier si le vote a été initié par le SM
-    if not app_manager.state["indicateurs"]["vote_commence"]:
+    if not gestionnaire.state["indicateurs"]["vote_commence"]:
         flash("Le vote n'a pas encore été initié par le Scrum Master.", "danger")
         return redirect(url_for('salle_de_vote'))
 
     # Vérifier que le participant existe
-    participant = next((p for p in app_manager.state["participants"] if p["pseudo"] == pseudo), None)
+    participant = gestionnaire.participants.par_pseudo(pseudo)
     if not participant:
         flash(f"Participant {pseudo} non trouvé.", "danger")
         return redirect(url_for('salle_de_vote'))
@@ -566,32 +946,30 @@ def soumettre_vote():
         flash(f"{pseudo} ne peut voter que pour la carte café.", "danger")
         return redirect(url_for('salle_de_vote'))
 
-    # Enregistrer le vote
-    participant["vote"] = vote
+    # Enregistrer le vote (met à jour les compteurs de la salle)
+    try:
+        gestionnaire.ajouter_vote(pseudo, vote)
+    except ValueError:
+        flash(f"{pseudo} a déjà voté.", "warning")
+        return redirect(url_for('salle_de_vote'))
 
     # Gestion spéciale pour la carte "?"
     if vote == "?":
-        app_manager.state["indicateurs"]["discussion_active"] = True
+        gestionnaire.state["indicateurs"]["discussion_active"] = True
+        gestionnaire.notifier("vote", pseudo=pseudo)
         flash("Un participant a voté '?'. Une discussion est nécessaire.", "warning")
         return redirect(url_for('salle_de_vote'))
     
-    # Vérifier si tout les Votants ont voté
-    participants_votants = [
-        p for p in app_manager.state["participants"] if p["fonction"] == "Votant"
-    ]
-    
-    # Vérifier si tout le monde a voté
-    all_participants = app_manager.state["participants"]  # Tous les participants, y compris SM et PO
-    
-    if all(p["vote"] == "cafe" for p in all_participants):
-        app_manager.sauvegarder_backlog("backlog_pause.json")
+    # Vérifier si tout le monde a voté café (tous les participants, y compris SM et PO)
+    if gestionnaire.tous_cafe():
+        gestionnaire.sauvegarder_backlog(gestionnaire.pause_file)
         flash("Tous les joueurs ont choisi la carte café. La réunion est suspendue.", "info")
-        app_manager.state["indicateurs"]["pause_cafe"] = True
+        gestionnaire.state["indicateurs"]["pause_cafe"] = True
     else:
-        app_manager.state["indicateurs"]["tout_le_monde_a_vote"] = True
+        gestionnaire.state["indicateurs"]["tout_le_monde_a_vote"] = True
         flash("Tous les participants ont voté.", "info")
     
-   
+    gestionnaire.notifier("vote", pseudo=pseudo)
     return redirect(url_for('salle_de_vote'))
 
 
@@ -621,6 +999,7 @@ def acces_sm():
     - La page HTML `acces_sm.html` avec toutes les données nécessaires.
     - Redirection vers la salle de vote ou le backlog avec un message en cas de problème.
     """
+    gestionnaire = gestionnaire_courant()
     # Vérifier le pseudo actif dans la session
     pseudo_actif = session.get('pseudo_actif')
     if not pseudo_actif:
@@ -628,25 +1007,24 @@ def acces_sm():
         return redirect(url_for('salle_de_vote'))
 
     # Vérifier que le participant actif est le Scrum Master
-    participant_actif = next((p for p in app_manager.state["participants"] if p["pseudo"] == pseudo_actif), None)
+    participant_actif = gestionnaire.participants.par_pseudo(pseudo_actif)
     if not participant_actif or participant_actif["fonction"].lower() != "scrum master":
         flash("Accès réservé au Scrum Master.", "danger")
         return redirect(url_for('salle_de_vote'))
 
     # Récupérer la fonctionnalité prioritaire
-    fonctionnalite_prioritaire = app_manager.afficher_fonctionnalite_prioritaire()
+    fonctionnalite_prioritaire = gestionnaire.afficher_fonctionnalite_prioritaire()
     if not fonctionnalite_prioritaire:
         flash("Aucune fonctionnalité prioritaire disponible.", "warning")
         return redirect(url_for('backlog'))
 
     # Récupérer les participants attendus
-    participants_attendus = app_manager.participants_backlog(fonctionnalite_prioritaire.id)
+    participants_attendus = gestionnaire.participants_backlog(fonctionnalite_prioritaire.id)
 
     # Récupérer les participants connectés
     participants_connectes = [
         participant["pseudo"]
-        for participant in app_manager.state["participants"]
-        if participant["fonction"] == "Votant"
+        for participant in gestionnaire.participants.avec_fonction("Votant")
     ]
 
     # Calculer les participants manquants
@@ -654,16 +1032,16 @@ def acces_sm():
     bouton_actif = len(difference) == 0  # Activer le bouton si tous les participants sont connectés
 
     # Vérifier si tout le monde a voté
-    tout_le_monde_a_vote = app_manager.tout_le_monde_a_vote()
-    votes_reveles = app_manager.state["indicateurs"]["votes_reveles"]
+    tout_le_monde_a_vote = gestionnaire.tout_le_monde_a_vote()
+    votes_reveles = gestionnaire.state["indicateurs"]["votes_reveles"]
     if votes_reveles:
-        votes = app_manager.reveler_votes()
+        votes = gestionnaire.reveler_votes()
     else:
         votes = {}
     
     # Vérifier si la fonctionnalité est approuvée
-    fonctionnalite_approuvee = app_manager.state["indicateurs"].get("fonctionnalite_approuvee", False)
-    print("fonctionnalite_approuvee", fonctionnalite_approuvee)
+    fonctionnalite_approuvee = gestionnaire.state["indicateurs"].get("fonctionnalite_approuvee", False)
+    app.logger.debug("fonctionnalite_approuvee : %s", fonctionnalite_approuvee)
     
     return render_template(
         'acces_sm.html',
@@ -682,6 +1060,7 @@ def acces_sm():
 
 
 @app.route('/faciliter_discussion', methods=['POST'])
+@verrouiller_salle
 def faciliter_discussion():
     """@brief Permet au Scrum Master de faciliter une discussion.
 
@@ -703,8 +1082,9 @@ def faciliter_discussion():
     - Redirection vers la page d'accès Scrum Master (`acces_sm`) avec un message d'information en cas de succès.
     - Redirection vers la salle de vote ou la page d'accès Scrum Master avec un message d'erreur en cas de problème.
     """
+    gestionnaire = gestionnaire_courant()
     pseudo_actif = session.get('pseudo_actif').strip()
-    print("pseudo actif dans acces sm ",pseudo_actif )
+    app.logger.debug("Pseudo actif : %s", pseudo_actif)
     if not pseudo_actif:
         flash("Aucun participant actif sélectionné.", "danger")
         return redirect(url_for('salle_de_vote'))
@@ -715,17 +1095,19 @@ def faciliter_discussion():
 
 
     # Vérification d'une fonctionnalité prioritaire
-    fonctionnalite_prioritaire = app_manager.afficher_fonctionnalite_prioritaire()
+    fonctionnalite_prioritaire = gestionnaire.afficher_fonctionnalite_prioritaire()
     if not fonctionnalite_prioritaire:
         flash("Aucune fonctionnalité prioritaire disponible pour initier la discussion.", "danger")
         return redirect(url_for('acces_sm'))
 
     # Marquer la discussion comme active dans l'indicateur global
-    app_manager.state["indicateurs"]["discussion_active"] = True
+    gestionnaire.state["indicateurs"]["discussion_active"] = True
+    gestionnaire.notifier("discussion")
     flash("Discussion initiée avec succès. Invitez les participants à échanger.", "info")
     return redirect(url_for('acces_sm'))
 
 @app.route('/valider_vote', methods=['POST'])
+@verrouiller_salle
 def valider_vote():
     """
 
@@ -751,28 +1133,27 @@ def valider_vote():
     - Redirection vers la page d'accès Scrum Master avec un message de succès si le vote est validé.
     - Redirection avec un message d'erreur ou d'avertissement si une condition n'est pas respectée.
     """
+    gestionnaire = gestionnaire_courant()
     pseudo_actif = session.get('pseudo_actif')
     if pseudo_actif != "sm":
         flash("Seul le Scrum Master peut valider le vote.", "danger")
         return redirect(url_for('acces_sm'))
 
-    # Récupérer les votes des participants votants
-    participants_votants = [
-        p for p in app_manager.state["participants"] if p["fonction"] == "Votant"
-    ]
-    votes = [p["vote"] for p in participants_votants]
+    # Répartition des votes des participants votants, tenue à jour à chaque vote
+    cartes = gestionnaire.participants.cartes_votants
+    nombre_votes = gestionnaire.participants.votes_votants
 
-    if not votes or any(vote is None for vote in votes):
+    if not nombre_votes or not gestionnaire.tout_le_monde_a_vote():
         flash("Tous les participants n'ont pas voté.", "warning")
         return redirect(url_for('acces_sm'))
 
     # Récupérer la fonctionnalité prioritaire et son mode de vote
-    fonctionnalite_id = app_manager.state.get('id_fonctionnalite')
+    fonctionnalite_id = gestionnaire.state.get('id_fonctionnalite')
     if not fonctionnalite_id:
         flash("Aucune fonctionnalité prioritaire sélectionnée.", "danger")
         return redirect(url_for('acces_sm'))
 
-    fonctionnalite = app_manager.get_fonctionnalite(fonctionnalite_id)
+    fonctionnalite = gestionnaire.get_fonctionnalite(fonctionnalite_id)
     if not fonctionnalite:
         flash("Fonctionnalité introuvable.", "danger")
         return redirect(url_for('acces_sm'))
@@ -782,45 +1163,46 @@ def valider_vote():
     # Gestion des différents modes de vote
     if mode_de_vote == "unanimite":
         # Vérifier si tous les votes sont identiques
-        if len(set(votes)) == 1:
-            app_manager.state["indicateurs"]["fonctionnalite_approuvee"] = True
-            fonctionnalite.statut = "Terminé"
-            flash(f"Vote validé avec succès. Résultat : {votes[0]}.", "success")
+        if len(cartes) == 1:
+            gestionnaire.state["indicateurs"]["fonctionnalite_approuvee"] = True
+            flash(f"Vote validé avec succès. Résultat : {next(iter(cartes))}.", "success")
         else:
-            app_manager.state["indicateurs"]["fonctionnalite_approuvee"] = False
+            gestionnaire.state["indicateurs"]["fonctionnalite_approuvee"] = False
             flash("Vote non approuvé. Tous les participants doivent voter la même carte.", "warning")
 
     elif mode_de_vote == "moyenne":
-        # Calcul de la moyenne et carte la plus proche (déjà implémentée)
-        moyenne = sum(int(v) for v in votes if v.isdigit()) / len(votes)
-        carte_proche = min(LISTE_CARTE_NUMERIQUE, key=lambda x: abs(int(x) - moyenne))
-        app_manager.state["indicateurs"]["fonctionnalite_approuvee"] = True
-        fonctionnalite.statut = "Terminé"
+        # Moyenne des cartes numériques et carte la plus proche (dépouillement vectorisé)
+        carte_proche = depouiller(cartes)["carte_moyenne"]
+        if carte_proche is None:
+            gestionnaire.state["indicateurs"]["fonctionnalite_approuvee"] = False
+            flash("Vote non approuvé. Aucune carte numérique n'a été votée.", "warning")
+            return redirect(url_for('acces_sm'))
+        gestionnaire.state["indicateurs"]["fonctionnalite_approuvee"] = True
         flash(f"Vote validé avec succès. Résultat (moyenne) : {carte_proche}.", "success")
 
     else:
         flash(f"Mode de vote inconnu : {mode_de_vote}.", "danger")
         return redirect(url_for('acces_sm'))
 
-    # Trier et sauvegarder le backlog
-    app_manager.trier_backlog()
-    app_manager.sauvegarder_backlog()
+    # Marquer la fonctionnalité comme terminée : repositionnée et sauvegardée sous le verrou du backlog
+    if gestionnaire.state["indicateurs"]["fonctionnalite_approuvee"]:
+        gestionnaire.modifier_fonctionnalite(fonctionnalite_id, statut="Terminé")
 
     # Passer à la fonctionnalité suivante (si disponible)
-    prochaine_fonctionnalite = next(
-        (f for f in app_manager.backlog if f.statut != "Terminé"), None
-    )
+    prochaine_fonctionnalite = gestionnaire.passer_a_fonctionnalite_suivante()
     if prochaine_fonctionnalite:
-        app_manager.state["id_fonctionnalite"] = prochaine_fonctionnalite.id
         flash(f"Passage à la fonctionnalité suivante : {prochaine_fonctionnalite.nom}.", "info")
     else:
         flash("Aucune autre fonctionnalité disponible dans le backlog.", "warning")
 
+    gestionnaire.notifier("validation", id_fonctionnalite_validee=fonctionnalite_id)
+
     return redirect(url_for('acces_sm'))
 
 
 
 @app.route('/reveler_votes', methods=['POST'])
+@verrouiller_salle
 def reveler_votes():
     """@brief Révèle les votes pour la fonctionnalité prioritaire.
 
@@ -842,8 +1224,9 @@ def reveler_votes():
     - Redirection vers la page d'accès Scrum Master (`acces_sm`) avec un message de succès si les votes sont révélés.
     - Redirection avec un message d'erreur ou d'avertissement en cas de problème.
     """
+    gestionnaire = gestionnaire_courant()
     pseudo_actif = session.get('pseudo_actif').strip()
-    print("pseudo actif dans acces sm ",pseudo_actif )
+    app.logger.debug("Pseudo actif : %s", pseudo_actif)
     if not pseudo_actif:
         flash("Aucun participant actif sélectionné.", "danger")
         return redirect(url_for('salle_de_vote'))
@@ -852,20 +1235,21 @@ def reveler_votes():
         flash(ACCES_RESERVE_SM, "danger")
         return redirect(url_for('acces_sm'))
 
-    fonctionnalite_prioritaire = app_manager.afficher_fonctionnalite_prioritaire()
+    fonctionnalite_prioritaire = gestionnaire.afficher_fonctionnalite_prioritaire()
     if not fonctionnalite_prioritaire:
         flash("Aucune fonctionnalité prioritaire trouvée pour révéler les votes.", "danger")
         return redirect(url_for('acces_sm'))
 
     # Récupérer les votes pour la fonctionnalité en cours
-    """  votes = app_manager.state.get("votes", {}).get(fonctionnalite_prioritaire.id, {})
+    """  votes = gestionnaire.state.get("votes", {}).get(fonctionnalite_prioritaire.id, {})
     if not votes:
         flash("Aucun vote à révéler pour la fonctionnalité prioritaire.", "warning")
         return redirect(url_for('acces_sm')) """
 
     # Révéler les votes via AppManager
-    votes_reveles = app_manager.reveler_votes()
+    votes_reveles = gestionnaire.reveler_votes()
     if votes_reveles:
+        gestionnaire.notifier("revelation")
         flash("Votes révélés avec succès.", "success")
     else:
         flash("Problème lors de la révélation des votes.", "danger")
@@ -873,6 +1257,7 @@ def reveler_votes():
     return redirect(url_for('acces_sm'))
 
 @app.route('/initier_vote', methods=['POST'])
+@verrouiller_salle
 def initier_vote():
     """@brief Démarre le vote pour la fonctionnalité prioritaire.
 
@@ -896,8 +1281,9 @@ def initier_vote():
     - Redirection vers la page d'accès Scrum Master (`acces_sm`) avec un message de succès si le vote est initié.
     - Redirection avec un message d'erreur ou d'avertissement en cas de problème.
     """
+    gestionnaire = gestionnaire_courant()
     pseudo_actif = session.get('pseudo_actif')
-    print("pseudo actif dans acces sm ",pseudo_actif )
+    app.logger.debug("Pseudo actif : %s", pseudo_actif)
     if not pseudo_actif:
         flash("Aucun participant actif sélectionné.", "danger")
         return redirect(url_for('salle_de_vote'))
@@ -905,20 +1291,21 @@ def initier_vote():
     pseudo_actif = pseudo_actif.strip()
 
     # Vérification d'une fonctionnalité prioritaire
-    fonctionnalite_prioritaire = app_manager.afficher_fonctionnalite_prioritaire()
+    fonctionnalite_prioritaire = gestionnaire.afficher_fonctionnalite_prioritaire()
     if not fonctionnalite_prioritaire:
         flash("Aucune fonctionnalité prioritaire trouvée pour initier le vote.", "danger")
         return redirect(url_for('acces_sm'))
 
     # Vérification de l'équipe complète
-    if not app_manager.is_team_complete(fonctionnalite_prioritaire):
+    if not gestionnaire.is_team_complete(fonctionnalite_prioritaire):
         flash("Tous les participants nécessaires ne sont pas encore connectés.", "warning")
         return redirect(url_for('acces_sm'))
 
     # Initialisation du vote via AppManager
     try:
-        app_manager.initier_vote(fonctionnalite_prioritaire.id)
-        app_manager.state["indicateurs"]["vote_commence"] = True
+        gestionnaire.initier_vote(fonctionnalite_prioritaire.id)
+        gestionnaire.state["indicateurs"]["vote_commence"] = True
+        gestionnaire.notifier("initiation")
         flash("Le vote a été initié avec succès.", "success")
     except Exception as e:
         flash(f"Erreur lors de l'initiation du vote : {e}", "danger")
@@ -926,6 +1313,7 @@ def initier_vote():
     return redirect(url_for('acces_sm'))
 
 @app.route('/reinitialiser_vote', methods=['POST'])
+@verrouiller_salle
 def reinitialiser_vote():   
     """
     @brief Réinitialise tous les votes et remet l'état global à jour.
@@ -950,22 +1338,24 @@ def reinitialiser_vote():
     @return
     - Redirection vers la page d'accès Scrum Master (`acces_sm`) avec un message de succès ou d'erreur selon le cas.
     """
+    gestionnaire = gestionnaire_courant()
     # Vérification d'une fonctionnalité prioritaire
-    fonctionnalite_prioritaire = app_manager.afficher_fonctionnalite_prioritaire()
+    fonctionnalite_prioritaire = gestionnaire.afficher_fonctionnalite_prioritaire()
     if not fonctionnalite_prioritaire:
         flash("Aucune fonctionnalité prioritaire trouvée pour réinitialiser les votes.", "danger")
         return redirect(url_for('acces_sm'))
 
     # Réinitialisation des votes via AppManager
     try:
-        app_manager.reinitialiser_votes()
+        gestionnaire.reinitialiser_votes()
         # Réinitialiser les indicateurs pour revenir à l'état initial
-        app_manager.state["indicateurs"]["vote_commence"] = False
-        app_manager.state["indicateurs"]["votes_reveles"] = False
-        app_manager.state["indicateurs"]["tout_le_monde_a_vote"] = False
-        app_manager.state["indicateurs"]["discussion_active"] = False
-        app_manager.state["indicateurs"]["pause_cafe"] = False
-        app_manager.state["indicateurs"]["fonctionnalite_approuvee"] = False
+        gestionnaire.state["indicateurs"]["vote_commence"] = False
+        gestionnaire.state["indicateurs"]["votes_reveles"] = False
+        gestionnaire.state["indicateurs"]["tout_le_monde_a_vote"] = False
+        gestionnaire.state["indicateurs"]["discussion_active"] = False
+        gestionnaire.state["indicateurs"]["pause_cafe"] = False
+        gestionnaire.state["indicateurs"]["fonctionnalite_approuvee"] = False
+        gestionnaire.notifier("reinitialisation")
 
         flash("Les votes ont été réinitialisés avec succès.", "info")
     except Exception as e:
@@ -990,8 +1380,13 @@ def charger_backlog_pause():
     - Redirection vers la salle de vote (`salle_de_vote`) avec un message de succès si le fichier est chargé correctement.
     - Redirection avec un message d'erreur en cas de problème lors du chargement.
     """
+    gestionnaire = gestionnaire_courant()
     try:
-        app_manager.backlog = app_manager.charger_backlog("backlog_pause.json")
+        with gestionnaire.verrou_backlog:
+            backlog_pause = gestionnaire.charger_backlog(gestionnaire.pause_file)
+            backlog_pause.version = gestionnaire.backlog.version + 1  # version toujours croissante (ETag)
+            gestionnaire.backlog = backlog_pause
+            gestionnaire.marquer_modifie()
         flash("Backlog de la pause café chargé avec succès.", "success")
     except Exception as e:
         flash(f"Erreur lors du chargement du backlog de la pause café : {e}", "danger")
@@ -999,20 +1394,159 @@ def charger_backlog_pause():
 
 
 @app.route('/backlog')
+@reponse_conditionnelle
 def backlog():
     """
-    @brief Affiche le backlog des fonctionnalités.
+    @brief Affiche une page du backlog des fonctionnalités.
+
+    @details Les fonctionnalités sont affichées par pages de `taille` (paramètre
+    optionnel, `TAILLE_PAGE_BACKLOG` par défaut), dans l'ordre de priorité. Le paramètre
+    `apres` est le curseur de la page suivante, fourni par la page précédente.
+
+    @return La page HTML du backlog, ou une redirection vers la première page si le curseur est invalide.
+    """
+    gestionnaire = gestionnaire_courant()
+    taille = request.args.get('taille', TAILLE_PAGE_BACKLOG, type=int)
+    try:
+        fonctionnalites, suivant = gestionnaire.page_backlog(request.args.get('apres'), taille)
+    except ValueError:
+        flash("Page du backlog introuvable, retour à la première page.", "warning")
+        return redirect(url_for('backlog'))
+    return render_template(
+        'backlog.html', backlog=fonctionnalites, suivant=suivant,
+        taille=taille, premiere_page=not request.args.get('apres'),
+    )
+
+# Backlog paginé en JSON
+@app.route('/backlog/liste')
+@reponse_conditionnelle
+def liste_backlog():
+    """
+    @brief Retourne une page du backlog en JSON.
+
+    @details Mêmes paramètres que `/backlog` (`apres`, `taille`). Le champ `suivant`
+    de la réponse est le curseur de la page suivante, ou null pour la dernière page.
+
+    @return JSON {"fonctionnalites": [...], "suivant": curseur}, ou 400 si le curseur est invalide.
+    """
+    gestionnaire = gestionnaire_courant()
+    try:
+        fonctionnalites, suivant = gestionnaire.page_backlog(
+            request.args.get('apres'), request.args.get('taille', TAILLE_PAGE_BACKLOG, type=int)
+        )
+    except ValueError as e:
+        return jsonify({"erreur": str(e)}), 400
+    return jsonify({"fonctionnalites": [f.to_dict() for f in fonctionnalites], "suivant": suivant})
+
+# Métriques au format texte de Prometheus
+@app.route('/metrics')
+def metriques():
+    """
+    @brief Expose les métriques du serveur au format texte de Prometheus.
+
+    @details
+    Compteurs de requêtes et histogrammes de latence par route, puis jauges calculées
+    à la lecture : salles ouvertes, participants et taille du backlog par salle, nombre
+    d'appels et temps cumulé de `sauvegarder_backlog`.
+
+    @return Réponse `text/plain` au format d'exposition Prometheus 0.0.4.
+    """
+    with registre_salles.verrou:
+        salles = sorted(registre_salles.salles.items())
+    jauges = [
+        ("salles", "gauge", "Salles de vote ouvertes dans ce processus.", [("", [], len(salles))]),
+        ("participants", "gauge", "Participants connectés, par salle.",
+         [("", [("salle", id_salle)], len(gestionnaire.participants)) for id_salle, gestionnaire in salles]),
+        ("backlog_fonctionnalites", "gauge", "Fonctionnalités du backlog, par salle.",
+         [("", [("salle", id_salle)], len(gestionnaire.backlog)) for id_salle, gestionnaire in salles]),
+        ("sauvegarde_backlog_secondes", "summary", "Temps passé dans sauvegarder_backlog, par salle.",
+         [echantillon for id_salle, gestionnaire in salles for echantillon in (
+             ("_sum", [("salle", id_salle)], gestionnaire.duree_sauvegardes),
+             ("_count", [("salle", id_salle)], gestionnaire.nombre_sauvegardes),
+         )]),
+    ]
+    return Response(metriques_requetes.exporter(jauges), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def est_scrum_master():
+    """
+    @brief Indique si le participant actif de la session est le Scrum Master de la salle courante.
+
+    @return bool: True si le participant actif est le Scrum Master.
+    """
+    participant_actif = gestionnaire_courant().participants.par_pseudo(session.get('pseudo_actif'))
+    return bool(participant_actif) and participant_actif["fonction"].lower() == "scrum master"
+
+# Configuration du profilage à la demande (Scrum Master uniquement)
+@app.route('/profilage', methods=['GET', 'POST'])
+def profilage():
+    """
+    @brief Affiche ou modifie la configuration du profilage cProfile, sans redémarrer le serveur.
+
+    @details
+    En POST (formulaire ou JSON) : `actif` ("1" ou "0"), `routes` (noms de routes séparés
+    par des virgules, vide pour toutes) et `echantillon` (profiler une requête sur N).
+    Le profilage concerne tout le processus, pas seulement la salle du Scrum Master.
+
+    @return JSON de la configuration et des profils enregistrés, 400 si la configuration est invalide,
+    ou 403 si le participant actif n'est pas le Scrum Master.
+    """
+    if not est_scrum_master():
+        return jsonify({"erreur": ACCES_RESERVE_SM}), 403
+
+    if request.method == 'POST':
+        donnees = request.get_json(silent=True) or request.form
+        try:
+            routes = donnees.get('routes', '')
+            profileur.configurer(
+                str(donnees.get('actif', '1')).lower() in ("1", "true", "oui"),
+                routes.split(",") if isinstance(routes, str) else routes,
+                int(donnees.get('echantillon') or 1)
+            )
+        except (AttributeError, TypeError, ValueError) as e:
+            return jsonify({"erreur": str(e)}), 400
+        app.logger.info("Profilage reconfiguré : %s", profileur.configuration())
+
+    return jsonify({**profileur.configuration(), "profils": profileur.lister()})
+
+# Fonctions les plus coûteuses des profils enregistrés (Scrum Master uniquement)
+@app.route('/profilage/fonctions')
+def profilage_fonctions():
+    """
+    @brief Retourne les fonctions au plus fort temps cumulé, agrégées sur les profils récents.
 
-    @details Cette route retourne une vue contenant 
-    toutes les fonctionnalités du backlog.
+    @details Paramètres : `route` (profils d'une seule route) et `limite` (nombre de fonctions).
 
-    @return La page HTML du backlog.
+    @return JSON de la liste des fonctions, ou 403 si le participant actif n'est pas le Scrum Master.
     """
-    app_manager.trier_backlog()  #  backlog trié
-    app_manager.sauvegarder_backlog()
-    backlog = app_manager.lister_backlog()
-    return render_template('backlog.html', backlog=backlog)
+    if not est_scrum_master():
+        return jsonify({"erreur": ACCES_RESERVE_SM}), 403
+    limite = request.args.get('limite', LIMITE_FONCTIONS_PROFIL, type=int)
+    return jsonify(profileur.meilleures_fonctions(request.args.get('route'), limite))
+
+# Traces des requêtes au format Chrome trace-event (Scrum Master uniquement)
+@app.route('/traces', methods=['GET', 'POST'])
+def traces():
+    """
+    @brief Exporte les traces des dernières requêtes, ou active et désactive le traçage.
+
+    @details
+    En GET : document JSON Chrome trace-event (à ouvrir dans `chrome://tracing` ou Perfetto),
+    filtré sur le nom de requête avec le paramètre `requete` (ex. `soumettre_vote`).
+    En POST : champ `actif` ("1" ou "0"). Le traçage concerne tout le processus.
+
+    @return JSON des traces ou de l'état du traçage, ou 403 si le participant actif n'est pas le Scrum Master.
+    """
+    if not est_scrum_master():
+        return jsonify({"erreur": ACCES_RESERVE_SM}), 403
+
+    if request.method == 'POST':
+        donnees = request.get_json(silent=True) or request.form
+        traces_requetes.actif = str(donnees.get('actif', '1')).lower() in ("1", "true", "oui")
+        app.logger.info("Traçage des requêtes %s.", "activé" if traces_requetes.actif else "désactivé")
+        return jsonify({"actif": traces_requetes.actif})
+
+    return jsonify(traces_requetes.exporter_chrome(request.args.get('requete')))
 
 # Démarrer l'application Flask (le serveur en mode debbugage)
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True, threaded=True)
\ No newline at end of file
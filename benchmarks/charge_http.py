@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+
+'''
+@file
+@brief Banc de charge HTTP du déroulement d'un vote.
+
+@details
+Lance l'application localement (ou cible un serveur existant avec `--url`) et
+joue des sessions scriptées dans N salles en parallèle : connexion, initiation
+du vote, votes simultanés des votants, révélation, validation et consultation du
+backlog. Pour chaque route, le débit et les latences p50/p95/p99 sont affichés
+puis enregistrés en JSON pour comparer les versions.
+
+Usage : python -m benchmarks.charge_http --salles 20 --tours 5 [--comparer ancien.json]
+'''
+
+import argparse
+import glob
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+from constantes import *
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOSSIER_RESULTATS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultats")
+
+# Seuls ces pseudos peuvent voter (participants des fonctionnalités du backlog)
+VOTANTS_DISPONIBLES = ["lina", "hugo"]
+PREFIXE_SALLE = "bench-"
+
+CODE_SERVEUR = "import sys; from app import app; app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True)"
+
+
+# Mesures collectées par route
+class Mesures:
+    """
+    @brief Latences et erreurs par route, alimentées par plusieurs threads.
+    """
+
+    def __init__(self):
+        self.latences = defaultdict(list)  # {route: [secondes]}
+        self.erreurs = defaultdict(int)  # {route: nombre}
+        self.statuts = defaultdict(lambda: defaultdict(int))  # {route: {code HTTP: nombre}}
+        self.verrou = threading.Lock()
+
+    def ajouter(self, route, duree, statut):
+        with self.verrou:
+            self.latences[route].append(duree)
+            self.statuts[route][statut] += 1
+            if statut == 0 or statut >= 500:
+                self.erreurs[route] += 1
+
+    def resume(self, duree_totale):
+        """
+        @brief Calcule débit et percentiles de chaque route.
+
+        @param duree_totale Durée du banc (secondes).
+
+        @return dict: {route: {requetes, erreurs, statuts, debit, p50_ms, p95_ms, p99_ms}}.
+        """
+        resultats = {}
+        for route, latences in sorted(self.latences.items()):
+            p50, p95, p99 = np.percentile(np.array(latences) * 1000, [50, 95, 99])
+            resultats[route] = {
+                "requetes": len(latences),
+                "erreurs": self.erreurs[route],
+                "statuts": {str(code): n for code, n in sorted(self.statuts[route].items())},
+                "debit": round(len(latences) / duree_totale, 2),
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+            }
+        return resultats
+
+
+# Navigateur simulé : une connexion HTTP et ses cookies
+class Client:
+    """
+    @brief Participant simulé qui conserve ses cookies de session d'une requête à l'autre.
+    """
+
+    def __init__(self, hote, port, entete_host, mesures):
+        self.connexion = http.client.HTTPConnection(hote, port, timeout=30)
+        self.entete_host = entete_host
+        self.cookies = SimpleCookie()
+        self.mesures = mesures
+
+    def requete(self, methode, route, donnees=None):
+        """
+        @brief Envoie une requête (sans suivre les redirections) et mesure sa latence.
+
+        @param methode "GET" ou "POST".
+        @param route Chemin de la route (ex. "/soumettre_vote").
+        @param donnees Champs du formulaire pour un POST.
+
+        @return int: Code HTTP, ou 0 si la connexion a échoué.
+        """
+        en_tetes = {"Host": self.entete_host}
+        if self.cookies:
+            en_tetes["Cookie"] = "; ".join(f"{c.key}={c.value}" for c in self.cookies.values())
+        corps = None
+        if donnees is not None:
+            corps = urlencode(donnees)
+            en_tetes["Content-Type"] = "application/x-www-form-urlencoded"
+
+        debut = time.perf_counter()
+        try:
+            self.connexion.request(methode, route, body=corps, headers=en_tetes)
+            reponse = self.connexion.getresponse()
+            reponse.read()
+            statut = reponse.status
+            for valeur in reponse.headers.get_all("Set-Cookie") or []:
+                self.cookies.load(valeur)
+        except (OSError, http.client.HTTPException):
+            self.connexion.close()
+            statut = 0
+        self.mesures.ajouter(route, time.perf_counter() - debut, statut)
+        return statut
+
+    def fermer(self):
+        self.connexion.close()
+
+
+def jouer_salle(id_salle, votants, tours, cible, mesures):
+    """
+    @brief Joue une session complète dans une salle : connexions, tours de vote, déconnexion.
+
+    @param id_salle Identifiant de la salle.
+    @param votants Pseudos des votants.
+    @param tours Nombre de tours de vote.
+    @param cible Tuple (hôte, port, en-tête Host).
+    @param mesures Objet Mesures partagé.
+    """
+    sm, po = Client(*cible, mesures), Client(*cible, mesures)
+    clients_votants = {pseudo: Client(*cible, mesures) for pseudo in votants}
+
+    sm.requete("POST", "/login", {"pseudo": "sm", "salle": id_salle})
+    po.requete("POST", "/login", {"pseudo": "po", "salle": id_salle})
+    for pseudo, client in clients_votants.items():
+        client.requete("POST", "/login", {"pseudo": pseudo, "salle": id_salle})
+    sm.requete("POST", "/set_pseudo_actif", {"pseudo": "sm"})
+
+    for _ in range(tours):
+        sm.requete("POST", "/initier_vote")
+
+        # Votes simultanés : un thread par votant
+        threads = [
+            threading.Thread(target=client.requete, args=("POST", "/soumettre_vote", {
+                "pseudo": pseudo, "vote": random.choice(LISTE_CARTE_NUMERIQUE[:3])
+            }))
+            for pseudo, client in clients_votants.items()
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        sm.requete("POST", "/reveler_votes")
+        sm.requete("POST", "/valider_vote")
+        po.requete("GET", "/backlog")
+
+    sm.requete("GET", "/logout")
+    for client in [sm, po, *clients_votants.values()]:
+        client.fermer()
+
+
+def attendre_serveur(hote, port, delai=15):
+    """
+    @brief Attend que le serveur accepte les connexions.
+
+    @throws RuntimeError Si le serveur ne répond pas dans le délai.
+    """
+    fin = time.time() + delai
+    while time.time() < fin:
+        try:
+            socket.create_connection((hote, port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Le serveur {hote}:{port} ne répond pas.")
+
+
+def version_code():
+    """
+    @brief Retourne le commit git courant, pour identifier la version mesurée.
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=RACINE, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparer(resultats, fichier_reference):
+    """
+    @brief Affiche l'évolution du p95 et du débit de chaque route par rapport à un résultat enregistré.
+
+    @param resultats Résultats du banc courant.
+    @param fichier_reference Fichier JSON d'un banc précédent.
+    """
+    with open(fichier_reference, "r", encoding="utf-8") as fichier:
+        reference = json.load(fichier)["routes"]
+    print(f"\nComparaison avec {fichier_reference} :")
+    for route, mesure in resultats["routes"].items():
+        ancienne = reference.get(route)
+        if not ancienne:
+            continue
+        evolution = (mesure["p95_ms"] - ancienne["p95_ms"]) / ancienne["p95_ms"] * 100 if ancienne["p95_ms"] else 0
+        print(f"  {route:<22} p95 {ancienne['p95_ms']:>8.2f} -> {mesure['p95_ms']:>8.2f} ms ({evolution:+.1f} %)"
+              f"   débit {ancienne['debit']:>8.2f} -> {mesure['debit']:>8.2f} req/s")
+
+
+def executer(nombre_salles, nombre_votants, tours, url=None, port=5050):
+    """
+    @brief Exécute le banc de charge.
+
+    @param nombre_salles Nombre de salles jouées en parallèle.
+    @param nombre_votants Votants par salle (limité aux pseudos autorisés).
+    @param tours Tours de vote par salle.
+    @param url Serveur existant à cibler ; None pour lancer l'application localement.
+    @param port Port de l'application lancée localement.
+
+    @return dict: Paramètres, totaux et mesures par route.
+    """
+    votants = VOTANTS_DISPONIBLES[:nombre_votants]
+    if nombre_votants > len(VOTANTS_DISPONIBLES):
+        print(f"Seuls {len(VOTANTS_DISPONIBLES)} votants sont autorisés par salle : {votants}.")
+
+    serveur = None
+    if url:
+        cible_url = urlsplit(url)
+        cible = (cible_url.hostname, cible_url.port or 80, cible_url.netloc)
+    else:
+        # Le nom d'hôte doit correspondre à SERVER_NAME, quel que soit le port local
+        cible = ("127.0.0.1", port, NOM_SERVEUR)
+        serveur = subprocess.Popen([sys.executable, "-c", CODE_SERVEUR, str(port)], cwd=RACINE,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        attendre_serveur(cible[0], cible[1])
+        mesures = Mesures()
+        salles = [f"{PREFIXE_SALLE}{i}" for i in range(nombre_salles)]
+        threads = [threading.Thread(target=jouer_salle, args=(s, votants, tours, cible, mesures)) for s in salles]
+
+        debut = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duree = time.perf_counter() - debut
+    finally:
+        if serveur:
+            serveur.terminate()
+            serveur.wait()
+            # backlogs copiés pour les salles du banc
+            for dossier in glob.glob(os.path.join(RACINE, "data", DOSSIER_SALLES, PREFIXE_SALLE + "*")):
+                shutil.rmtree(dossier, ignore_errors=True)
+
+    routes = mesures.resume(duree)
+    total = sum(r["requetes"] for r in routes.values())
+    return {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "version": version_code(),
+        "parametres": {"salles": nombre_salles, "votants": len(votants), "tours": tours, "url": url},
+        "duree_s": round(duree, 3),
+        "requetes": total,
+        "debit": round(total / duree, 2),
+        "votes_par_seconde": round(routes.get("/soumettre_vote", {}).get("requetes", 0) / duree, 2),
+        "routes": routes,
+    }
+
+
+def afficher(resultats):
+    """
+    @brief Affiche le tableau des mesures par route.
+    """
+    print(f"\n{resultats['requetes']} requêtes en {resultats['duree_s']} s : "
+          f"{resultats['debit']} req/s, {resultats['votes_par_seconde']} votes/s")
+    print(f"  {'route':<22}{'requêtes':>9}{'erreurs':>9}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, m in resultats["routes"].items():
+        print(f"  {route:<22}{m['requetes']:>9}{m['erreurs']:>9}{m['debit']:>10}{m['p50_ms']:>10}{m['p95_ms']:>10}{m['p99_ms']:>10}")
+
+
+# Point d'entrée du banc de charge
+if __name__ == "__main__":
+    parseur = argparse.ArgumentParser(description="Banc de charge HTTP du déroulement d'un vote.")
+    parseur.add_argument("--salles", type=int, default=10, help="nombre de salles jouées en parallèle")
+    parseur.add_argument("--votants", type=int, default=len(VOTANTS_DISPONIBLES), help="votants par salle")
+    parseur.add_argument("--tours", type=int, default=3, help="tours de vote par salle")
+    parseur.add_argument("--url", help="serveur existant à cibler (ex. http://127.0.0.1:5000)")
+    parseur.add_argument("--port", type=int, default=5050, help="port de l'application lancée localement")
+    parseur.add_argument("--sortie", help="fichier JSON des résultats (par défaut : benchmarks/resultats/)")
+    parseur.add_argument("--comparer", help="fichier JSON d'un banc précédent à comparer")
+    arguments = parseur.parse_args()
+
+    resultats = executer(arguments.salles, arguments.votants, arguments.tours, arguments.url, arguments.port)
+    afficher(resultats)
+
+    sortie = arguments.sortie or os.path.join(DOSSIER_RESULTATS, f"charge-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(sortie), exist_ok=True)
+    with open(sortie, "w", encoding="utf-8") as fichier:
+        json.dump(resultats, fichier, indent=4, ensure_ascii=False)
+    print(f"Résultats enregistrés dans {sortie}.")
+
+    if arguments.comparer:
+        comparer(resultats, arguments.comparer)
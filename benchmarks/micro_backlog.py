@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+
+'''
+@file
+@brief Micro-benchmarks des opérations d'AppManager sur de grands backlogs.
+
+@details
+Un backlog synthétique déterministe (même graine, même contenu) est généré pour
+chaque taille. Le banc chronomètre le chargement, la sauvegarde, le tri complet,
+le rapport de difficulté par bande de priorité, l'ajout, la modification, la
+suppression et la lecture par ID, et mesure le pic mémoire du chargement et la
+mémoire occupée par fonctionnalité. `--moteur colonnes` mesure le backlog en
+colonnes NumPy, `--stockage binaire` le backlog projeté en mémoire depuis le
+fichier binaire (la projection n'est pas comptée dans la mémoire). Les résultats sont écrits en JSON ; avec `--reference`, toute
+opération plus lente que la référence au-delà du seuil fait échouer le banc
+(code de sortie 1).
+
+Usage : python -m benchmarks.micro_backlog --tailles 1000,10000 [--moteur colonnes] [--stockage binaire] [--reference ancien.json --seuil 0.2]
+'''
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from constantes import *
+from models.app_manager import AppManager
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOSSIER_RESULTATS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultats")
+
+TAILLES_PAR_DEFAUT = [1_000, 10_000, 100_000, 1_000_000]
+REPETITIONS_MAX = 1_000  # opérations unitaires chronométrées par taille
+ESSAIS = 3  # mesures des opérations sur tout le backlog, la meilleure est retenue
+SEUIL_REGRESSION = 0.20  # 20 % plus lent que la référence
+
+
+def generer_backlog(taille, graine=42):
+    """
+    @brief Génère un backlog synthétique déterministe.
+
+    @param taille Nombre de fonctionnalités.
+    @param graine Graine du générateur pseudo-aléatoire.
+
+    @return list: Dictionnaires de fonctionnalités au format de `backlog.json`.
+    """
+    aleatoire = random.Random(graine)
+    statuts = [STATUT_A_FAIRE, STATUT_EN_COURS, STATUT_TERMINE]
+    modes = [VOTE_UNANIMITE, VOTE_MOYENNE]
+    return [
+        {
+            "id": i,
+            "nom": f"Fonctionnalité {i}",
+            "description": f"Description de la fonctionnalité {i}",
+            "priorite": aleatoire.randint(PRIORITE_MIN, PRIORITE_MAX),
+            "difficulte": int(aleatoire.choice(LISTE_CARTE_NUMERIQUE)),
+            "statut": aleatoire.choice(statuts),
+            "mode_de_vote": aleatoire.choice(modes),
+            "participants": ["lina", "hugo"],
+        }
+        for i in range(1, taille + 1)
+    ]
+
+
+def chronometrer(fonction, repetitions=1, essais=1):
+    """
+    @brief Exécute une fonction et mesure sa durée.
+
+    @param fonction Fonction appelée avec l'indice de répétition.
+    @param repetitions Nombre d'appels.
+    @param essais Nombre de mesures ; la plus rapide est retenue.
+
+    @return dict: Durée totale (s), durée moyenne par opération (µs) et nombre de répétitions.
+    """
+    total = float("inf")
+    for _ in range(essais):
+        debut = time.perf_counter()
+        for i in range(repetitions):
+            fonction(i)
+        total = min(total, time.perf_counter() - debut)
+    return {"total_s": round(total, 6), "par_op_us": round(total / repetitions * 1e6, 3), "repetitions": repetitions}
+
+
+def mesurer_taille(taille, dossier, moteur_backlog=MOTEUR_BACKLOG, moteur_stockage="json"):
+    """
+    @brief Mesure toutes les opérations pour une taille de backlog.
+
+    @param taille Nombre de fonctionnalités.
+    @param dossier Dossier temporaire des fichiers backlog.
+    @param moteur_backlog Moteur du backlog en mémoire ("objets" ou "colonnes").
+    @param moteur_stockage Stockage du backlog ("json" ou "binaire").
+
+    @return dict: Mesures par opération, pic mémoire du chargement (Mo) et octets par fonctionnalité chargée.
+    """
+    fichier = os.path.join(dossier, f"backlog-{taille}.json")
+    with open(fichier, "w", encoding="utf-8") as sortie:
+        json.dump({"backlog": generer_backlog(taille)}, sortie, ensure_ascii=False)
+
+    # Écritures différées et journal désactivés : seul le modèle est mesuré
+    gestionnaire = AppManager(
+        backlog_file=fichier, delai_sauvegarde=3600, journalisation=False,
+        moteur_stockage=moteur_stockage, moteur_backlog=moteur_backlog,
+    )
+    repetitions = min(REPETITIONS_MAX, taille)
+    aleatoire = random.Random(taille)
+    ids = [aleatoire.randint(1, taille) for _ in range(repetitions)]
+    mesures = {}
+
+    mesures["charger_backlog"] = chronometrer(lambda i: gestionnaire.charger_backlog(), essais=ESSAIS)
+    mesures["sauvegarder_backlog"] = chronometrer(lambda i: gestionnaire.sauvegarder_backlog(), essais=ESSAIS)
+    mesures["trier_backlog"] = chronometrer(lambda i: gestionnaire.trier_backlog(), essais=ESSAIS)
+    mesures["rapport_difficulte"] = chronometrer(lambda i: gestionnaire.rapport_difficulte(), essais=ESSAIS)
+    mesures["get_fonctionnalite"] = chronometrer(lambda i: gestionnaire.get_fonctionnalite(ids[i]), repetitions)
+    mesures["modifier_fonctionnalite"] = chronometrer(
+        lambda i: gestionnaire.modifier_fonctionnalite(ids[i], priorite=(i % PRIORITE_MAX) + 1), repetitions
+    )
+    mesures["ajout_fonctionnalite"] = chronometrer(
+        lambda i: gestionnaire.ajout_fonctionnalite(f"Ajout {i}", "Banc", (i % PRIORITE_MAX) + 1, 3), repetitions
+    )
+    a_supprimer = list(dict.fromkeys(ids))
+    mesures["supprimer_fonctionnalite"] = chronometrer(
+        lambda i: gestionnaire.supprimer_fonctionnalite(a_supprimer[i]), len(a_supprimer)
+    )
+
+    gestionnaire.modifie = False  # ne pas réécrire le fichier temporaire à la fermeture
+    gestionnaire.fermer()
+
+    # Mémoire mesurée à part : tracemalloc ralentit les allocations chronométrées.
+    # Seules les allocations postérieures à `start` sont suivies : la mémoire courante
+    # après le chargement est celle du nouveau backlog, qui reste en mémoire.
+    tracemalloc.start()
+    backlog = gestionnaire.charger_backlog()
+    courant, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    taille_chargee = len(backlog)
+    backlog = None
+    os.remove(fichier)
+    if gestionnaire.fichier_binaire:
+        os.remove(gestionnaire.fichier_binaire)
+    return {
+        "operations": mesures,
+        "memoire_pic_mo": round(pic / 2**20, 2),
+        "octets_par_fonctionnalite": round(courant / taille_chargee),
+    }
+
+
+def comparer(resultats, reference, seuil):
+    """
+    @brief Compare les temps par opération à une référence.
+
+    @param resultats Résultats du banc courant.
+    @param reference Résultats d'un banc précédent.
+    @param seuil Ralentissement toléré (0.2 = 20 %).
+
+    @return list: Messages décrivant les régressions (vide si aucune).
+    """
+    regressions = []
+    for taille, mesures in resultats["tailles"].items():
+        mesures_reference = reference["tailles"].get(taille)
+        if not mesures_reference:
+            continue
+        for operation, mesure in mesures["operations"].items():
+            ancienne = mesures_reference["operations"].get(operation)
+            if ancienne and mesure["par_op_us"] > ancienne["par_op_us"] * (1 + seuil):
+                regressions.append(
+                    f"{operation} ({taille}) : {ancienne['par_op_us']} -> {mesure['par_op_us']} µs/op"
+                )
+    return regressions
+
+
+def version_code():
+    """
+    @brief Retourne le commit git courant, pour identifier la version mesurée.
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=RACINE, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Point d'entrée des micro-benchmarks
+if __name__ == "__main__":
+    parseur = argparse.ArgumentParser(description="Micro-benchmarks d'AppManager sur de grands backlogs.")
+    parseur.add_argument("--tailles", default=",".join(map(str, TAILLES_PAR_DEFAUT)),
+                         help="tailles de backlog séparées par des virgules")
+    parseur.add_argument("--moteur", default=MOTEUR_BACKLOG, choices=["objets", "colonnes"],
+                         help="moteur du backlog en mémoire")
+    parseur.add_argument("--stockage", default="json", choices=["json", "binaire"], help="stockage du backlog")
+    parseur.add_argument("--sortie", help="fichier JSON des résultats (par défaut : benchmarks/resultats/)")
+    parseur.add_argument("--reference", help="fichier JSON d'un banc précédent")
+    parseur.add_argument("--seuil", type=float, default=SEUIL_REGRESSION, help="ralentissement toléré (0.2 = 20 %%)")
+    arguments = parseur.parse_args()
+
+    resultats = {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"), "version": version_code(), "moteur": arguments.moteur,
+        "stockage": arguments.stockage, "tailles": {},
+    }
+    with tempfile.TemporaryDirectory() as dossier:
+        for taille in (int(t) for t in arguments.tailles.split(",")):
+            resultats["tailles"][str(taille)] = mesures = mesurer_taille(
+                taille, dossier, arguments.moteur, arguments.stockage
+            )
+            print(f"{taille} fonctionnalités (pic mémoire du chargement : {mesures['memoire_pic_mo']} Mo, "
+                  f"{mesures['octets_par_fonctionnalite']} octets par fonctionnalité)")
+            for operation, mesure in mesures["operations"].items():
+                print(f"  {operation:<26}{mesure['par_op_us']:>14.3f} µs/op  ({mesure['repetitions']} op.)")
+
+    sortie = arguments.sortie or os.path.join(DOSSIER_RESULTATS, f"micro-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(sortie), exist_ok=True)
+    with open(sortie, "w", encoding="utf-8") as fichier:
+        json.dump(resultats, fichier, indent=4, ensure_ascii=False)
+    print(f"Résultats enregistrés dans {sortie}.")
+
+    if arguments.reference:
+        with open(arguments.reference, "r", encoding="utf-8") as fichier:
+            regressions = comparer(resultats, json.load(fichier), arguments.seuil)
+        for message in regressions:
+            print(f"Régression : {message}")
+        sys.exit(1 if regressions else 0)
@@ -55,3 +55,67 @@ PRIORITE_MIN = 1
 PRIORITE_MAX = 10
 DIFFICULTE_MIN = 1
 DIFFICULTE_MAX = 100
+
+# Salles de vote
+SALLE_PAR_DEFAUT = "defaut"
+DOSSIER_SALLES = "salles"  # sous-dossier de data/ contenant les backlogs des salles
+MOTIF_ID_SALLE = r"[a-z0-9_-]{1,64}"
+
+# Diffusion Server-Sent Events
+TAILLE_FILE_SSE = 32  # événements en attente par abonné
+DELAI_KEEPALIVE_SSE = 15  # secondes entre deux commentaires de maintien de connexion
+
+# Attente longue (long polling) de l'état de la salle, pour les clients sans SSE
+ATTENTE_MAX_ETAT = 25  # secondes d'attente maximale d'un changement par requête
+DELAI_SYNCHRONISATION_ATTENTE = 0.5  # secondes entre deux relectures de l'état partagé pendant l'attente
+
+# Persistance du backlog
+DELAI_SAUVEGARDE_DIFFEREE = 2  # secondes de regroupement des écritures du backlog
+JOURNALISATION_BACKLOG = True  # journal des modifications au lieu de réécrire le backlog
+EXTENSION_JOURNAL = ".journal"
+SEUIL_COMPACTION_JOURNAL = 500  # opérations journalisées avant réécriture de l'instantané
+TAILLE_BLOC_LECTURE = 1 << 20  # caractères lus à la fois par le chargement incrémental du backlog
+LIMITE_MESSAGES_CHARGEMENT = 20  # anomalies de chargement détaillées dans le journal
+TAILLE_PAGE_BACKLOG = 50  # fonctionnalités par page du backlog
+TAILLE_PAGE_BACKLOG_MAX = 500
+TAILLE_BLOC_ORDRE = 1000  # fonctionnalités par bloc de l'ordre de priorité (voir ListeTriee)
+MOTEUR_STOCKAGE = "json"  # "json" (fichier + journal), "sqlite" ou "binaire" (fichier projeté en mémoire + journal)
+MOTEUR_BACKLOG = "objets"  # "objets" (Backlog de Fonctionnalite) ou "colonnes" (BacklogColonnes, tableaux NumPy)
+BANDES_PRIORITE = (3, 6, PRIORITE_MAX)  # bornes supérieures des bandes de priorité des rapports
+EXTENSION_SQLITE = ".sqlite3"
+EXTENSION_BINAIRE = ".bin"
+
+# État des salles partagé entre processus (plusieurs workers derrière un même serveur)
+FICHIER_ETAT_PARTAGE = None  # ex. "data/etat_salles.sqlite3" ; None : état en mémoire du processus
+# Avec un état partagé, MOTEUR_STOCKAGE doit être "sqlite" : avec "json" ou "binaire", chaque
+# processus compacterait son propre instantané du backlog et écraserait les modifications des autres.
+TENTATIVES_ETAT_PARTAGE = 5  # nouvelles tentatives après un conflit de version
+
+# Routeur frontal : chaque salle est servie par un seul worker (hachage cohérent)
+PORT_ROUTEUR = 5000  # port public, celui de NOM_SERVEUR
+PORT_PREMIER_WORKER = 5001  # les workers écoutent sur les ports suivants
+NOEUDS_VIRTUELS = 64  # positions de chaque worker sur l'anneau
+DELAI_SURVEILLANCE_WORKERS = 1  # secondes entre deux vérifications des workers
+DELAI_LIBERATION_SALLE = 5  # secondes accordées à un worker pour libérer une salle confiée à un autre
+PREFIXE_ROUTES_INTERNES = "/interne/"  # routes des workers réservées au routeur, jamais transmises depuis l'extérieur
+VARIABLE_JETON_ROUTEUR = "PLANNING_POKER_JETON_ROUTEUR"  # variable d'environnement des workers : jeton du routeur
+EN_TETE_JETON_ROUTEUR = "X-Jeton-Routeur"
+
+# Métriques Prometheus (route /metrics)
+PREFIXE_METRIQUES = "planning_poker"
+SEUILS_LATENCE = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # secondes
+
+# Journalisation (module models.journalisation)
+NIVEAU_JOURNAL = "INFO"  # "DEBUG" pour le détail de l'état à chaque modification
+FORMAT_JOURNAL = "%(asctime)s %(levelname)s %(name)s : %(message)s"
+
+# Profilage à la demande (cProfile), activable sans redémarrer le serveur
+VARIABLE_PROFILAGE_ROUTES = "PLANNING_POKER_PROFILAGE"  # ex. "soumettre_vote,valider_vote" ou "*" (toutes)
+VARIABLE_PROFILAGE_ECHANTILLON = "PLANNING_POKER_PROFILAGE_ECHANTILLON"  # profiler une requête sur N
+DOSSIER_PROFILS = "profils"  # fichiers .pstats, à côté de app.py
+PROFILS_AGREGES = 50  # profils les plus récents agrégés pour le classement des fonctions
+LIMITE_FONCTIONS_PROFIL = 20
+
+# Traces des requêtes (spans des méthodes d'AppManager, export Chrome trace-event)
+VARIABLE_TRACES = "PLANNING_POKER_TRACES"  # "1" pour tracer les requêtes dès le démarrage
+TRACES_CONSERVEES = 200  # dernières requêtes tracées gardées en mémoire
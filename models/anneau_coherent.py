@@ -0,0 +1,83 @@
+import hashlib
+from bisect import bisect
+from constantes import *
+
+
+# Anneau de hachage cohérent : attribue chaque salle à un worker
+class AnneauCoherent:
+    """
+    @brief Répartition des salles entre workers par hachage cohérent.
+
+    @details
+    Chaque worker occupe `noeuds_virtuels` positions sur un anneau de hachage ; une
+    salle est servie par le premier worker rencontré après la position de son
+    identifiant. Ajouter ou retirer un worker ne déplace que les salles des arcs
+    concernés (environ 1/N des salles), les autres restent sur leur worker.
+    """
+
+    def __init__(self, workers=(), noeuds_virtuels=NOEUDS_VIRTUELS):
+        """
+        @brief Construit l'anneau.
+
+        @param workers Identifiants des workers (ex. "127.0.0.1:5001").
+        @param noeuds_virtuels Nombre de positions par worker sur l'anneau.
+        """
+        self.noeuds_virtuels = noeuds_virtuels
+        self.positions = []  # positions triées
+        self.workers_par_position = {}  # {position: worker}
+        self.workers = set()
+        for worker in workers:
+            self.ajouter(worker)
+
+    @staticmethod
+    def hacher(cle):
+        """
+        @brief Position d'une clé sur l'anneau (64 bits, stable d'un processus à l'autre).
+
+        @param cle Chaîne à placer sur l'anneau.
+
+        @return int: Position sur l'anneau.
+        """
+        return int.from_bytes(hashlib.md5(cle.encode("utf-8")).digest()[:8], "big")
+
+    def ajouter(self, worker):
+        """
+        @brief Ajoute un worker sur l'anneau.
+
+        @param worker Identifiant du worker.
+        """
+        if worker in self.workers:
+            return
+        self.workers.add(worker)
+        for i in range(self.noeuds_virtuels):
+            position = self.hacher(f"{worker}#{i}")
+            self.workers_par_position[position] = worker
+        self.positions = sorted(self.workers_par_position)
+
+    def retirer(self, worker):
+        """
+        @brief Retire un worker de l'anneau ; ses salles passent aux workers suivants.
+
+        @param worker Identifiant du worker.
+        """
+        if worker not in self.workers:
+            return
+        self.workers.discard(worker)
+        self.workers_par_position = {p: w for p, w in self.workers_par_position.items() if w != worker}
+        self.positions = sorted(self.workers_par_position)
+
+    def obtenir(self, cle):
+        """
+        @brief Retourne le worker chargé d'une clé (identifiant de salle).
+
+        @param cle Identifiant de la salle.
+
+        @return Identifiant du worker, ou None si l'anneau est vide.
+        """
+        if not self.positions:
+            return None
+        index = bisect(self.positions, self.hacher(cle)) % len(self.positions)
+        return self.workers_par_position[self.positions[index]]
+
+    def __len__(self):
+        return len(self.workers)
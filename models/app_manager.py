@@ -1,26 +1,125 @@
+import functools
 import json
+import logging
+import os
+import threading
+import time
+import uuid
 from constantes import *
 from models.fonctionnalite import Fonctionnalite
+from models.backlog import Backlog, decoder_curseur, encoder_curseur
+from models.backlog_colonnes import BacklogColonnes
+from models.chargement_backlog import RapportChargement, lire_backlog
+from models.participants import RegistreParticipants
+from models.canal_evenements import CanalEvenements
+from models.depouillement import depouiller
+from models.journal_backlog import JournalBacklog
+from models.stockage_sqlite import StockageSQLite, fichier_sqlite_pour, migrer_json_vers_sqlite
+from models.stockage_binaire import BacklogBinaire, convertir_json_vers_binaire, ecrire_backlog_binaire, fichier_binaire_pour
+from models.stockage_etat import ConflitEtat
+from models.traces import tracer
+
+journaliseur = logging.getLogger(__name__)
+
+def avec_verrou(nom_verrou):
+    """
+    @brief Décorateur de méthode : exécute la méthode en tenant un verrou de l'instance.
+
+    @param nom_verrou Nom de l'attribut verrou (ex. "verrou_etat").
+    """
+    def decorateur(methode):
+        @functools.wraps(methode)
+        def enveloppe(self, *args, **kwargs):
+            with getattr(self, nom_verrou):
+                return methode(self, *args, **kwargs)
+        return enveloppe
+    return decorateur
+
+
+def transaction_etat(methode):
+    """
+    @brief Décorateur de méthode : exécute une modification de `state` dans une transaction (voir `executer_transaction`).
+    """
+    @functools.wraps(methode)
+    def enveloppe(self, *args, **kwargs):
+        return self.executer_transaction(methode, self, *args, **kwargs)
+    return enveloppe
+
 
 # La classe principale qui gère l'application
 class AppManager:
     """
     @brief Classe principale pour la gestion des participants et des indicateurs globaux.
+
+    @details
+    Un même AppManager peut être utilisé par plusieurs threads (serveur WSGI multi-thread).
+    `verrou_etat` protège `state` (participants, votes, indicateurs) et `verrou_backlog`
+    le backlog et sa persistance. Quand les deux sont nécessaires, `verrou_etat` est
+    toujours pris en premier, puis `verrou_backlog`, puis `verrou_sauvegarde`.
+
+    Avec un `StockageEtat`, l'état de la salle est aussi partagé entre processus :
+    chaque modification relit l'état publié et le republie par compare-and-swap.
     """
 
-    def __init__(self, backlog_file=None):
+    def __init__(self, backlog_file=None, pause_file="backlog_pause.json", id_salle=SALLE_PAR_DEFAUT, delai_sauvegarde=DELAI_SAUVEGARDE_DIFFEREE, journalisation=JOURNALISATION_BACKLOG, moteur_stockage=MOTEUR_STOCKAGE, stockage_etat=None, moteur_backlog=MOTEUR_BACKLOG):
         """
         @brief Initialise l'état global pour les participants et les indicateurs.
 
         @param backlog_file Chemin vers le fichier JSON contenant le backlog des fonctionnalités.
+        @param pause_file Chemin vers le fichier de sauvegarde du backlog lors d'une pause café.
+        @param id_salle Identifiant de la salle de vote gérée par ce gestionnaire.
+        @param delai_sauvegarde Délai (secondes) de regroupement des écritures du backlog ; 0 pour écrire immédiatement.
+        @param journalisation Si True, les modifications sont ajoutées à un journal plutôt que de réécrire le backlog.
+        @param moteur_stockage "json" (fichier backlog et journal), "sqlite" (base SQLite à côté du fichier JSON)
+        ou "binaire" (fichier binaire projeté en mémoire et journal).
+        @param stockage_etat StockageEtat partagé entre processus, ou None pour garder l'état en mémoire.
+        @param moteur_backlog "objets" (Backlog de Fonctionnalite) ou "colonnes" (BacklogColonnes, tableaux NumPy) ;
+        ignoré avec le stockage "binaire".
         """
         self.backlog_file = backlog_file
-        self.backlog = self.charger_backlog()  # Liste des fonctionnalités
-        print("backlog ", self.backlog)
+        self.pause_file = pause_file
+        self.id_salle = id_salle
+        self.instance = uuid.uuid4().hex  # distingue les ETag d'un gestionnaire recréé (redémarrage, salle rouverte)
+
+        # Verrous réentrants : une méthode verrouillée peut en appeler une autre
+        self.verrou_etat = threading.RLock()
+        self.verrou_backlog = threading.RLock()
+
+        # Écriture différée : le backlog n'est réécrit que s'il a été modifié
+        self.delai_sauvegarde = delai_sauvegarde
+        self.modifie = False
+        self.minuterie = None
+        self.verrou_sauvegarde = threading.Lock()
+        self.nombre_sauvegardes = 0  # appels de sauvegarder_backlog (exposés par /metrics)
+        self.duree_sauvegardes = 0.0  # secondes cumulées dans sauvegarder_backlog
+
+        # Base SQLite : créée à partir du backlog JSON au premier lancement
+        self.stockage = None
+        if moteur_stockage == "sqlite" and backlog_file:
+            fichier_sqlite = fichier_sqlite_pour(backlog_file)
+            if not os.path.exists(fichier_sqlite) and os.path.exists(backlog_file):
+                migrer_json_vers_sqlite(backlog_file, fichier_sqlite)
+            self.stockage = StockageSQLite(fichier_sqlite)
+
+        # Fichier binaire : créé à partir du backlog JSON au premier lancement, puis seule source du backlog
+        self.fichier_binaire = None
+        if moteur_stockage == "binaire" and backlog_file:
+            self.fichier_binaire = fichier_binaire_pour(backlog_file)
+            if not os.path.exists(self.fichier_binaire):
+                convertir_json_vers_binaire(backlog_file, self.fichier_binaire)
+
+        # Journal des modifications, rejoué au chargement et compacté dans le fichier backlog
+        self.journal = None
+        if journalisation and backlog_file and not self.stockage:
+            self.journal = JournalBacklog(backlog_file + EXTENSION_JOURNAL)
+        self.rapport_chargement = None  # bilan du dernier chargement du fichier backlog
+        self.classe_backlog = BacklogColonnes if moteur_backlog == "colonnes" else Backlog
+        self.backlog = self.charger_backlog()  # Backlog indexé des fonctionnalités
+        journaliseur.debug("Backlog de la salle %s : %s", id_salle, self.backlog)
 
         # Structure globale `state`
         self.state = {
-            "participants": [],  # liste de participants sous forme de dictionnaire
+            "participants": RegistreParticipants(),  # participants (dictionnaires) indexés par pseudo, session et fonction
             "context" : "",
             "mapper_session": {},  # {session_id:pseudo ...}
             "id_fonctionnalite": None,  # ID de la fonctionnalité en cours
@@ -36,46 +135,340 @@ class AppManager:
             }
         }
 
+        # Canal de diffusion des changements d'état aux clients connectés (SSE)
+        self.evenements = CanalEvenements()
+
+        # État partagé entre processus : version de `state` chargée depuis le stockage
+        self.stockage_etat = stockage_etat
+        self.version_etat = 0
+        self.en_transaction = False
+        self.fil_transaction = None  # thread qui exécute la transaction en cours
+        self.evenements_en_attente = []  # [(événement, détails)] notifiés pendant la transaction en cours
+        self.modifications_en_attente = []  # opérations du backlog (voir `marquer_modifie`) enregistrées après la publication
+        self.originaux_backlog = {}  # {id: copie avant la transaction, ou None si absente} pour annuler une tentative
+        self.revision_etat = 0  # incrémentée à chaque modification de `state` (ETag, attente des clients)
+        self.changement_etat = threading.Condition(self.verrou_etat)  # réveille les clients en attente
+        self.synchroniser_etat()
+
+    @property
+    def participants(self):
+        """
+        @brief Retourne le registre indexé des participants de `state`.
+
+        @details Si `state["participants"]` a été remplacé par une simple liste,
+        elle est convertie en registre.
+
+        @return RegistreParticipants: Les participants connectés.
+        """
+        participants = self.state["participants"]
+        if not isinstance(participants, RegistreParticipants):
+            participants = RegistreParticipants(participants)
+            self.state["participants"] = participants
+        return participants
+
+    # --- état partagé entre processus ---
+    def exporter_etat(self):
+        """
+        @brief Retourne `state` sous une forme sérialisable en JSON.
+
+        @return dict: Participants (liste), indicateurs, fonctionnalité en cours et mapping des sessions.
+        """
+        return {
+            "participants": [dict(p) for p in self.participants],
+            "context": self.state["context"],
+            "mapper_session": dict(self.state["mapper_session"]),
+            "id_fonctionnalite": self.state["id_fonctionnalite"],
+            "indicateurs": dict(self.state["indicateurs"]),
+        }
+
+    @tracer
+    @avec_verrou("verrou_etat")
+    def synchroniser_etat(self):
+        """
+        @brief Recharge `state` depuis le stockage partagé si un autre processus l'a modifié.
+
+        @details Sans stockage partagé, ou pendant une transaction, ne fait rien. Un état
+        publié par un autre processus est diffusé aux abonnés SSE de ce processus (événement "etat").
+        """
+        if self.stockage_etat is None or self.en_transaction:
+            return
+        lu = self.stockage_etat.lire(self.id_salle, self.version_etat)
+        if lu is None:
+            if self.version_etat < 0:
+                self.version_etat = 0  # salle pas encore publiée
+            return
+        self.version_etat, donnees = lu
+        self.state.update(donnees)
+        self.state["participants"] = RegistreParticipants(donnees["participants"])
+        self.signaler_changement()
+        self.evenements.publier("etat", self.etat_public())
+
+    @tracer
+    def publier_etat(self):
+        """
+        @brief Publie `state` dans le stockage partagé si personne ne l'a modifié depuis la synchronisation.
+
+        @return bool: True si l'état a été publié (ou s'il n'y a pas de stockage partagé), False en cas de conflit.
+        """
+        if self.stockage_etat is None:
+            return True
+        version = self.stockage_etat.comparer_et_ecrire(self.id_salle, self.version_etat, self.exporter_etat())
+        if version is None:
+            return False
+        self.version_etat = version
+        return True
+
+    def executer_transaction(self, fonction, *args, **kwargs):
+        """
+        @brief Exécute une modification de `state` de façon atomique, y compris entre processus.
+
+        @details
+        Sans stockage partagé, revient à tenir `verrou_etat`. Chaque transaction
+        incrémente `revision_etat`. Avec un stockage partagé, l'état est relu avant
+        la modification puis publié par compare-and-swap ; si un autre processus l'a publié
+        entre-temps, la modification est rejouée sur l'état à jour. Les événements notifiés
+        et les modifications du backlog ne sont diffusés et enregistrés qu'une fois l'état
+        publié : une tentative abandonnée n'envoie rien, et ses modifications du backlog en
+        mémoire sont annulées. Les transactions imbriquées font partie de la transaction englobante.
+
+        @param fonction Fonction modifiant `state`, appelée avec `args` et `kwargs`.
+
+        @return La valeur retournée par `fonction`.
+
+        @throws ConflitEtat Si l'état n'a pas pu être publié après `TENTATIVES_ETAT_PARTAGE` tentatives.
+        """
+        with self.verrou_etat:
+            if self.stockage_etat is None or self.en_transaction:
+                try:
+                    return fonction(*args, **kwargs)
+                finally:
+                    self.signaler_changement()
+            for _ in range(TENTATIVES_ETAT_PARTAGE):
+                self.synchroniser_etat()
+                self.en_transaction = True
+                self.fil_transaction = threading.get_ident()
+                try:
+                    resultat = fonction(*args, **kwargs)
+                except Exception:
+                    self.version_etat = -1  # état local peut-être modifié à moitié : recharger la prochaine fois
+                    self.evenements_en_attente.clear()
+                    self.annuler_modifications_backlog()
+                    raise
+                finally:
+                    self.en_transaction = False
+                    self.fil_transaction = None
+                    self.signaler_changement()
+                if self.publier_etat():
+                    self.enregistrer_modifications_en_attente()
+                    self.diffuser_evenements_en_attente()
+                    return resultat
+                self.evenements_en_attente.clear()
+                self.annuler_modifications_backlog()
+            raise ConflitEtat(f"État de la salle '{self.id_salle}' modifié simultanément par d'autres processus.")
+
+    def transaction_en_cours(self):
+        """
+        @brief Indique si le thread courant exécute une transaction sur l'état partagé.
+
+        @return bool: True pendant une tentative de `executer_transaction` avec un stockage partagé.
+        """
+        return self.en_transaction and self.fil_transaction == threading.get_ident()
+
+    @avec_verrou("verrou_backlog")
+    def memoriser_original(self, fonctionnalite_id):
+        """
+        @brief Garde une copie d'une fonctionnalité avant sa première modification dans la transaction en cours.
+
+        @details Hors transaction, ne fait rien. La copie permet d'annuler une tentative abandonnée.
+
+        @param fonctionnalite_id ID de la fonctionnalité qui va être ajoutée, modifiée ou supprimée.
+        """
+        if not self.transaction_en_cours() or fonctionnalite_id in self.originaux_backlog:
+            return
+        fonctionnalite = self.backlog.obtenir(fonctionnalite_id)
+        self.originaux_backlog[fonctionnalite_id] = None if fonctionnalite is None else Fonctionnalite(**fonctionnalite.to_dict())
+
+    @avec_verrou("verrou_backlog")
+    def annuler_modifications_backlog(self):
+        """
+        @brief Rétablit le backlog en mémoire d'avant une tentative de transaction abandonnée.
+
+        @details Les opérations en attente sont oubliées : rien n'a été écrit.
+        """
+        for fonctionnalite_id, original in self.originaux_backlog.items():
+            if original is None:
+                self.backlog.supprimer(fonctionnalite_id)
+            else:
+                self.backlog.ajouter(original)
+        self.originaux_backlog.clear()
+        self.modifications_en_attente.clear()
+
+    @avec_verrou("verrou_backlog")
+    def enregistrer_modifications_en_attente(self):
+        """
+        @brief Enregistre les modifications du backlog d'une transaction dont l'état vient d'être publié.
+        """
+        operations, self.modifications_en_attente = self.modifications_en_attente, []
+        self.originaux_backlog.clear()
+        for operation in operations:
+            self.marquer_modifie(operation)
+
+    def signaler_changement(self):
+        """
+        @brief Incrémente `revision_etat` et réveille les clients qui attendent un changement.
+
+        @details À appeler en tenant `verrou_etat`.
+        """
+        self.revision_etat += 1
+        self.changement_etat.notify_all()
+
+    def attendre_changement(self, revision_connue, delai):
+        """
+        @brief Attend que l'état de la salle change par rapport à une révision connue du client.
+
+        @details
+        Retourne dès que `revision_etat` diffère de la révision connue (une révision
+        différente, même plus petite après un redémarrage, signifie un état différent).
+        Avec un état partagé, les modifications des autres processus ne réveillent pas
+        l'attente : l'état est relu toutes les `DELAI_SYNCHRONISATION_ATTENTE` secondes.
+
+        @param revision_connue Révision de l'état déjà reçue par le client.
+        @param delai Durée maximale d'attente, en secondes.
+
+        @return bool: True si l'état a changé, False si le délai est écoulé.
+        """
+        fin = time.monotonic() + delai
+        with self.changement_etat:
+            while True:
+                self.synchroniser_etat()
+                if self.revision_etat != revision_connue:
+                    return True
+                reste = fin - time.monotonic()
+                if reste <= 0:
+                    return False
+                if self.stockage_etat is not None:
+                    reste = min(reste, DELAI_SYNCHRONISATION_ATTENTE)
+                self.changement_etat.wait(reste)
+
     # --- chargement du backlog des fonctionnalités ---
+    @tracer
     def charger_backlog(self, filename=None):
         """
         @brief Charge les fonctionnalités depuis le fichier JSON et les trie par priorité.
 
-        @return Liste des fonctionnalités du backlog.
+        @details Pour le fichier par défaut, les opérations du journal sont rejouées
+        sur l'instantané chargé. Avec le moteur SQLite, seules les fonctionnalités
+        non terminées sont chargées ; avec le stockage binaire, le fichier est seulement
+        projeté en mémoire (voir `BacklogBinaire`). Le fichier est lu fonctionnalité par fonctionnalité
+        (voir `lire_backlog`) : les enregistrements invalides sont écartés et signalés
+        dans le journal, et leur bilan est gardé dans `rapport_chargement`.
+
+        @return Backlog indexé des fonctionnalités (BacklogColonnes avec le moteur "colonnes").
         """
         
         fichier_a_ouvrir = filename if filename else self.backlog_file
+        if self.stockage and fichier_a_ouvrir == self.backlog_file:
+            return self.classe_backlog(self.stockage.charger_actives())
+        if self.fichier_binaire and fichier_a_ouvrir == self.backlog_file:
+            backlog = BacklogBinaire(self.fichier_binaire)
+            if self.journal:
+                self.journal.appliquer(backlog)
+            return backlog
+
+        rapport = RapportChargement()
         try:
-            with open(fichier_a_ouvrir, "r") as fichier:
-                contenu = fichier.read().strip()
-                if not contenu:
-                    print("Le fichier backlog est vide.")
-                    return []
-
-                donnees = json.loads(contenu).get("backlog", [])
-                backlog = [Fonctionnalite(**f) for f in donnees]
-                backlog.sort(key=lambda f: (f.statut == "Terminé", int(f.priorite)))  
-                return backlog
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            print(f"Erreur lors du chargement du backlog : {e}")
-            return []
-
+            fonctionnalites = lire_backlog(fichier_a_ouvrir, rapport)
+        except FileNotFoundError as e:
+            journaliseur.error("Erreur lors du chargement du backlog : %s", e)
+            fonctionnalites = []
+
+        if self.journal and fichier_a_ouvrir == self.backlog_file:
+            fonctionnalites = self.journal.rejouer(fonctionnalites)
+        backlog = self.classe_backlog(fonctionnalites)
+
+        if rapport.vide:
+            journaliseur.warning("Le fichier backlog %s est vide.", fichier_a_ouvrir)
+        for message in rapport.messages():
+            journaliseur.warning("%s : %s", fichier_a_ouvrir, message)
+        self.rapport_chargement = rapport
+        return backlog
+
+    @tracer
+    @avec_verrou("verrou_backlog")
     def lister_backlog(self):
         """
         @brief Retourne la liste des fonctionnalités du backlog.
 
-        @return Liste des fonctionnalités.
+        @details Avec le moteur SQLite, les fonctionnalités terminées sont lues dans la base.
+
+        @return Liste des fonctionnalités (copie, parcourable sans tenir le verrou du backlog).
+        """
+        if self.stockage:
+            return [self.backlog.obtenir(f.id) or f for f in self.stockage.lister()]
+        return list(self.backlog)
+
+    @tracer
+    @avec_verrou("verrou_backlog")
+    def page_backlog(self, curseur=None, taille=TAILLE_PAGE_BACKLOG):
+        """
+        @brief Retourne une page du backlog, dans l'ordre (terminée, priorité, id).
+
+        @details Pagination par clé : le curseur désigne la dernière fonctionnalité de la
+        page précédente, la page suivante commence juste après elle même si le backlog a
+        changé entre-temps. Seule la page est lue (recherche dichotomique en mémoire, index
+        de la base avec le moteur SQLite).
+
+        @param curseur Curseur `suivant` de la page précédente, ou None pour la première page.
+        @param taille Nombre de fonctionnalités par page, ramené entre 1 et `TAILLE_PAGE_BACKLOG_MAX`.
+
+        @return Tuple (liste des fonctionnalités, curseur de la page suivante ou None pour la dernière page).
+
+        @throws ValueError Si le curseur est mal formé.
         """
-        return self.backlog
+        apres = decoder_curseur(curseur) if curseur else None
+        taille = min(max(int(taille), 1), TAILLE_PAGE_BACKLOG_MAX)
+        if self.stockage:
+            lues = self.stockage.page(apres, taille + 1)
+            fonctionnalites = [self.backlog.obtenir(f.id) or f for f in lues[:taille]]
+            suivant = Backlog.cle(lues[taille - 1]) if len(lues) > taille else None
+        else:
+            fonctionnalites, suivant = self.backlog.page(apres, taille)
+        return fonctionnalites, encoder_curseur(suivant) if suivant else None
 
+    @tracer
+    @avec_verrou("verrou_backlog")
     def sauvegarder_backlog(self, filename=None):
         """
         @brief Sauvegarde le backlog trié dans le fichier JSON.
         
         @details Assure que priorités et difficultés sont des entiers.
+        L'écriture est immédiate : les mutations passent plutôt par `marquer_modifie`.
+        Le fichier est écrit à côté puis renommé, pour qu'un arrêt brutal ne le tronque jamais.
         @param filename Nom du fichier dans lequel sauvegarder le backlog. Si None, utilise le fichier par défaut.
+
+        @return bool: True si la sauvegarde a réussi, False sinon.
         """
+        debut = time.perf_counter()
         try:
+            if self.stockage and not filename:
+                self.stockage.enregistrer(self.backlog)
+                return True
+            if self.fichier_binaire and not filename:
+                # nouvel instantané, puis réouverture : les modifications en mémoire sont dans le fichier.
+                # L'ancienne projection est libérée avant le renommage (refusé sous Windows sinon).
+                ancien = self.backlog
+                binaire = isinstance(ancien, BacklogBinaire)
+                try:
+                    ecrire_backlog_binaire(ancien, self.fichier_binaire, ancien.fermer if binaire else None)
+                except OSError:
+                    if binaire and ancien.ids is None:
+                        ancien.projeter()  # l'ancien fichier est intact
+                    raise
+                self.backlog = BacklogBinaire(self.fichier_binaire)
+                self.backlog.version = ancien.version + 1
+                journaliseur.info("Backlog sauvegardé avec succès dans %s.", self.fichier_binaire)
+                return True
+
             donnees = {
                 "backlog": [
                     {
@@ -89,20 +482,144 @@ class AppManager:
             # Utiliser le fichier par défaut si aucun fichier n'est fourni
             fichier_sauvegarde = filename if filename else self.backlog_file
 
-            with open(fichier_sauvegarde, "w") as fichier:
+            fichier_temporaire = fichier_sauvegarde + ".tmp"
+            with open(fichier_temporaire, "w", encoding="utf-8") as fichier:
                 json.dump(donnees, fichier, indent=4, ensure_ascii=False)
-                print(f"Backlog sauvegardé avec succès dans {fichier_sauvegarde}.")
+            os.replace(fichier_temporaire, fichier_sauvegarde)
+            journaliseur.info("Backlog sauvegardé avec succès dans %s.", fichier_sauvegarde)
+            return True
         except Exception as e:
-            print(f"Erreur lors de la sauvegarde du backlog : {e}")
+            journaliseur.error("Erreur lors de la sauvegarde du backlog : %s", e)
+            return False
+        finally:
+            self.nombre_sauvegardes += 1
+            self.duree_sauvegardes += time.perf_counter() - debut
+
+    @tracer
+    @avec_verrou("verrou_backlog")
+    def marquer_modifie(self, operation=None):
+        """
+        @brief Signale une modification du backlog et planifie sa sauvegarde.
+
+        @details
+        Si la journalisation est active et que l'opération est décrite, elle est
+        ajoutée au journal ; le backlog complet n'est réécrit (compaction) qu'une fois
+        le journal assez long. Sinon, les modifications rapprochées sont regroupées :
+        une seule écriture a lieu `delai_sauvegarde` secondes après la première
+        modification non sauvegardée.
+
+        Pendant une transaction sur l'état partagé, l'opération n'est enregistrée
+        qu'une fois l'état publié (voir `executer_transaction`).
+
+        @param operation Dictionnaire décrivant la modification (voir `JournalBacklog`), optionnel.
+        """
+        if self.transaction_en_cours():
+            self.modifications_en_attente.append(operation)
+            return
+
+        if self.stockage and operation is not None:
+            self.stockage.appliquer(operation)
+            return
+
+        if self.journal and operation is not None:
+            self.journal.ajouter(operation)
+            with self.verrou_sauvegarde:
+                self.modifie = True
+            if self.journal.taille >= SEUIL_COMPACTION_JOURNAL:
+                self.sauvegarder_si_modifie()
+            return
+
+        ecrire_maintenant = False
+        with self.verrou_sauvegarde:
+            self.modifie = True
+            if self.delai_sauvegarde <= 0:
+                ecrire_maintenant = True
+            elif self.minuterie is None:
+                self.minuterie = threading.Timer(self.delai_sauvegarde, self.sauvegarder_si_modifie)
+                self.minuterie.daemon = True
+                self.minuterie.start()
+        if ecrire_maintenant:
+            self.sauvegarder_si_modifie()
+
+    @tracer
+    @avec_verrou("verrou_backlog")
+    def sauvegarder_si_modifie(self):
+        """
+        @brief Écrit le backlog sur le disque uniquement s'il a été modifié.
 
+        @details Annule la sauvegarde planifiée et vide le journal une fois l'instantané écrit.
+        En cas d'échec, le backlog reste marqué comme modifié.
 
+        @return bool: True si une écriture a eu lieu, False sinon.
+        """
+        with self.verrou_sauvegarde:
+            if self.minuterie is not None:
+                self.minuterie.cancel()
+                self.minuterie = None
+            if not self.modifie:
+                return False
+            self.modifie = False
+
+        if not self.sauvegarder_backlog():
+            with self.verrou_sauvegarde:
+                self.modifie = True
+            return False
+        if self.journal:
+            self.journal.vider()
+        return True
+
+    def interrompre(self):
+        """
+        @brief Sauvegarde les modifications en attente et termine les flux Server-Sent Events de la salle.
 
+        @details La salle reste utilisable : la base SQLite et la projection du fichier binaire restent ouvertes.
+        """
+        self.evenements.fermer()
+        self.sauvegarder_si_modifie()
+
+    def fermer(self):
+        """
+        @brief Sauvegarde les modifications en attente avant l'arrêt ou la fermeture de la salle.
+
+        @details Les flux Server-Sent Events ouverts sur la salle sont terminés, puis la base
+        SQLite et la projection du fichier binaire sont libérées : la salle n'est plus utilisable.
+        """
+        self.interrompre()
+        if self.stockage:
+            self.stockage.fermer()
+        if isinstance(self.backlog, BacklogBinaire):
+            self.backlog.fermer()
+
+
+    @tracer
+    @avec_verrou("verrou_backlog")
     def trier_backlog(self):
         """
         @brief Trie la liste des fonctionnalités par priorité.
+
+        @details L'ordre est maintenu à chaque modification par le backlog indexé ;
+        ce tri complet ne sert qu'après des modifications faites hors d'AppManager.
         """
-        self.backlog.sort(key=lambda f: (f.statut == "Terminé", int(f.priorite)))       
+        self.backlog.retrier()
 
+    @tracer
+    @avec_verrou("verrou_backlog")
+    def rapport_difficulte(self, bornes=BANDES_PRIORITE):
+        """
+        @brief Difficulté totale du travail restant (fonctionnalités non terminées), par bande de priorité.
+
+        @details Calcul vectorisé sur les colonnes du backlog (ou du fichier binaire) ; avec
+        le moteur "objets", les colonnes sont construites pour l'occasion.
+
+        @param bornes Bornes supérieures des bandes de priorité.
+
+        @return list: Voir `BacklogColonnes.difficulte_par_priorite`.
+        """
+        colonnes = self.backlog if isinstance(self.backlog, (BacklogColonnes, BacklogBinaire)) else BacklogColonnes(self.backlog)
+        return colonnes.difficulte_par_priorite(bornes)
+
+    @tracer
+    @transaction_etat
     def ajouter_participant(self, pseudo, session_id):
         """
         @brief Ajoute un participant à l'état global.
@@ -122,7 +639,7 @@ class AppManager:
             raise ValueError(f"Le participant '{pseudo}' n'est pas autorisé.")
 
         # Vérification des doublons pseudo
-        if pseudo in [p["pseudo"] for p in self.state["participants"]]:
+        if pseudo in self.participants:
             raise ValueError(f"Le participant avec le pseudo '{pseudo}' existe déjà.")
 
         # Déterminer le rôle du participant
@@ -139,29 +656,30 @@ class AppManager:
         if pseudo.lower() == 'po':
             fonction = "Product Owner"
 
-            if any(p["fonction"] == "Product Owner" for p in self.state["participants"]):
+            if self.participants.compter_fonction("Product Owner"):
                 raise ValueError("Un Product Owner existe déjà.")
 
         elif pseudo.lower() == 'sm':
             fonction = "Scrum Master"
 
-            if any(p["fonction"] == "Scrum Master" for p in self.state["participants"]):
+            if self.participants.compter_fonction("Scrum Master"):
                 raise ValueError("Un Scrum Master existe déjà.")
 
         # Ajouter le participant dans `state`
-        self.state["participants"].append({
+        self.participants.ajouter({
             "pseudo": pseudo,
             "fonction": fonction,
             "avatar":   avatar,
             "vote": None,
             "session_id": session_id
         })
-        print(f"Participant ajouté : {self.state['participants']}")
+        journaliseur.info("Participant ajouté dans la salle %s : %s (%s)", self.id_salle, pseudo, fonction)
 
         # ajout mappage id session et pseudo
         self.state["mapper_session"][pseudo] = session_id
-        print(f"state : {self.state}")
+        journaliseur.debug("state : %s", self.state)
 
+    @avec_verrou("verrou_backlog")
     def get_fonctionnalite(self, fonctionnalite_id):
         """
         @brief Retourne une fonctionnalité spécifique à partir de son ID.
@@ -170,17 +688,28 @@ class AppManager:
 
         @return L'objet Fonctionnalite correspondant à l'ID, ou None si introuvable.
         """
-        return next((f for f in self.backlog if f.id == fonctionnalite_id), None)
-
+        fonctionnalite = self.backlog.obtenir(fonctionnalite_id)
+        if fonctionnalite is None and self.stockage:
+            # fonctionnalité terminée, non chargée en mémoire
+            fonctionnalite = self.stockage.obtenir(fonctionnalite_id)
+        return fonctionnalite
+
+    @tracer
+    @avec_verrou("verrou_backlog")
     def afficher_fonctionnalite_prioritaire(self):
         """
-        @brief Retourne la fonctionnalité ayant la priorité la plus élevée.
+        @brief Retourne la fonctionnalité non terminée ayant la priorité la plus élevée.
 
-        @return Objet Fonctionnalite avec la priorité la plus élevée, ou None si le backlog est vide.
+        @details Avec le moteur "colonnes", la recherche se fait par réductions sur les
+        colonnes, sans recalculer l'ordre complet du backlog après chaque modification.
+
+        @return Objet Fonctionnalite avec la priorité la plus élevée, ou None si toutes les fonctionnalités sont terminées.
         """
-        return self.backlog[0] if self.backlog else None
+        return self.backlog.premiere_non_terminee()
 
-    def ajout_fonctionnalite(self, nom, description, priorite, difficulte=None, statut="A faire", mode_de_vote=VOTE_UNANIMITE, participants=[]):
+    @tracer
+    @avec_verrou("verrou_backlog")
+    def ajout_fonctionnalite(self, nom, description, priorite, difficulte=None, statut="A faire", mode_de_vote=VOTE_UNANIMITE, participants=()):
         """
         @brief Ajoute une nouvelle fonctionnalité au backlog.
 
@@ -192,7 +721,11 @@ class AppManager:
         @param mode_de_vote Mode de vote utilisé (par défaut : "unanimité").
         @param participants Liste des participants associés à la fonctionnalité.
         """
-        new_id = max((f.id for f in self.backlog), default=0) + 1
+        if self.stockage:
+            new_id = self.stockage.prochain_id()
+        else:
+            new_id = self.backlog.prochain_id()
+        self.memoriser_original(new_id)
         fonctionnalite = Fonctionnalite(
             id=new_id,
             nom=nom,
@@ -204,12 +737,13 @@ class AppManager:
             participants=participants
         )
         try:
-            self.backlog.append(fonctionnalite)
-            self.trier_backlog()
-            self.sauvegarder_backlog()
+            self.backlog.ajouter(fonctionnalite)
+            self.marquer_modifie({"op": "ajout", "fonctionnalite": fonctionnalite.to_dict()})
         except Exception as e:
-            print(f"Erreur lors de la sauvegarde du backlog : {e}")
+            journaliseur.error("Erreur lors de la sauvegarde du backlog : %s", e)
 
+    @tracer
+    @avec_verrou("verrou_backlog")
     def modifier_fonctionnalite(self, fonctionnalite_id, **kwargs):
         """
         @brief Modifie une fonctionnalité existante dans le backlog.
@@ -220,45 +754,54 @@ class AppManager:
         
         @throws ValueError Si la fonctionnalité n'est pas trouvée.
         """
-        fonctionnalite = next((f for f in self.backlog if f.id == fonctionnalite_id), None)
+        fonctionnalite = self.get_fonctionnalite(fonctionnalite_id)
         if not fonctionnalite:
             raise ValueError("Fonctionnalité non trouvée.")
 
-        for key, value in kwargs.items():
-            if hasattr(fonctionnalite, key):
-                setattr(fonctionnalite, key, value)
+        champs = {key: value for key, value in kwargs.items() if hasattr(fonctionnalite, key)}
+        self.memoriser_original(fonctionnalite_id)
+        fonctionnalite.modifier(**champs)
+
+        # une fonctionnalité terminée lue dans la base redevient active
+        if self.stockage and fonctionnalite.statut != "Terminé" and fonctionnalite not in self.backlog:
+            self.backlog.ajouter(fonctionnalite)
 
-        self.trier_backlog()
-        self.sauvegarder_backlog()
+        self.backlog.mettre_a_jour(fonctionnalite)
+        self.marquer_modifie({"op": "modification", "id": fonctionnalite_id, "champs": champs})
 
+    @tracer
+    @avec_verrou("verrou_backlog")
     def supprimer_fonctionnalite(self, fonctionnalite_id):
         """
         @brief Supprime une fonctionnalité du backlog.
 
         @param fonctionnalite_id ID de la fonctionnalité à supprimer.
         """
-        self.backlog = [f for f in self.backlog if f.id != fonctionnalite_id]
-        self.sauvegarder_backlog()
+        self.memoriser_original(fonctionnalite_id)
+        self.backlog.supprimer(fonctionnalite_id)
+        self.marquer_modifie({"op": "suppression", "id": fonctionnalite_id})
     
+    @tracer
+    @transaction_etat
     def passer_a_fonctionnalite_suivante(self):
         """
         @brief Permet de passer à la fonctionnalité suivante dans le backlog après validation.
 
         @return Retourne la fonctionnalité suivante
         """
-        prochaine_fonctionnalite = next(
-            (f for f in self.backlog if f.statut != "Terminé"), None
-        )
+        with self.verrou_backlog:
+            prochaine_fonctionnalite = self.backlog.premiere_non_terminee()
 
         if prochaine_fonctionnalite:
             self.state["id_fonctionnalite"] = prochaine_fonctionnalite.id
-            self.sauvegarder_backlog()
             return prochaine_fonctionnalite  # Retourne la fonctionnalité suivante
         return None  # Retourne None si aucune autre fonctionnalité n'est disponible
 
 
 
 # --- Gestion des votes ---
+    @tracer
+    @transaction_etat
     def initier_vote(self, fonctionnalite_id):
         """
         @brief Démarre le processus de vote pour une fonctionnalité donnée.
@@ -271,7 +814,7 @@ class AppManager:
 
         @raises ValueError: Si la fonctionnalité avec l'ID donné n'existe pas.
         """
-        fonctionnalite = next((f for f in self.backlog if f.id == fonctionnalite_id), None)
+        fonctionnalite = self.get_fonctionnalite(fonctionnalite_id)
         if not fonctionnalite:
             raise ValueError("Fonctionnalité non trouvée.")
         
@@ -280,12 +823,12 @@ class AppManager:
         self.state["id_fonctionnalite"] = fonctionnalite_id
         self.state["indicateurs"]["tout_le_monde_a_vote"] = False
         
-        for participant in self.state["participants"]:
-            participant["vote"] = None
-        
+        self.participants.reinitialiser_votes()
         
-        print(f"Vote initié pour la fonctionnalité : {fonctionnalite.nom}")
+        journaliseur.info("Vote initié pour la fonctionnalité : %s", fonctionnalite.nom)
 
+    @tracer
+    @transaction_etat
     def ajouter_vote(self, pseudo, vote):
         """
         @brief Ajoute un vote pour une fonctionnalité en respectant la structure de state.
@@ -301,14 +844,13 @@ class AppManager:
         """
 
         participant = self.get_data_par_pseudo(pseudo)
+        if participant is None:
+            raise ValueError(f"Participant '{pseudo}' introuvable.")
         
-        if participant["vote"] is not None:
-            raise ValueError(f"{participant['pseudo']} a déjà voté.")
-        
-        # Ajouter le vote
-        participant["vote"] = vote
-        print(f"Vote ajouté pour {participant['pseudo']} -> {vote}")
-        print("état general ", self.state)
+        # Ajouter le vote (met à jour les compteurs de la salle)
+        self.participants.enregistrer_vote(participant, vote)
+        journaliseur.debug("Vote ajouté pour %s -> %s", pseudo, vote)
+        journaliseur.debug("état général : %s", self.state)
 
 
     def tout_le_monde_a_vote(self):
@@ -317,11 +859,18 @@ class AppManager:
 
         @return bool: True si tous les participants votants ont voté, False sinon.        
         """
-        return all(
-            p["vote"] is not None for p in self.state["participants"]
-            if p["fonction"] == "Votant"
-        )
+        return self.participants.tous_les_votants_ont_vote()
+
+    def tous_cafe(self):
+        """
+        @brief Vérifie si tous les participants connectés ont choisi la carte café.
 
+        @return bool: True si tout le monde a voté café, False sinon.
+        """
+        return self.participants.tous_cafe()
+
+    @tracer
+    @transaction_etat
     def reveler_votes(self):
         """
         @brief Révèle les votes actuels pour la fonctionnalité en cours.
@@ -330,15 +879,22 @@ class AppManager:
         Collecte et retourne les votes des participants. Met à jour l'indicateur `votes_reveles`.
 
         @return dict: Un dictionnaire contenant les votes de chaque participant.        """
-        votes = {
-            p["pseudo"]: p["vote"]
-            for p in self.state["participants"]
-            if p["vote"] is not None
-        }
+        votes = self.collecter_votes()
         self.state["indicateurs"]["votes_reveles"] = True
-        print(f"Votes révélés : {votes}")
+        journaliseur.debug("Votes révélés : %s", votes)
         return votes
+
+    @avec_verrou("verrou_etat")
+    def collecter_votes(self):
+        """
+        @brief Collecte les votes des participants sans modifier les indicateurs.
+
+        @return dict: Un dictionnaire {pseudo: vote} des participants ayant voté.
+        """
+        return {pseudo: p["vote"] for pseudo, p in self.participants.ont_vote.items()}
     
+    @tracer
+    @transaction_etat
     def valider_vote(self):
         """
         @brief Valide les votes pour la fonctionnalité actuellement en cours dans `state`.
@@ -351,56 +907,111 @@ class AppManager:
         """
         fonctionnalite_id = self.state.get('id_fonctionnalite')
         if not fonctionnalite_id:
-            print("Aucune fonctionnalité sélectionnée pour le vote.")
+            journaliseur.warning("Aucune fonctionnalité sélectionnée pour le vote.")
             return False 
 
         # Récupérer la fonctionnalité par ID
         fonctionnalite = self.get_fonctionnalite(fonctionnalite_id)
         if not fonctionnalite:
-            print("Fonctionnalité introuvable dans le backlog.")
+            journaliseur.warning("Fonctionnalité %s introuvable dans le backlog.", fonctionnalite_id)
             return False
 
-        # Collecte des votes
-        votes = {
-            p["pseudo"]: p["vote"]
-            for p in self.state["participants"]
-            if p["fonction"] == "Votant" and p["vote"] is not None
-        }
-        if not votes:
-            print("Aucun vote disponible pour cette fonctionnalité.")
+        # Répartition des votes des votants, tenue à jour à chaque vote
+        cartes = self.participants.cartes_votants
+        nombre_votes = self.participants.votes_votants
+        if not nombre_votes:
+            journaliseur.warning("Aucun vote disponible pour la fonctionnalité %s.", fonctionnalite_id)
             return False
 
-        # Log des votes pour debug
-        print(f"Votes pour la fonctionnalité {fonctionnalite_id}: {votes}")
+        journaliseur.debug("Votes pour la fonctionnalité %s : %s", fonctionnalite_id, cartes)
 
         # Validation en fonction du mode de vote
         mode_de_vote = fonctionnalite.mode_de_vote
 
         if mode_de_vote == "unanimite":
-            if len(set(votes.values())) == 1:
+            if len(cartes) == 1:
                 self.state['indicateurs']['fonctionnalite_approuvee'] = True
             else:
                 self.state['indicateurs']['fonctionnalite_approuvee'] = False
 
         elif mode_de_vote == "moyenne":
-            moyenne = sum(map(int, votes.values())) / len(votes)
+            # Carte numérique la plus proche de la moyenne des votes
+            resultat = depouiller(cartes)
+            self.state['indicateurs']['fonctionnalite_approuvee'] = resultat["carte_moyenne"] is not None
             
 
         else:
-            print(f"Mode de vote inconnu : {mode_de_vote}")
+            journaliseur.warning("Mode de vote inconnu : %s", mode_de_vote)
             self.state['indicateurs']['fonctionnalite_approuvee'] = False
 
         # Marquer la fonctionnalité comme terminée si validée
         if self.state['indicateurs']['fonctionnalite_approuvee']:
-            fonctionnalite.statut = "Terminé"
-            print(f"m Fonctionnalité {fonctionnalite.nom} validée et marquée comme 'Terminé'.")
-
-        # Trier et sauvegarder le backlog
-        self.trier_backlog()
-        self.sauvegarder_backlog()
+            # Repositionne la fonctionnalité et l'enregistre (après publication de l'état)
+            self.modifier_fonctionnalite(fonctionnalite.id, statut="Terminé")
+            journaliseur.info("Fonctionnalité %s validée et marquée comme 'Terminé'.", fonctionnalite.nom)
 
         return self.state['indicateurs']['fonctionnalite_approuvee']
 
+    @tracer
+    @avec_verrou("verrou_etat")
+    def etat_public(self):
+        """
+        @brief Retourne l'état de la salle diffusable aux clients.
+
+        @details Les identifiants de session et les votes non révélés ne sont pas exposés.
+
+        @return dict: Révision, indicateurs, fonctionnalité en cours, participants et participants ayant voté.
+        """
+        self.synchroniser_etat()
+        indicateurs = self.state["indicateurs"]
+        fonctionnalite = self.get_fonctionnalite(self.state["id_fonctionnalite"]) if self.state["id_fonctionnalite"] else None
+        return {
+            "version": self.revision_etat,
+            "indicateurs": dict(indicateurs),
+            "id_fonctionnalite": self.state["id_fonctionnalite"],
+            "fonctionnalite": {
+                "id": fonctionnalite.id,
+                "nom": fonctionnalite.nom,
+                "mode_de_vote": fonctionnalite.mode_de_vote,
+            } if fonctionnalite else None,
+            "participants": [
+                {"pseudo": p["pseudo"], "fonction": p.get("fonction"), "avatar": p.get("avatar")}
+                for p in self.participants
+            ],
+            "ont_vote": list(self.participants.ont_vote),
+            "votes": self.collecter_votes() if indicateurs["votes_reveles"] else {},
+        }
+
+    @avec_verrou("verrou_etat")
+    def notifier(self, evenement, **details):
+        """
+        @brief Diffuse l'état courant de la salle aux abonnés SSE.
+
+        @details Pendant une transaction sur l'état partagé, l'événement est mis en attente
+        et diffusé après la publication de l'état (voir `executer_transaction`).
+
+        @param evenement Type d'événement (ex. "vote", "revelation", "initiation").
+        @param details Informations complémentaires propres à l'événement.
+        """
+        if self.en_transaction:
+            self.evenements_en_attente.append((evenement, details))
+        else:
+            self.evenements.publier(evenement, {**self.etat_public(), **details})
+
+    def diffuser_evenements_en_attente(self):
+        """
+        @brief Diffuse les événements de la transaction qui vient d'être publiée, avec l'état publié.
+
+        @details À appeler en tenant `verrou_etat`.
+        """
+        evenements, self.evenements_en_attente = self.evenements_en_attente, []
+        if evenements:
+            etat = self.etat_public()
+            for evenement, details in evenements:
+                self.evenements.publier(evenement, {**etat, **details})
+
+    @tracer
+    @transaction_etat
     def reinitialiser_votes(self):
         """
         @brief Réinitialise tous les votes.
@@ -408,11 +1019,10 @@ class AppManager:
         @details
         Efface les votes des participants et réinitialise les indicateurs liés au processus de vote.
         """
-        for participant in self.state["participants"]:
-            participant["vote"] = None
+        self.participants.reinitialiser_votes()
         self.state["indicateurs"]["vote_commence"] = False
         self.state["indicateurs"]["votes_reveles"] = False
-        print("Votes réinitialisés.")
+        journaliseur.info("Votes réinitialisés dans la salle %s.", self.id_salle)
 
 
 
@@ -448,10 +1058,7 @@ class AppManager:
 
         @return dict: Les données du participant correspondant au pseudo, ou None si non trouvé.
          """
-         participant = next(
-            (p for p in self.state["participants"] if p["pseudo"]==pseudo), None
-        )
-         return participant
+         return self.participants.par_pseudo(pseudo)
 
     def get_participant_pseudo_liste(self):
         """
@@ -462,8 +1069,8 @@ class AppManager:
 
         @return list: Liste des pseudos des participants.
     """
-        liste_pseudo_participant = [p["pseudo"] for p in self.state["participants"] ]
-        print("liste_pseudo_participant ", liste_pseudo_participant)
+        liste_pseudo_participant = self.participants.pseudos()
+        journaliseur.debug("Pseudos des participants : %s", liste_pseudo_participant)
         return liste_pseudo_participant
 
     def is_team_complete(self, fonctionnalite):
@@ -478,60 +1085,53 @@ class AppManager:
 
         @return bool: True si l'équipe est complète, False sinon.
         """
-        print("Structure actuelle de participants:", self.state["participants"])
-
-        for p in self.state["participants"]:
-            print(type(p), p)
+        journaliseur.debug("Participants connectés : %s", self.participants)
         participants_attendus = fonctionnalite.participants
-        participants_connectes = [
-            p["pseudo"] for p in self.state["participants"]
-        ]
-        return all(p in participants_connectes for p in participants_attendus)
+        return all(p in self.participants for p in participants_attendus)
 
+    @tracer
+    @transaction_etat
     def logout_participant(self, session_id):
         """
         @brief Supprime un participant de l'état global.
 
         @details
         Cette méthode déconnecte un participant en supprimant ses données de la liste des participants 
-        et du mapping `mapper_session`. Le backlog est ensuite sauvegardé.
+        et du mapping `mapper_session`. Les modifications du backlog en attente sont ensuite sauvegardées.
 
         @param session_id (str): L'ID de session du participant à déconnecter. 
         """
-        print(f"Tentative de déconnexion pour session_id : {session_id}")
-        participants_avant = self.state.get("participants", [])
-        print(f"Participants avant déconnexion : {participants_avant}")
+        journaliseur.debug("Participants avant déconnexion de %s : %s", session_id, self.participants)
 
-        # Filtrer les participants pour supprimer celui avec le session_id
-        self.state["participants"] = [
-            p for p in participants_avant if p["session_id"] != session_id
-        ]
-        print(f"Participants après déconnexion : {self.state['participants']}")
+        # Retirer le participant associé au session_id
+        participant = self.participants.retirer_session(session_id)
+        if participant:
+            journaliseur.info("Participant déconnecté de la salle %s : %s", self.id_salle, participant["pseudo"])
 
         # Supprimer le mapping dans mapper_session
         mapper_session = self.state.get("mapper_session", {})
-        for pseudo, sid in list(mapper_session.items()):
-            if sid == session_id:
-                del mapper_session[pseudo]
-                print(f"Mapper session après suppression : {mapper_session}")
+        if participant and mapper_session.get(participant["pseudo"]) == session_id:
+            del mapper_session[participant["pseudo"]]
+            journaliseur.debug("Mapper session après suppression : %s", mapper_session)
 
-        # Sauvegarder le backlog après modification
-        self.sauvegarder_backlog()
+        # Sauvegarder les modifications du backlog en attente
+        self.sauvegarder_si_modifie()
     
 
+    @tracer
+    @transaction_etat
     def deconnecter_tous_les_participants(self):
         """
         @brief Supprime tous les participants de l'état global.
 
         @details
         Cette méthode déconnecte tous les participants en réinitialisant la liste des participants 
-        et le mapping `mapper_session`. Le backlog est ensuite sauvegardé.
+        et le mapping `mapper_session`. Les modifications du backlog en attente sont ensuite sauvegardées.
         """
-        print("Déconnexion de tous les participants.")
-        self.state["participants"] = []
+        self.participants.vider()
         self.state["mapper_session"] = {}
-        self.sauvegarder_backlog()
-        print("Tous les participants ont été déconnectés.")
+        self.sauvegarder_si_modifie()
+        journaliseur.info("Tous les participants de la salle %s ont été déconnectés.", self.id_salle)
 
 
 
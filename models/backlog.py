@@ -0,0 +1,329 @@
+from bisect import bisect_left, bisect_right
+from itertools import chain, islice
+from constantes import *
+
+def encoder_curseur(cle):
+    """
+    @brief Encode la clé de tri d'une fonctionnalité en curseur de pagination.
+
+    @param cle Tuple (terminée, priorité, id) de `Backlog.cle`.
+
+    @return str: Curseur "terminée.priorité.id" (ex. "0.3.42").
+    """
+    terminee, priorite, identifiant = cle
+    return f"{int(terminee)}.{priorite}.{identifiant}"
+
+
+def decoder_curseur(curseur):
+    """
+    @brief Décode un curseur de pagination.
+
+    @param curseur Chaîne produite par `encoder_curseur`.
+
+    @return Tuple (terminée, priorité, id), comparable aux clés du backlog.
+
+    @throws ValueError Si le curseur est mal formé.
+    """
+    morceaux = curseur.split(".")
+    if len(morceaux) != 3 or morceaux[0] not in ("0", "1"):
+        raise ValueError(f"curseur invalide : {curseur!r}")
+    try:
+        return (morceaux[0] == "1", int(morceaux[1]), int(morceaux[2]))
+    except ValueError:
+        raise ValueError(f"curseur invalide : {curseur!r}") from None
+
+
+# Liste triée découpée en blocs
+class ListeTriee:
+    """
+    @brief Paires (clé, valeur) triées par clé, rangées dans des blocs de taille bornée.
+
+    @details
+    Dans une liste Python unique, une insertion ou une suppression décale tous les
+    éléments qui suivent (O(n)). Ici, le bloc concerné est trouvé par recherche
+    dichotomique sur le maximum de chaque bloc, puis la position dans le bloc : O(log n)
+    comparaisons et un décalage d'au plus 2 × `taille_bloc` éléments, quelle que soit
+    la taille de la liste. Un bloc trop grand est coupé en deux (la liste des maxima
+    est alors décalée, une fois toutes les `taille_bloc` insertions) ; un bloc vidé est
+    retiré. L'accès par position parcourt les blocs (O(n / taille_bloc)), sauf pour
+    le premier et le dernier élément.
+
+    Les clés sont uniques.
+    """
+
+    def __init__(self, cles=(), valeurs=(), taille_bloc=TAILLE_BLOC_ORDRE):
+        """
+        @brief Construit la liste à partir de clés déjà triées.
+
+        @param cles Liste triée des clés.
+        @param valeurs Liste des valeurs, dans le même ordre.
+        @param taille_bloc Taille des blocs à la construction (un bloc est coupé au double).
+        """
+        self.taille_bloc = taille_bloc
+        self.blocs_cles = [cles[i:i + taille_bloc] for i in range(0, len(cles), taille_bloc)]
+        self.blocs = [valeurs[i:i + taille_bloc] for i in range(0, len(valeurs), taille_bloc)]
+        self.maxima = [bloc[-1] for bloc in self.blocs_cles]
+        self.longueur = len(cles)
+
+    def inserer(self, cle, valeur):
+        """
+        @brief Insère une valeur à la place de sa clé.
+        """
+        if not self.blocs:
+            self.blocs_cles.append([cle])
+            self.blocs.append([valeur])
+            self.maxima.append(cle)
+            self.longueur = 1
+            return
+        numero = min(bisect_left(self.maxima, cle), len(self.maxima) - 1)
+        cles = self.blocs_cles[numero]
+        position = bisect_left(cles, cle)
+        cles.insert(position, cle)
+        self.blocs[numero].insert(position, valeur)
+        self.maxima[numero] = cles[-1]
+        self.longueur += 1
+        if len(cles) > 2 * self.taille_bloc:
+            moitie = len(cles) // 2
+            valeurs = self.blocs[numero]
+            self.blocs_cles[numero:numero + 1] = [cles[:moitie], cles[moitie:]]
+            self.blocs[numero:numero + 1] = [valeurs[:moitie], valeurs[moitie:]]
+            self.maxima.insert(numero, cles[moitie - 1])
+
+    def retirer(self, cle):
+        """
+        @brief Retire la valeur d'une clé présente dans la liste.
+
+        @throws KeyError Si la clé est absente.
+        """
+        numero = bisect_left(self.maxima, cle)
+        if numero < len(self.maxima):
+            cles = self.blocs_cles[numero]
+            position = bisect_left(cles, cle)
+            if cles[position] == cle:
+                del cles[position]
+                del self.blocs[numero][position]
+                self.longueur -= 1
+                if cles:
+                    self.maxima[numero] = cles[-1]
+                else:
+                    del self.blocs_cles[numero], self.blocs[numero], self.maxima[numero]
+                return
+        raise KeyError(cle)
+
+    def paires(self, apres=None):
+        """
+        @brief Parcourt les paires (clé, valeur) dans l'ordre, à partir de la clé `apres` exclue.
+
+        @return Générateur de tuples (clé, valeur).
+        """
+        numero = position = 0
+        if apres is not None:
+            numero = bisect_right(self.maxima, apres)
+            if numero < len(self.maxima):
+                position = bisect_right(self.blocs_cles[numero], apres)
+        for cles, valeurs in zip(self.blocs_cles[numero:], self.blocs[numero:]):
+            yield from zip(islice(cles, position, None), islice(valeurs, position, None))
+            position = 0
+
+    def valeurs(self, apres=None):
+        """
+        @brief Parcourt les valeurs dans l'ordre, à partir de la clé `apres` exclue.
+        """
+        return (valeur for _, valeur in self.paires(apres)) if apres is not None else iter(self)
+
+    def __iter__(self):
+        return chain.from_iterable(self.blocs)
+
+    def __len__(self):
+        return self.longueur
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return list(self)[position]
+        if position < 0:
+            position += self.longueur
+        if not 0 <= position < self.longueur:
+            raise IndexError("position hors de la liste")
+        if position >= self.longueur - len(self.blocs[-1]):
+            return self.blocs[-1][position - self.longueur]
+        for bloc in self.blocs:
+            if position < len(bloc):
+                return bloc[position]
+            position -= len(bloc)
+
+
+# Conteneur indexé des fonctionnalités du backlog
+class Backlog:
+    """
+    @brief Backlog indexé : accès par ID en O(1) et ordre de priorité maintenu à chaque modification.
+
+    @details
+    Les fonctionnalités sont indexées par identifiant (dictionnaire) et conservées
+    triées selon la clé (terminée, priorité, id) dans une `ListeTriee`. Un ajout, une
+    suppression ou une mise à jour repositionne une seule fonctionnalité par recherche
+    dichotomique (O(log n) plus le décalage d'un bloc borné), sans retrier tout le backlog. Les identifiants sont attribués par une séquence
+    croissante qui ne réutilise jamais l'identifiant d'une fonctionnalité supprimée.
+
+    Le parcours, `len` et l'indexation (`backlog[0]`) suivent l'ordre de priorité,
+    comme l'ancienne liste triée. `version` augmente à chaque modification.
+    """
+
+    def __init__(self, fonctionnalites=()):
+        """
+        @brief Construit le backlog à partir d'une liste de fonctionnalités.
+
+        @param fonctionnalites Itérable de Fonctionnalite.
+        """
+        self.par_id = {}  # {id: Fonctionnalite}
+        self.cles = {}  # {id: clé de tri au moment de l'indexation}
+        self.ordre = ListeTriee()  # fonctionnalités triées par clé
+        self.dernier_id = 0
+        self.version = 0  # incrémentée à chaque modification (ETag des pages du backlog)
+        for fonctionnalite in fonctionnalites:
+            self.par_id[fonctionnalite.id] = fonctionnalite
+        self.retrier()
+
+    @staticmethod
+    def cle(fonctionnalite):
+        """
+        @brief Clé de tri d'une fonctionnalité : non terminées d'abord, puis par priorité et par ID.
+
+        @param fonctionnalite Objet Fonctionnalite.
+
+        @return Tuple (terminée, priorité, id).
+        """
+        return (fonctionnalite.statut == STATUT_TERMINE, int(fonctionnalite.priorite), fonctionnalite.id)
+
+    def retrier(self):
+        """
+        @brief Reconstruit entièrement l'ordre de priorité (O(n log n)).
+
+        @details Nécessaire uniquement si des fonctionnalités ont été modifiées sans `mettre_a_jour`.
+        """
+        self.cles = {id_f: self.cle(f) for id_f, f in self.par_id.items()}
+        tries = sorted(self.par_id.values(), key=lambda f: self.cles[f.id])
+        self.ordre = ListeTriee([self.cles[f.id] for f in tries], tries)
+        self.dernier_id = max(self.dernier_id, max(self.par_id, default=0))
+        self.version += 1
+
+    def inserer_dans_ordre(self, fonctionnalite):
+        """
+        @brief Insère une fonctionnalité à sa place dans l'ordre de priorité (recherche dichotomique).
+        """
+        cle = self.cle(fonctionnalite)
+        self.ordre.inserer(cle, fonctionnalite)
+        self.cles[fonctionnalite.id] = cle
+
+    def retirer_de_ordre(self, fonctionnalite_id):
+        """
+        @brief Retire une fonctionnalité de l'ordre de priorité à partir de sa clé indexée.
+        """
+        self.ordre.retirer(self.cles.pop(fonctionnalite_id))
+
+    def prochain_id(self):
+        """
+        @brief Réserve le prochain identifiant de la séquence.
+
+        @return int: Nouvel identifiant, jamais attribué auparavant dans ce backlog.
+        """
+        self.dernier_id += 1
+        return self.dernier_id
+
+    def ajouter(self, fonctionnalite):
+        """
+        @brief Ajoute une fonctionnalité (ou remplace celle de même ID).
+
+        @param fonctionnalite Objet Fonctionnalite.
+        """
+        if fonctionnalite.id in self.par_id:
+            self.retirer_de_ordre(fonctionnalite.id)
+        self.par_id[fonctionnalite.id] = fonctionnalite
+        self.inserer_dans_ordre(fonctionnalite)
+        self.dernier_id = max(self.dernier_id, fonctionnalite.id)
+        self.version += 1
+
+    def supprimer(self, fonctionnalite_id):
+        """
+        @brief Retire une fonctionnalité du backlog.
+
+        @param fonctionnalite_id ID de la fonctionnalité.
+
+        @return La fonctionnalité retirée, ou None si elle n'existait pas.
+        """
+        fonctionnalite = self.par_id.pop(fonctionnalite_id, None)
+        if fonctionnalite is not None:
+            self.retirer_de_ordre(fonctionnalite_id)
+            self.version += 1
+        return fonctionnalite
+
+    def mettre_a_jour(self, fonctionnalite):
+        """
+        @brief Repositionne une fonctionnalité après modification de son statut ou de sa priorité.
+
+        @param fonctionnalite Objet Fonctionnalite déjà présent dans le backlog (ignoré sinon).
+        """
+        if self.par_id.get(fonctionnalite.id) is not fonctionnalite:
+            return
+        self.version += 1
+        if self.cles[fonctionnalite.id] != self.cle(fonctionnalite):
+            self.retirer_de_ordre(fonctionnalite.id)
+            self.inserer_dans_ordre(fonctionnalite)
+
+    def obtenir(self, fonctionnalite_id):
+        """
+        @brief Retourne une fonctionnalité à partir de son ID en O(1).
+
+        @return L'objet Fonctionnalite, ou None si introuvable.
+        """
+        return self.par_id.get(fonctionnalite_id)
+
+    def premiere_non_terminee(self):
+        """
+        @brief Retourne la fonctionnalité non terminée la plus prioritaire.
+
+        @return L'objet Fonctionnalite, ou None si toutes sont terminées.
+        """
+        if self.ordre and self.ordre[0].statut != STATUT_TERMINE:
+            return self.ordre[0]
+        return None
+
+    def parcourir(self, apres=None):
+        """
+        @brief Parcourt le backlog dans l'ordre de priorité, à partir de la clé `apres` exclue.
+
+        @return Itérateur de Fonctionnalite.
+        """
+        return self.ordre.valeurs(apres)
+
+    def page(self, apres=None, taille=TAILLE_PAGE_BACKLOG):
+        """
+        @brief Retourne une page du backlog dans l'ordre de priorité (pagination par clé).
+
+        @details La page commence juste après la clé `apres`, retrouvée par recherche
+        dichotomique : le coût est O(log n + taille), et un ajout ou une suppression
+        ailleurs dans le backlog ne décale pas les pages suivantes.
+
+        @param apres Clé de tri (terminée, priorité, id) de la dernière fonctionnalité de la page
+        précédente, ou None pour la première page.
+        @param taille Nombre maximal de fonctionnalités.
+
+        @return Tuple (liste des fonctionnalités, clé de la dernière si une page suit, sinon None).
+        """
+        paires = list(islice(self.ordre.paires(apres), taille + 1))
+        suivant = paires[taille - 1][0] if len(paires) > taille else None
+        return [fonctionnalite for _, fonctionnalite in paires[:taille]], suivant
+
+    def __iter__(self):
+        return iter(self.ordre)
+
+    def __len__(self):
+        return len(self.ordre)
+
+    def __getitem__(self, position):
+        return self.ordre[position]
+
+    def __contains__(self, fonctionnalite):
+        return self.par_id.get(fonctionnalite.id) is fonctionnalite
+
+    def __repr__(self):
+        return f"<Backlog {len(self)} fonctionnalité(s)>"
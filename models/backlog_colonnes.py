@@ -0,0 +1,379 @@
+import numpy as np
+from constantes import *
+from models.fonctionnalite import Fonctionnalite
+
+CAPACITE_INITIALE = 1024  # lignes réservées par un backlog en colonnes vide
+
+
+# Chaînes répétées encodées en entiers
+class TableChaines:
+    """
+    @brief Table de correspondance chaîne <-> code entier (statuts, modes de vote).
+    """
+
+    def __init__(self, valeurs=()):
+        """
+        @param valeurs Chaînes connues, encodées dans cet ordre (codes 0, 1, ...).
+        """
+        self.codes = {}  # {chaîne: code}
+        self.valeurs = []  # code -> chaîne
+        for valeur in valeurs:
+            self.encoder(valeur)
+
+    def encoder(self, valeur):
+        """
+        @brief Retourne le code d'une chaîne, en l'ajoutant à la table si elle est nouvelle.
+        """
+        code = self.codes.get(valeur)
+        if code is None:
+            code = self.codes[valeur] = len(self.valeurs)
+            self.valeurs.append(valeur)
+        return code
+
+
+# Backlog stocké en colonnes NumPy
+class BacklogColonnes:
+    """
+    @brief Backlog en colonnes : id, priorité, difficulté, statut et mode de vote dans des tableaux NumPy.
+
+    @details
+    Même interface que `Backlog` (accès par ID, ordre (terminée, priorité, id), pages,
+    ajout, suppression, `mettre_a_jour`), mais les fonctionnalités ne sont pas gardées
+    comme objets : chaque fonctionnalité est une ligne des colonnes, le statut et le
+    mode de vote sont des codes (`TableChaines`), le nom, la description et les
+    participants sont dans des listes parallèles. `obtenir`, le parcours et les pages
+    construisent des Fonctionnalite à la demande ; une fonctionnalité modifiée doit donc
+    être réécrite par `mettre_a_jour`, comme pour `Backlog`.
+
+    L'ordre est calculé par `np.lexsort` et gardé jusqu'à la modification suivante d'une
+    priorité ou d'un statut. Une suppression marque la ligne comme inactive ; les lignes
+    inactives sont retirées quand elles deviennent majoritaires. Les rapports
+    (`difficulte_par_priorite`, `compter_par_statut`) sont des réductions vectorisées.
+    """
+
+    def __init__(self, fonctionnalites=()):
+        """
+        @brief Construit le backlog à partir d'une liste de fonctionnalités.
+
+        @param fonctionnalites Itérable de Fonctionnalite.
+        """
+        self.table_statuts = TableChaines([STATUT_A_FAIRE, STATUT_EN_COURS, STATUT_TERMINE])
+        self.table_modes = TableChaines([VOTE_UNANIMITE, VOTE_MOYENNE])
+        self.code_termine = self.table_statuts.codes[STATUT_TERMINE]
+        # une fonctionnalité en double remplace la précédente, comme dans `Backlog`
+        fonctionnalites = list({f.id: f for f in fonctionnalites}.values())
+        self.lignes = len(fonctionnalites)  # lignes utilisées, actives ou non
+        self.par_id = {f.id: ligne for ligne, f in enumerate(fonctionnalites)}  # {id: ligne}
+        self.noms = [f.nom for f in fonctionnalites]
+        self.descriptions = [f.description for f in fonctionnalites]
+        self.participants = [f.participants for f in fonctionnalites]
+
+        capacite = max(CAPACITE_INITIALE, self.lignes)
+        self.ids = np.zeros(capacite, dtype=np.int64)
+        self.priorites = np.zeros(capacite, dtype=np.int64)
+        self.difficultes = np.full(capacite, np.nan)  # NaN : difficulté non estimée
+        self.statuts = np.zeros(capacite, dtype=np.int16)
+        self.modes = np.zeros(capacite, dtype=np.int16)
+        self.actives = np.zeros(capacite, dtype=bool)
+        n = self.lignes
+        self.ids[:n] = np.fromiter((f.id for f in fonctionnalites), np.int64, n)
+        self.priorites[:n] = np.fromiter((int(f.priorite) for f in fonctionnalites), np.int64, n)
+        self.difficultes[:n] = np.fromiter(
+            (np.nan if f.difficulte is None else int(f.difficulte) for f in fonctionnalites), np.float64, n
+        )
+        self.statuts[:n] = np.fromiter(map(self.table_statuts.encoder, (f.statut for f in fonctionnalites)), np.int16, n)
+        self.modes[:n] = np.fromiter(map(self.table_modes.encoder, (f.mode_de_vote for f in fonctionnalites)), np.int16, n)
+        self.actives[:n] = True
+
+        self.dernier_id = max(self.par_id, default=0)
+        self.version = 0  # incrémentée à chaque modification (ETag des pages du backlog)
+        self.ordre_cache = None  # (lignes triées, terminées, priorités, ids) dans l'ordre du backlog
+
+    def colonnes(self):
+        """
+        @brief Retourne les colonnes NumPy, dans l'ordre de `valeurs_colonnes`.
+        """
+        return (self.ids, self.priorites, self.difficultes, self.statuts, self.modes)
+
+    def valeurs_colonnes(self, fonctionnalite):
+        """
+        @brief Convertit une fonctionnalité en valeurs des colonnes NumPy.
+
+        @return Tuple (id, priorité, difficulté ou NaN, code du statut, code du mode de vote).
+        """
+        difficulte = np.nan if fonctionnalite.difficulte is None else int(fonctionnalite.difficulte)
+        return (
+            fonctionnalite.id,
+            int(fonctionnalite.priorite),
+            difficulte,
+            self.table_statuts.encoder(fonctionnalite.statut),
+            self.table_modes.encoder(fonctionnalite.mode_de_vote),
+        )
+
+    def fonctionnalite(self, ligne):
+        """
+        @brief Construit la Fonctionnalite d'une ligne.
+        """
+        difficulte = self.difficultes[ligne]
+        return Fonctionnalite(
+            int(self.ids[ligne]),
+            self.noms[ligne],
+            self.descriptions[ligne],
+            int(self.priorites[ligne]),
+            None if np.isnan(difficulte) else int(difficulte),
+            self.table_statuts.valeurs[self.statuts[ligne]],
+            self.table_modes.valeurs[self.modes[ligne]],
+            self.participants[ligne],
+        )
+
+    def ecrire(self, ligne, fonctionnalite):
+        """
+        @brief Écrit une fonctionnalité dans une ligne des colonnes.
+
+        @return bool: True si sa clé de tri (statut, priorité) a changé.
+        """
+        valeurs = self.valeurs_colonnes(fonctionnalite)
+        terminee = valeurs[3] == self.code_termine
+        cle_modifiee = not self.actives[ligne] or (
+            (self.statuts[ligne] == self.code_termine) != terminee or self.priorites[ligne] != valeurs[1]
+        )
+        for tableau, valeur in zip(self.colonnes(), valeurs):
+            tableau[ligne] = valeur
+        self.actives[ligne] = True
+        self.noms[ligne] = fonctionnalite.nom
+        self.descriptions[ligne] = fonctionnalite.description
+        self.participants[ligne] = fonctionnalite.participants
+        return cle_modifiee
+
+    def agrandir(self):
+        """
+        @brief Double la capacité des colonnes NumPy.
+        """
+        capacite = 2 * len(self.ids)
+        for nom in ("ids", "priorites", "statuts", "modes", "actives"):
+            tableau = getattr(self, nom)
+            nouveau = np.zeros(capacite, dtype=tableau.dtype)
+            nouveau[:len(tableau)] = tableau
+            setattr(self, nom, nouveau)
+        difficultes = np.full(capacite, np.nan)
+        difficultes[:len(self.difficultes)] = self.difficultes
+        self.difficultes = difficultes
+
+    def compacter(self):
+        """
+        @brief Retire les lignes des fonctionnalités supprimées.
+        """
+        conservees = np.flatnonzero(self.actives[:self.lignes])
+        for nom in ("ids", "priorites", "difficultes", "statuts", "modes", "actives"):
+            tableau = getattr(self, nom)
+            tableau[:len(conservees)] = tableau[conservees]
+        self.actives[len(conservees):] = False
+        self.difficultes[len(conservees):] = np.nan
+        for nom in ("noms", "descriptions", "participants"):
+            liste = getattr(self, nom)
+            setattr(self, nom, [liste[ligne] for ligne in conservees])
+        self.lignes = len(conservees)
+        self.par_id = {int(identifiant): ligne for ligne, identifiant in enumerate(self.ids[:self.lignes])}
+        self.ordre_cache = None
+
+    def ordre(self):
+        """
+        @brief Retourne l'ordre du backlog, recalculé par `np.lexsort` s'il a changé.
+
+        @return Tuple de tableaux (lignes triées, terminées, priorités, ids), dans l'ordre (terminée, priorité, id).
+        """
+        if self.ordre_cache is None:
+            lignes = np.flatnonzero(self.actives[:self.lignes])
+            terminees = self.statuts[lignes] == self.code_termine
+            priorites = self.priorites[lignes]
+            ids = self.ids[lignes]
+            tri = np.lexsort((ids, priorites, terminees))
+            self.ordre_cache = (lignes[tri], terminees[tri], priorites[tri], ids[tri])
+        return self.ordre_cache
+
+    def retrier(self):
+        """
+        @brief Recalcule entièrement l'ordre de priorité.
+        """
+        self.ordre_cache = None
+        self.ordre()
+        self.dernier_id = max(self.dernier_id, max(self.par_id, default=0))
+        self.version += 1
+
+    def prochain_id(self):
+        """
+        @brief Réserve le prochain identifiant de la séquence.
+
+        @return int: Nouvel identifiant, jamais attribué auparavant dans ce backlog.
+        """
+        self.dernier_id += 1
+        return self.dernier_id
+
+    def ajouter(self, fonctionnalite):
+        """
+        @brief Ajoute une fonctionnalité (ou remplace celle de même ID).
+
+        @param fonctionnalite Objet Fonctionnalite.
+        """
+        ligne = self.par_id.get(fonctionnalite.id)
+        if ligne is None:
+            if self.lignes == len(self.ids):
+                self.agrandir()
+            ligne = self.par_id[fonctionnalite.id] = self.lignes
+            self.lignes += 1
+            self.noms.append(None)
+            self.descriptions.append(None)
+            self.participants.append(None)
+        self.ecrire(ligne, fonctionnalite)
+        self.ordre_cache = None
+        self.dernier_id = max(self.dernier_id, fonctionnalite.id)
+        self.version += 1
+
+    def supprimer(self, fonctionnalite_id):
+        """
+        @brief Retire une fonctionnalité du backlog.
+
+        @param fonctionnalite_id ID de la fonctionnalité.
+
+        @return La fonctionnalité retirée, ou None si elle n'existait pas.
+        """
+        ligne = self.par_id.pop(fonctionnalite_id, None)
+        if ligne is None:
+            return None
+        fonctionnalite = self.fonctionnalite(ligne)
+        self.actives[ligne] = False
+        self.noms[ligne] = self.descriptions[ligne] = self.participants[ligne] = None
+        self.ordre_cache = None
+        self.version += 1
+        if self.lignes > CAPACITE_INITIALE and len(self.par_id) < self.lignes // 2:
+            self.compacter()
+        return fonctionnalite
+
+    def mettre_a_jour(self, fonctionnalite):
+        """
+        @brief Réécrit une fonctionnalité modifiée et la repositionne si son statut ou sa priorité a changé.
+
+        @param fonctionnalite Objet Fonctionnalite dont l'ID est dans le backlog (ignoré sinon).
+        """
+        ligne = self.par_id.get(fonctionnalite.id)
+        if ligne is None:
+            return
+        self.version += 1
+        if self.ecrire(ligne, fonctionnalite):
+            self.ordre_cache = None
+
+    def obtenir(self, fonctionnalite_id):
+        """
+        @brief Retourne une fonctionnalité à partir de son ID en O(1).
+
+        @return Un nouvel objet Fonctionnalite, ou None si introuvable.
+        """
+        ligne = self.par_id.get(fonctionnalite_id)
+        return None if ligne is None else self.fonctionnalite(ligne)
+
+    def premiere_non_terminee(self):
+        """
+        @brief Retourne la fonctionnalité non terminée la plus prioritaire.
+
+        @details Sans ordre calculé, deux réductions sur les colonnes (priorité minimale,
+        puis plus petit ID à cette priorité) évitent un tri complet.
+
+        @return L'objet Fonctionnalite, ou None si toutes sont terminées.
+        """
+        if self.ordre_cache is not None:
+            lignes, terminees, _, _ = self.ordre_cache
+            return self.fonctionnalite(lignes[0]) if len(lignes) and not terminees[0] else None
+        candidates = self.actives[:self.lignes] & (self.statuts[:self.lignes] != self.code_termine)
+        if not candidates.any():
+            return None
+        priorites = self.priorites[:self.lignes]
+        candidates &= priorites == priorites[candidates].min()
+        ids = np.where(candidates, self.ids[:self.lignes], np.iinfo(np.int64).max)
+        return self.fonctionnalite(int(np.argmin(ids)))
+
+    def page(self, apres=None, taille=TAILLE_PAGE_BACKLOG):
+        """
+        @brief Retourne une page du backlog dans l'ordre de priorité (pagination par clé).
+
+        @details Le début de la page est retrouvé par trois recherches dichotomiques
+        successives (terminée, puis priorité, puis id) dans l'ordre calculé.
+
+        @param apres Clé (terminée, priorité, id) de la dernière fonctionnalité de la page précédente, ou None.
+        @param taille Nombre maximal de fonctionnalités.
+
+        @return Tuple (liste des fonctionnalités, clé de la dernière si une page suit, sinon None).
+        """
+        lignes, terminees, priorites, ids = self.ordre()
+        debut = 0
+        if apres is not None:
+            bas = np.searchsorted(terminees, bool(apres[0]), "left")
+            haut = np.searchsorted(terminees, bool(apres[0]), "right")
+            bas, haut = (bas + np.searchsorted(priorites[bas:haut], apres[1], cote) for cote in ("left", "right"))
+            debut = int(bas + np.searchsorted(ids[bas:haut], apres[2], "right"))
+        fin = debut + taille
+        suivant = None
+        if fin < len(lignes):
+            suivant = (bool(terminees[fin - 1]), int(priorites[fin - 1]), int(ids[fin - 1]))
+        return [self.fonctionnalite(ligne) for ligne in lignes[debut:fin]], suivant
+
+    def difficulte_par_priorite(self, bornes=BANDES_PRIORITE, terminees=False):
+        """
+        @brief Somme des difficultés par bande de priorité (réduction vectorisée).
+
+        @param bornes Bornes supérieures (incluses) des bandes, croissantes ; les priorités
+        au-delà de la dernière borne forment une bande de plus.
+        @param terminees Si True, compte aussi les fonctionnalités terminées.
+
+        @return list: Une entrée par bande : {"priorite_max", "fonctionnalites", "difficulte_totale", "non_estimees"}
+        ("priorite_max" vaut None pour la bande au-delà de la dernière borne).
+        """
+        n = self.lignes
+        selection = self.actives[:n] if terminees else self.actives[:n] & (self.statuts[:n] != self.code_termine)
+        # bande = nombre de bornes dépassées (plus rapide que searchsorted pour quelques bornes)
+        bandes = np.zeros(n, dtype=np.intp)
+        for borne in bornes:
+            bandes += self.priorites[:n] > borne
+        difficultes = self.difficultes[:n]
+        estimees = ~np.isnan(difficultes)
+        nombre = len(bornes) + 1
+        fonctionnalites = np.bincount(bandes, weights=selection, minlength=nombre)
+        totaux = np.bincount(bandes, weights=np.where(selection & estimees, difficultes, 0), minlength=nombre)
+        manquantes = np.bincount(bandes, weights=selection & ~estimees, minlength=nombre)
+        return [
+            {
+                "priorite_max": bornes[i] if i < len(bornes) else None,
+                "fonctionnalites": int(fonctionnalites[i]),
+                "difficulte_totale": int(totaux[i]),
+                "non_estimees": int(manquantes[i]),
+            }
+            for i in range(nombre)
+        ]
+
+    def compter_par_statut(self):
+        """
+        @brief Nombre de fonctionnalités par statut (réduction vectorisée).
+
+        @return dict: {statut: nombre}, pour les statuts présents.
+        """
+        statuts = self.statuts[:self.lignes][self.actives[:self.lignes]]
+        comptes = np.bincount(statuts, minlength=len(self.table_statuts.valeurs))
+        return {statut: int(n) for statut, n in zip(self.table_statuts.valeurs, comptes) if n}
+
+    def __iter__(self):
+        lignes = self.ordre()[0]
+        return (self.fonctionnalite(ligne) for ligne in lignes)
+
+    def __len__(self):
+        return len(self.par_id)
+
+    def __getitem__(self, position):
+        lignes = self.ordre()[0]
+        if isinstance(position, slice):
+            return [self.fonctionnalite(ligne) for ligne in lignes[position]]
+        return self.fonctionnalite(lignes[position])
+
+    def __contains__(self, fonctionnalite):
+        return fonctionnalite.id in self.par_id
+
+    def __repr__(self):
+        return f"<BacklogColonnes {len(self)} fonctionnalité(s)>"
@@ -0,0 +1,112 @@
+import json
+import queue
+import threading
+from constantes import *
+
+# Reçu par un abonné à la fermeture du canal : son flux doit se terminer
+FIN_DU_FLUX = None
+
+# Diffusion des changements d'état d'une salle
+class CanalEvenements:
+    """
+    @brief Canal de diffusion des événements d'une salle de vote vers ses abonnés.
+
+    @details
+    Chaque abonné (connexion Server-Sent Events) dispose de sa propre file bornée.
+    Chaque événement transporte l'état complet utile au client : si un abonné lent
+    laisse sa file se remplir, les événements les plus anciens sont abandonnés
+    sans perte d'information. À la fermeture de la salle, chaque abonné reçoit
+    `FIN_DU_FLUX`.
+    """
+
+    def __init__(self, taille_file=TAILLE_FILE_SSE):
+        """
+        @brief Initialise un canal sans abonné.
+
+        @param taille_file Nombre maximal d'événements en attente par abonné.
+        """
+        self.taille_file = taille_file
+        self.abonnes = set()
+        self.verrou = threading.Lock()
+
+    def abonner(self):
+        """
+        @brief Enregistre un nouvel abonné.
+
+        @return La file (queue.Queue) dans laquelle l'abonné reçoit les événements.
+        """
+        file = queue.Queue(maxsize=self.taille_file)
+        with self.verrou:
+            self.abonnes.add(file)
+        return file
+
+    def desabonner(self, file):
+        """
+        @brief Retire un abonné du canal.
+
+        @param file La file retournée par `abonner`.
+        """
+        with self.verrou:
+            self.abonnes.discard(file)
+
+    def publier(self, evenement, donnees):
+        """
+        @brief Envoie un événement à tous les abonnés.
+
+        @param evenement Type d'événement (ex. "vote", "revelation").
+        @param donnees Dictionnaire sérialisable en JSON.
+        """
+        message = formater_sse(evenement, donnees)
+        with self.verrou:
+            abonnes = list(self.abonnes)
+        for file in abonnes:
+            self.deposer(file, message)
+
+    def fermer(self):
+        """
+        @brief Termine le flux de tous les abonnés (fermeture de la salle).
+
+        @details Chaque abonné reçoit `FIN_DU_FLUX` et est retiré du canal. Le canal
+        reste utilisable : la salle par défaut n'est jamais retirée du registre.
+        """
+        with self.verrou:
+            abonnes = list(self.abonnes)
+            self.abonnes.clear()
+        for file in abonnes:
+            self.deposer(file, FIN_DU_FLUX)
+
+    @staticmethod
+    def deposer(file, message):
+        """
+        @brief Dépose un message dans la file d'un abonné sans jamais bloquer.
+
+        @details Si l'abonné est trop lent et que sa file est pleine, le plus ancien message est abandonné.
+        """
+        try:
+            file.put_nowait(message)
+        except queue.Full:
+            try:
+                file.get_nowait()
+                file.put_nowait(message)
+            except (queue.Empty, queue.Full):
+                pass
+
+    def nombre_abonnes(self):
+        """
+        @brief Retourne le nombre d'abonnés connectés.
+
+        @return int: Nombre d'abonnés.
+        """
+        return len(self.abonnes)
+
+
+def formater_sse(evenement, donnees):
+    """
+    @brief Formate un message au format Server-Sent Events.
+
+    @param evenement Nom de l'événement.
+    @param donnees Dictionnaire sérialisé en JSON dans le champ `data`.
+
+    @return Chaîne prête à être écrite dans le flux HTTP.
+    """
+    return f"event: {evenement}\ndata: {json.dumps(donnees, ensure_ascii=False)}\n\n"
@@ -0,0 +1,328 @@
+import json
+import re
+from constantes import *
+from models.fonctionnalite import Fonctionnalite
+
+# Espaces autorisés entre deux éléments JSON
+ESPACES = re.compile(r"[ \t\n\r]*")
+
+# Caractères de fin de tampon pouvant appartenir à une valeur coupée par la fin du bloc
+# (littéral "false", échappement "\uXXXX", nombre "1.5e-10"...)
+MARGE_VALEUR_COUPEE = 16
+
+CHAMPS_FONCTIONNALITE = {"id", "nom", "description", "priorite", "difficulte", "statut", "mode_de_vote", "participants"}
+STATUTS_CONNUS = {STATUT_A_FAIRE, STATUT_EN_COURS, STATUT_TERMINE}
+MODES_DE_VOTE_CONNUS = {VOTE_UNANIMITE, VOTE_MOYENNE}
+
+
+# Bilan d'un chargement de backlog
+class RapportChargement:
+    """
+    @brief Bilan du chargement d'un fichier backlog : fonctionnalités acceptées, rejetées et anomalies.
+    """
+
+    def __init__(self):
+        self.acceptees = 0
+        self.rejets = []  # [(position dans le tableau à partir de 0, id ou None, raison)]
+        self.avertissements = []  # [(position, id, message)] : fonctionnalité chargée malgré l'anomalie
+        self.erreur = None  # JSON illisible : le chargement s'est arrêté à cet endroit
+        self.vide = False  # fichier vide
+
+    def rejeter(self, position, donnees, raison):
+        """
+        @brief Note une fonctionnalité écartée du chargement.
+        """
+        identifiant = donnees.get("id") if isinstance(donnees, dict) else None
+        self.rejets.append((position, identifiant, raison))
+
+    def messages(self, limite=LIMITE_MESSAGES_CHARGEMENT):
+        """
+        @brief Décrit les anomalies du chargement.
+
+        @param limite Nombre maximal de rejets et d'avertissements détaillés.
+
+        @return list: Messages lisibles (fonctionnalités numérotées à partir de 1), vide si le chargement est sans anomalie.
+        """
+        messages = [
+            f"Fonctionnalité n°{position + 1} (id {identifiant}) rejetée : {raison}"
+            for position, identifiant, raison in self.rejets[:limite]
+        ]
+        messages += [
+            f"Fonctionnalité n°{position + 1} (id {identifiant}) : {message}"
+            for position, identifiant, message in self.avertissements[:limite]
+        ]
+        masques = max(len(self.rejets) - limite, 0) + max(len(self.avertissements) - limite, 0)
+        if masques:
+            messages.append(f"... et {masques} autre(s) anomalie(s).")
+        if self.erreur:
+            messages.append(self.erreur)
+        return messages
+
+
+def entier(valeur, champ):
+    """
+    @brief Convertit un champ numérique en entier.
+
+    @throws ValueError Si la valeur n'est pas un entier (les booléens sont refusés).
+    """
+    if isinstance(valeur, bool) or not isinstance(valeur, (int, float, str)):
+        raise ValueError(f"{champ} invalide : {valeur!r}")
+    if isinstance(valeur, int):
+        return valeur
+    try:
+        nombre = float(valeur)
+    except ValueError:
+        raise ValueError(f"{champ} invalide : {valeur!r}") from None
+    if not nombre.is_integer():
+        raise ValueError(f"{champ} invalide : {valeur!r}")
+    return int(nombre)
+
+
+def convertir_fonctionnalite(donnees):
+    """
+    @brief Valide un enregistrement du backlog et le convertit en Fonctionnalite, en une seule passe.
+
+    @details
+    Sont rejetés : un enregistrement qui n'est pas un objet, un id, une priorité ou une
+    difficulté non entiers, un nom vide et des participants qui ne sont pas une liste de
+    pseudos. Les clés inconnues sont ignorées ; elles sont signalées comme le sont un
+    statut, un mode de vote ou une priorité hors des valeurs prévues.
+
+    @param donnees Objet JSON décodé.
+
+    @return Tuple (Fonctionnalite, liste des avertissements).
+
+    @throws ValueError Si l'enregistrement est invalide.
+    """
+    if not isinstance(donnees, dict):
+        raise ValueError("l'enregistrement n'est pas un objet")
+    avertissements = []
+    if "id" not in donnees:
+        raise ValueError("id manquant")
+    identifiant = donnees["id"]
+    if type(identifiant) is not int:  # cas courant testé sans appel de fonction
+        identifiant = entier(identifiant, "id")
+    nom = donnees.get("nom")
+    if not isinstance(nom, str) or not nom.strip():
+        raise ValueError("nom manquant")
+    description = donnees.get("description") or ""
+    if not isinstance(description, str):
+        raise ValueError(f"description invalide : {description!r}")
+    priorite = donnees.get("priorite")
+    if type(priorite) is not int:
+        priorite = entier(priorite, "priorité")
+    if not PRIORITE_MIN <= priorite <= PRIORITE_MAX:
+        avertissements.append(f"priorité {priorite} hors de [{PRIORITE_MIN}, {PRIORITE_MAX}]")
+    difficulte = donnees.get("difficulte")
+    if difficulte is not None and type(difficulte) is not int:
+        difficulte = entier(difficulte, "difficulté")
+    statut = donnees.get("statut", STATUT_A_FAIRE)
+    if statut not in STATUTS_CONNUS:
+        avertissements.append(f"statut inconnu : {statut!r}")
+    mode_de_vote = donnees.get("mode_de_vote", VOTE_UNANIMITE)
+    if mode_de_vote not in MODES_DE_VOTE_CONNUS:
+        avertissements.append(f"mode de vote inconnu : {mode_de_vote!r}")
+    participants = donnees.get("participants") or []
+    if not isinstance(participants, list) or not all(isinstance(p, str) for p in participants):
+        raise ValueError(f"participants invalides : {participants!r}")
+    if not CHAMPS_FONCTIONNALITE.issuperset(donnees):
+        inconnues = sorted(donnees.keys() - CHAMPS_FONCTIONNALITE)
+        avertissements.append(f"clé(s) inconnue(s) ignorée(s) : {', '.join(inconnues)}")
+
+    fonctionnalite = Fonctionnalite(
+        identifiant, nom, description, priorite, difficulte, statut, mode_de_vote, participants
+    )
+    return fonctionnalite, avertissements
+
+
+# Lecture incrémentale d'un document JSON
+class FluxJson:
+    """
+    @brief Lecteur JSON incrémental : décode les valeurs une à une, en lisant le fichier par blocs.
+
+    @details Seule la partie non encore décodée du fichier est gardée en mémoire (au plus
+    un bloc plus la valeur en cours de lecture).
+    """
+
+    def __init__(self, fichier, taille_bloc=TAILLE_BLOC_LECTURE):
+        self.fichier = fichier
+        self.taille_bloc = taille_bloc
+        self.tampon = ""
+        self.position = 0  # position de lecture dans le tampon
+        self.decalage = 0  # position du début du tampon dans le fichier
+        self.fin = False
+        self.decodeur = json.JSONDecoder()
+
+    def completer(self):
+        """
+        @brief Lit un bloc de plus et oublie la partie déjà décodée du tampon.
+
+        @return bool: False si la fin du fichier est atteinte.
+        """
+        bloc = self.fichier.read(self.taille_bloc)
+        if not bloc:
+            self.fin = True
+            return False
+        self.decalage += self.position
+        self.tampon = self.tampon[self.position:] + bloc
+        self.position = 0
+        return True
+
+    def caractere(self):
+        """
+        @brief Passe les espaces et retourne le caractère suivant sans le consommer.
+
+        @return str: Le caractère, ou "" à la fin du fichier.
+        """
+        while True:
+            self.position = ESPACES.match(self.tampon, self.position).end()
+            if self.position < len(self.tampon):
+                return self.tampon[self.position]
+            if not self.completer():
+                return ""
+
+    def erreur(self, message):
+        """
+        @brief Construit une erreur de syntaxe à la position courante.
+        """
+        return json.JSONDecodeError(f"{message} (caractère {self.decalage + self.position})", self.tampon, self.position)
+
+    def consommer(self, attendu):
+        """
+        @brief Consomme le caractère attendu.
+
+        @throws json.JSONDecodeError Si le caractère suivant est différent.
+        """
+        if self.caractere() != attendu:
+            raise self.erreur(f"'{attendu}' attendu")
+        self.position += 1
+
+    def coupee(self, position):
+        """
+        @brief Indique si une position est assez proche de la fin du tampon pour que la valeur continue dans le bloc suivant.
+        """
+        return position >= len(self.tampon) - MARGE_VALEUR_COUPEE and not self.fin
+
+    def valeur(self):
+        """
+        @brief Décode la valeur JSON suivante.
+
+        @details Un bloc de plus n'est lu que si l'erreur peut venir de la fin du tampon
+        (chaîne non terminée, erreur dans ses derniers caractères) : une erreur de syntaxe
+        au milieu du tampon est signalée sans lire la suite du fichier.
+
+        @throws json.JSONDecodeError Si la valeur est invalide ou tronquée par la fin du fichier.
+        """
+        self.caractere()
+        while True:
+            try:
+                valeur, fin = self.decodeur.raw_decode(self.tampon, self.position)
+            except json.JSONDecodeError as e:
+                # valeur peut-être coupée par la fin du bloc
+                if (e.msg.startswith("Unterminated string") or self.coupee(e.pos)) and self.completer():
+                    continue
+                self.position = e.pos
+                raise self.erreur(f"valeur JSON invalide ou incomplète : {e.msg}") from None
+            # un nombre en fin de tampon peut continuer dans le bloc suivant
+            if self.coupee(fin) and self.completer():
+                continue
+            self.position = fin
+            return valeur
+
+
+def lire_tableau(flux, cle):
+    """
+    @brief Parcourt un à un les éléments du tableau `cle` de l'objet JSON racine.
+
+    @details Les autres clés de l'objet racine sont décodées puis ignorées.
+
+    @param flux FluxJson positionné au début du document.
+    @param cle Clé du tableau (ex. "backlog").
+
+    @return Générateur des éléments décodés.
+
+    @throws json.JSONDecodeError Si le document est invalide.
+    """
+    flux.consommer("{")
+    if flux.caractere() == "}":
+        return
+    while True:
+        nom = flux.valeur()
+        if not isinstance(nom, str):
+            raise flux.erreur("nom de clé attendu")
+        flux.consommer(":")
+        if nom != cle:
+            flux.valeur()
+        else:
+            flux.consommer("[")
+            if flux.caractere() == "]":
+                flux.position += 1
+            else:
+                while True:
+                    yield flux.valeur()
+                    separateur = flux.caractere()
+                    if separateur not in (",", "]"):
+                        raise flux.erreur("',' ou ']' attendu")
+                    flux.position += 1
+                    if separateur == "]":
+                        break
+        separateur = flux.caractere()
+        if separateur not in (",", "}"):
+            raise flux.erreur("',' ou '}' attendu")
+        flux.position += 1
+        if separateur == "}":
+            return
+
+
+def lire_backlog(chemin, rapport=None, taille_bloc=TAILLE_BLOC_LECTURE):
+    """
+    @brief Lit un fichier backlog JSON fonctionnalité par fonctionnalité, sans le charger en entier.
+
+    @details
+    Chaque enregistrement du tableau `backlog` est validé et converti dès sa lecture.
+    Un enregistrement invalide ou dont l'id est déjà lu est noté dans le rapport et
+    ignoré ; un document JSON illisible ou mal encodé (autre que UTF-8) arrête la
+    lecture (les fonctionnalités déjà lues restent valables) et l'erreur est notée
+    dans le rapport.
+
+    @param chemin Chemin du fichier backlog.
+    @param rapport RapportChargement complété pendant la lecture, optionnel.
+    @param taille_bloc Nombre de caractères lus à la fois.
+
+    @return Générateur de Fonctionnalite, dans l'ordre du fichier.
+
+    @throws FileNotFoundError Immédiatement, si le fichier n'existe pas.
+    """
+    fichier = open(chemin, "r", encoding="utf-8")
+    return parcourir_backlog(fichier, rapport if rapport is not None else RapportChargement(), taille_bloc)
+
+
+def parcourir_backlog(fichier, rapport, taille_bloc):
+    """
+    @brief Générateur de `lire_backlog` ; ferme le fichier à la fin du parcours.
+    """
+    identifiants = set()
+    flux = FluxJson(fichier, taille_bloc)
+    try:
+        if flux.caractere() == "":
+            rapport.vide = True
+            return
+        for position, donnees in enumerate(lire_tableau(flux, "backlog")):
+            try:
+                fonctionnalite, avertissements = convertir_fonctionnalite(donnees)
+                if fonctionnalite.id in identifiants:
+                    raise ValueError(f"id {fonctionnalite.id} déjà présent")
+            except ValueError as e:
+                rapport.rejeter(position, donnees, str(e))
+                continue
+            identifiants.add(fonctionnalite.id)
+            rapport.acceptees += 1
+            for message in avertissements:
+                rapport.avertissements.append((position, fonctionnalite.id, message))
+            yield fonctionnalite
+    except json.JSONDecodeError as e:
+        rapport.erreur = f"JSON invalide, lecture interrompue : {e.msg}"
+    except UnicodeDecodeError as e:
+        rapport.erreur = f"Fichier illisible en UTF-8, lecture interrompue : {e.reason} (octet {e.start})"
+    finally:
+        fichier.close()
@@ -0,0 +1,153 @@
+from collections.abc import Mapping
+import numpy as np
+from constantes import *
+
+# Codes entiers des cartes : position dans CARTES_VOTE
+CODES_CARTES = {carte: code for code, carte in enumerate(CARTES_VOTE)}
+NOMBRE_CARTES = len(CARTES_VOTE)
+TABLE_CARTES = np.array(CARTES_VOTE, dtype=object)  # code -> carte
+
+# Table de correspondance des cartes numériques, triées par valeur croissante
+CODES_NUMERIQUES = np.array([CODES_CARTES[c] for c in sorted(LISTE_CARTE_NUMERIQUE, key=int)])
+VALEURS_NUMERIQUES = np.array([int(CARTES_VOTE[c]) for c in CODES_NUMERIQUES], dtype=float)
+CODE_CAFE = CODES_CARTES["cafe"]
+CODE_INTERROGATION = CODES_CARTES["?"]
+
+
+def encoder_votes(votes):
+    """
+    @brief Convertit une liste de votes en codes entiers.
+
+    @param votes Itérable de cartes (str ou int, ex. "5", 8, "cafe").
+
+    @return np.ndarray: Codes des cartes (indices dans CARTES_VOTE).
+
+    @throws ValueError Si une carte ne fait pas partie de CARTES_VOTE.
+    """
+    try:
+        return np.fromiter((CODES_CARTES[str(v)] for v in votes), dtype=np.int16)
+    except KeyError as erreur:
+        raise ValueError(f"Carte de vote inconnue : {erreur.args[0]}") from None
+
+
+def matrice_comptes(tours):
+    """
+    @brief Construit la matrice des comptes par carte d'un lot de tours de vote.
+
+    @param tours Liste de tours ; chaque tour est soit une liste de votes, soit
+    un dictionnaire {carte: nombre} (ex. les compteurs d'une salle).
+
+    @return np.ndarray: Matrice (nombre de tours x nombre de cartes) d'entiers.
+    """
+    comptes = np.zeros((len(tours), NOMBRE_CARTES), dtype=np.int64)
+    lignes, codes = [], []
+    for ligne, tour in enumerate(tours):
+        if isinstance(tour, Mapping):
+            for carte, nombre in tour.items():
+                comptes[ligne, encoder_votes([carte])[0]] += nombre
+        else:
+            codes_tour = encoder_votes(tour)
+            codes.append(codes_tour)
+            lignes.append(np.full(len(codes_tour), ligne, dtype=np.int64))
+    if codes:
+        # Un seul bincount pour tous les tours donnés sous forme de listes
+        positions = np.concatenate(lignes) * NOMBRE_CARTES + np.concatenate(codes)
+        comptes += np.bincount(positions, minlength=comptes.size).reshape(comptes.shape)
+    return comptes
+
+
+def cartes_les_plus_proches(valeurs):
+    """
+    @brief Retourne, pour chaque valeur, la carte numérique la plus proche.
+
+    @details En cas d'égalité, la carte la plus basse est retenue. Les valeurs NaN donnent None.
+
+    @param valeurs Tableau de nombres.
+
+    @return np.ndarray: Cartes (str) ou None.
+    """
+    valeurs = np.asarray(valeurs, dtype=float)
+    droite = np.clip(np.searchsorted(VALEURS_NUMERIQUES, valeurs), 1, len(VALEURS_NUMERIQUES) - 1)
+    gauche = droite - 1
+    plus_proche = np.where(
+        np.abs(valeurs - VALEURS_NUMERIQUES[gauche]) <= np.abs(VALEURS_NUMERIQUES[droite] - valeurs),
+        gauche, droite
+    )
+    cartes = TABLE_CARTES[CODES_NUMERIQUES[plus_proche]]
+    cartes[np.isnan(valeurs)] = None
+    return cartes
+
+
+def depouiller_lot(tours):
+    """
+    @brief Dépouille un lot de tours de vote en une seule passe vectorisée.
+
+    @details
+    Les statistiques (moyenne, médiane, écart, carte la plus proche de la moyenne)
+    portent sur les cartes numériques ; les cartes "?" et café sont comptées à part.
+    Le mode est la carte la plus votée, toutes cartes confondues. Un tour sans vote
+    numérique donne NaN (ou None pour les cartes).
+
+    @param tours Liste de tours (listes de votes ou dictionnaires {carte: nombre}).
+
+    @return dict: Tableaux NumPy indexés par tour : nombre, numeriques, cafe,
+    interrogation, moyenne, mediane, ecart, mode, carte_moyenne, unanime.
+    """
+    comptes = matrice_comptes(tours)
+    nombre = comptes.sum(axis=1)
+    numeriques = comptes[:, CODES_NUMERIQUES]  # colonnes triées par valeur
+    nombre_numeriques = numeriques.sum(axis=1)
+    sans_numerique = nombre_numeriques == 0
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        moyenne = (numeriques @ VALEURS_NUMERIQUES) / nombre_numeriques
+
+    # Médiane : valeurs aux rangs (n - 1) // 2 et n // 2 grâce aux comptes cumulés
+    cumul = np.cumsum(numeriques, axis=1)
+    bas = np.argmax(cumul > ((nombre_numeriques - 1) // 2)[:, None], axis=1)
+    haut = np.argmax(cumul > (nombre_numeriques // 2)[:, None], axis=1)
+    mediane = (VALEURS_NUMERIQUES[bas] + VALEURS_NUMERIQUES[haut]) / 2
+
+    # Écart : plus grande moins plus petite carte numérique votée
+    presentes = numeriques > 0
+    minimum = VALEURS_NUMERIQUES[np.argmax(presentes, axis=1)]
+    maximum = VALEURS_NUMERIQUES[len(VALEURS_NUMERIQUES) - 1 - np.argmax(presentes[:, ::-1], axis=1)]
+    ecart = maximum - minimum
+
+    mediane[sans_numerique] = np.nan
+    ecart[sans_numerique] = np.nan
+
+    mode = TABLE_CARTES[np.argmax(comptes, axis=1)]
+    mode[nombre == 0] = None
+
+    return {
+        "nombre": nombre,
+        "numeriques": nombre_numeriques,
+        "cafe": comptes[:, CODE_CAFE],
+        "interrogation": comptes[:, CODE_INTERROGATION],
+        "moyenne": moyenne,
+        "mediane": mediane,
+        "ecart": ecart,
+        "mode": mode,
+        "carte_moyenne": cartes_les_plus_proches(moyenne),
+        "unanime": (comptes > 0).sum(axis=1) == 1,
+    }
+
+
+def depouiller(votes):
+    """
+    @brief Dépouille un seul tour de vote.
+
+    @param votes Liste de votes ou dictionnaire {carte: nombre}.
+
+    @return dict: Mêmes clés que `depouiller_lot`, en valeurs Python (None à la place de NaN).
+    """
+    resultat = {}
+    for cle, valeurs in depouiller_lot([votes]).items():
+        valeur = valeurs[0]
+        if isinstance(valeur, np.generic):
+            valeur = valeur.item()
+        if isinstance(valeur, float) and np.isnan(valeur):
+            valeur = None
+        resultat[cle] = valeur
+    return resultat
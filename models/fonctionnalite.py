@@ -1,5 +1,6 @@
 # Fonctionnalite.py
 import statistics
+import sys
 from constantes import *
 
 # models/fonctionnalite.py
@@ -22,7 +23,14 @@ class Fonctionnalite:
     @param statut Statut de la fonctionnalité (valeur par défaut : STATUT_A_FAIRE, en cours, terminé, etc.).
     @param mode_de_vote Mode de vote pour valider la fonctionnalité (valeur par défaut : VOTE_UNANIMITE, moyenne).
     @param participants Liste des participants associés à la fonctionnalité.
+
+    Les attributs sont déclarés dans `__slots__` (pas de `__dict__` par instance).
+    Le statut, le mode de vote et les pseudos des participants sont internés : une
+    seule chaîne est partagée par toutes les fonctionnalités ; `participants` est un
+    tuple. Les modifications passent par `modifier` pour garder ces conversions.
     """
+    __slots__ = ("id", "nom", "description", "priorite", "difficulte", "statut", "mode_de_vote", "participants")
+
     def __init__(
         self, 
         id, 
@@ -32,7 +40,7 @@ class Fonctionnalite:
         difficulte=None, 
         statut=STATUT_A_FAIRE, 
         mode_de_vote=VOTE_UNANIMITE, 
-        participants=[]):
+        participants=()):
         """
         @brief Initialise une nouvelle instance de la classe Fonctionnalite.
         Les paramètres passés à cette méthode sont utilisés pour initialiser les attributs 
@@ -43,10 +51,26 @@ class Fonctionnalite:
         self.description = description  # Description détaillée
         self.priorite = priorite
         self.difficulte = difficulte # Difficulté (faible, moyenne, élevée)
-        self.statut = statut  # En attente, termine, en cours, ...
-        self.mode_de_vote = mode_de_vote # unanimite, moyenne, médiane...
-        self.participants = participants or [] # liste des developpeurs
-        
+        self.statut = sys.intern(statut) if type(statut) is str else statut  # En attente, termine, en cours, ...
+        self.mode_de_vote = sys.intern(mode_de_vote) if type(mode_de_vote) is str else mode_de_vote # unanimite, moyenne, médiane...
+        self.participants = tuple(map(sys.intern, participants)) if participants else () # developpeurs
+
+    def modifier(self, **champs):
+        """
+        @brief Modifie des attributs de la fonctionnalité, avec les mêmes conversions qu'à la création.
+
+        @param champs Nouvelles valeurs, par nom d'attribut.
+
+        @throws AttributeError Si un nom n'est pas un attribut de Fonctionnalite.
+        """
+        if "participants" in champs:
+            champs["participants"] = tuple(map(sys.intern, champs["participants"] or ()))
+        for nom in ("statut", "mode_de_vote"):
+            if type(champs.get(nom)) is str:
+                champs[nom] = sys.intern(champs[nom])
+        for nom, valeur in champs.items():
+            setattr(self, nom, valeur)
+
     # méthode pour convertir en dictionnaire
     def to_dict(self):
         """
@@ -62,8 +86,7 @@ class Fonctionnalite:
             "difficulte": self.difficulte,
             "statut": self.statut,
             "mode_de_vote": self.mode_de_vote,
-            "participants" : self.participants or [],
-  
+            "participants": list(self.participants),
         }
         
     def __str__(self):
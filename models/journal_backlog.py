@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+from constantes import *
+from models.fonctionnalite import Fonctionnalite
+
+journaliseur = logging.getLogger(__name__)
+
+# Journal des modifications du backlog
+class JournalBacklog:
+    """
+    @brief Journal en ajout seul des modifications du backlog.
+
+    @details
+    Chaque ajout, modification ou suppression de fonctionnalité est écrit sur une
+    ligne JSON à la suite du fichier journal. Le backlog complet (instantané) n'est
+    réécrit que lors de la compaction, après quoi le journal est supprimé.
+    Les opérations sont idempotentes : rejouer le journal sur un instantané qui
+    les contient déjà donne le même résultat.
+    """
+
+    def __init__(self, chemin):
+        """
+        @brief Ouvre le journal associé à un fichier backlog.
+
+        @param chemin Chemin du fichier journal.
+        """
+        self.chemin = chemin
+        self.taille = sum(1 for _ in self.lire())  # nombre d'opérations en attente de compaction
+
+    def ajouter(self, operation):
+        """
+        @brief Ajoute une opération à la fin du journal et la force sur le disque.
+
+        @param operation Dictionnaire décrivant l'opération (clé "op" : ajout, modification ou suppression).
+        """
+        ligne = json.dumps(operation, ensure_ascii=False)
+        with open(self.chemin, "a", encoding="utf-8") as fichier:
+            fichier.write(ligne + "\n")
+            fichier.flush()
+            os.fsync(fichier.fileno())
+        self.taille += 1
+
+    def lire(self):
+        """
+        @brief Parcourt les opérations enregistrées dans le journal.
+
+        @details Une ligne incomplète (arrêt brutal pendant l'écriture) est ignorée.
+
+        @return Générateur de dictionnaires d'opérations.
+        """
+        if not os.path.exists(self.chemin):
+            return
+        with open(self.chemin, "r", encoding="utf-8") as fichier:
+            for ligne in fichier:
+                try:
+                    yield json.loads(ligne)
+                except json.JSONDecodeError:
+                    journaliseur.warning("Ligne de journal ignorée : %r", ligne)
+
+    def rejouer(self, backlog):
+        """
+        @brief Applique les opérations du journal à un backlog chargé depuis l'instantané.
+
+        @param backlog Liste des fonctionnalités de l'instantané.
+
+        @return Liste des fonctionnalités après application du journal.
+        """
+        par_id = {f.id: f for f in backlog}
+        for operation in self.lire():
+            op = operation.get("op")
+            if op == "ajout":
+                fonctionnalite = Fonctionnalite(**operation["fonctionnalite"])
+                par_id[fonctionnalite.id] = fonctionnalite
+            elif op == "modification":
+                fonctionnalite = par_id.get(operation["id"])
+                if fonctionnalite:
+                    fonctionnalite.modifier(**operation["champs"])
+            elif op == "suppression":
+                par_id.pop(operation["id"], None)
+            else:
+                journaliseur.warning("Opération de journal inconnue : %s", operation)
+        return list(par_id.values())
+
+    def appliquer(self, backlog):
+        """
+        @brief Applique les opérations du journal directement à un backlog indexé.
+
+        @details Utilisé quand l'instantané n'est pas chargé en liste (backlog binaire) :
+        seules les fonctionnalités concernées par le journal sont lues.
+
+        @param backlog Backlog indexé (`ajouter`, `obtenir`, `mettre_a_jour`, `supprimer`).
+        """
+        for operation in self.lire():
+            op = operation.get("op")
+            if op == "ajout":
+                backlog.ajouter(Fonctionnalite(**operation["fonctionnalite"]))
+            elif op == "modification":
+                fonctionnalite = backlog.obtenir(operation["id"])
+                if fonctionnalite:
+                    fonctionnalite.modifier(**operation["champs"])
+                    backlog.mettre_a_jour(fonctionnalite)
+            elif op == "suppression":
+                backlog.supprimer(operation["id"])
+            else:
+                journaliseur.warning("Opération de journal inconnue : %s", operation)
+
+    def vider(self):
+        """
+        @brief Supprime le journal après la compaction dans un nouvel instantané.
+        """
+        if os.path.exists(self.chemin):
+            os.remove(self.chemin)
+        self.taille = 0
@@ -0,0 +1,57 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+from constantes import *
+
+# Écouteur de la file des messages, démarré par configurer_journalisation
+ecouteur = None
+
+
+def configurer_journalisation(niveau=NIVEAU_JOURNAL, sortie=None):
+    """
+    @brief Configure la journalisation de l'application (idempotent).
+
+    @details
+    Les messages sont déposés dans une file par un `QueueHandler` ; un thread
+    (`QueueListener`) les écrit sur la sortie. Écrire un message ne bloque donc
+    jamais une requête sur les entrées-sorties. Les modules journalisent avec
+    `logging.getLogger(__name__)` et des messages formatés paresseusement
+    (`journaliseur.debug("état : %s", etat)`) : un message d'un niveau désactivé ne
+    coûte pas son formatage. Un nouvel appel ne change que le niveau.
+
+    @param niveau Niveau minimal des messages (nom ou valeur `logging`).
+    @param sortie Flux d'écriture des messages (par défaut : sortie standard).
+
+    @return logging.handlers.QueueListener: L'écouteur de la file.
+    """
+    global ecouteur
+    racine = logging.getLogger()
+    racine.setLevel(niveau)
+    if ecouteur is not None:
+        return ecouteur
+
+    ecriture = logging.StreamHandler(sortie or sys.stdout)
+    ecriture.setFormatter(logging.Formatter(FORMAT_JOURNAL))
+    file = queue.SimpleQueue()  # non bornée : le dépôt d'un message ne bloque pas
+    racine.addHandler(logging.handlers.QueueHandler(file))
+    ecouteur = logging.handlers.QueueListener(file, ecriture, respect_handler_level=True)
+    ecouteur.start()
+    atexit.register(arreter_journalisation)
+    return ecouteur
+
+
+def arreter_journalisation():
+    """
+    @brief Écrit les messages encore dans la file puis arrête l'écouteur.
+    """
+    global ecouteur
+    if ecouteur is None:
+        return
+    ecouteur.stop()
+    racine = logging.getLogger()
+    for gestionnaire in list(racine.handlers):
+        if isinstance(gestionnaire, logging.handlers.QueueHandler) and gestionnaire.queue is ecouteur.queue:
+            racine.removeHandler(gestionnaire)
+    ecouteur = None
@@ -0,0 +1,114 @@
+import threading
+from collections import defaultdict
+from constantes import *
+
+
+def formater_etiquettes(etiquettes):
+    """
+    @brief Formate des étiquettes Prometheus : `{cle="valeur",...}`.
+
+    @param etiquettes Liste de couples (clé, valeur).
+
+    @return str: Étiquettes entre accolades, ou chaîne vide s'il n'y en a pas.
+    """
+    if not etiquettes:
+        return ""
+    morceaux = []
+    for cle, valeur in etiquettes:
+        valeur = str(valeur).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        morceaux.append(f'{cle}="{valeur}"')
+    return "{" + ",".join(morceaux) + "}"
+
+
+def formater_nombre(valeur):
+    """
+    @brief Formate une valeur numérique au format texte de Prometheus.
+    """
+    if valeur == float("inf"):
+        return "+Inf"
+    if isinstance(valeur, float) and valeur.is_integer():
+        return str(int(valeur))
+    return repr(valeur) if isinstance(valeur, float) else str(valeur)
+
+
+# Métriques des requêtes HTTP, exposées au format texte de Prometheus
+class Metriques:
+    """
+    @brief Compteurs et histogrammes de latence des requêtes, par route.
+
+    @details
+    Chaque requête terminée est comptée par route, méthode et code de statut, et sa
+    durée est ajoutée à l'histogramme de sa route (seuils cumulatifs `SEUILS_LATENCE`).
+    Les jauges (salles, participants, backlog...) sont fournies au moment de l'export,
+    pour refléter l'état courant sans instrumenter chaque modification.
+    """
+
+    def __init__(self, seuils=SEUILS_LATENCE):
+        """
+        @brief Initialise des métriques vides.
+
+        @param seuils Bornes supérieures (secondes) des intervalles de l'histogramme, croissantes.
+        """
+        self.seuils = tuple(sorted(seuils))
+        self.verrou = threading.Lock()
+        self.requetes = defaultdict(int)  # {(route, méthode, statut): nombre}
+        self.latences = {}  # {(route, méthode): [comptes par seuil..., somme, nombre]}
+
+    def observer_requete(self, route, methode, statut, duree):
+        """
+        @brief Enregistre une requête terminée.
+
+        @param route Nom de la route Flask (endpoint).
+        @param methode Méthode HTTP.
+        @param statut Code de statut de la réponse.
+        @param duree Durée de traitement en secondes.
+        """
+        with self.verrou:
+            self.requetes[(route, methode, statut)] += 1
+            histogramme = self.latences.get((route, methode))
+            if histogramme is None:
+                histogramme = self.latences[(route, methode)] = [0] * len(self.seuils) + [0.0, 0]
+            for i, seuil in enumerate(self.seuils):
+                if duree <= seuil:
+                    histogramme[i] += 1
+            histogramme[-2] += duree
+            histogramme[-1] += 1
+
+    def exporter(self, jauges=()):
+        """
+        @brief Exporte les métriques au format texte de Prometheus.
+
+        @param jauges Métriques calculées à l'export : tuples (nom, type, aide, échantillons), chaque
+        échantillon étant un tuple (suffixe du nom, [(clé, valeur), ...], valeur).
+
+        @return str: Texte de l'exposition.
+        """
+        with self.verrou:
+            requetes = sorted(self.requetes.items())
+            latences = sorted((cle, list(valeurs)) for cle, valeurs in self.latences.items())
+
+        lignes = [
+            f"# HELP {PREFIXE_METRIQUES}_requetes_total Requêtes HTTP traitées, par route, méthode et statut.",
+            f"# TYPE {PREFIXE_METRIQUES}_requetes_total counter",
+        ]
+        for (route, methode, statut), nombre in requetes:
+            etiquettes = formater_etiquettes([("route", route), ("methode", methode), ("statut", statut)])
+            lignes.append(f"{PREFIXE_METRIQUES}_requetes_total{etiquettes} {nombre}")
+
+        nom = f"{PREFIXE_METRIQUES}_duree_requete_secondes"
+        lignes.append(f"# HELP {nom} Durée de traitement des requêtes HTTP, par route et méthode.")
+        lignes.append(f"# TYPE {nom} histogram")
+        for (route, methode), valeurs in latences:
+            base = [("route", route), ("methode", methode)]
+            for seuil, compte in zip(self.seuils, valeurs):
+                lignes.append(f"{nom}_bucket{formater_etiquettes(base + [('le', formater_nombre(float(seuil)))])} {compte}")
+            lignes.append(f"{nom}_bucket{formater_etiquettes(base + [('le', '+Inf')])} {valeurs[-1]}")
+            lignes.append(f"{nom}_sum{formater_etiquettes(base)} {formater_nombre(valeurs[-2])}")
+            lignes.append(f"{nom}_count{formater_etiquettes(base)} {valeurs[-1]}")
+
+        for nom, type_metrique, aide, echantillons in jauges:
+            lignes.append(f"# HELP {PREFIXE_METRIQUES}_{nom} {aide}")
+            lignes.append(f"# TYPE {PREFIXE_METRIQUES}_{nom} {type_metrique}")
+            for suffixe, etiquettes, valeur in echantillons:
+                lignes.append(f"{PREFIXE_METRIQUES}_{nom}{suffixe}{formater_etiquettes(etiquettes)} {formater_nombre(valeur)}")
+        return "\n".join(lignes) + "\n"
@@ -0,0 +1,211 @@
+from collections import Counter
+from constantes import *
+
+# Participants connectés à une salle, indexés
+class RegistreParticipants:
+    """
+    @brief Liste des participants connectés avec index par pseudo, par ID de session et par fonction.
+
+    @details
+    Les participants restent des dictionnaires (pseudo, fonction, avatar, vote,
+    session_id) et se parcourent dans l'ordre de connexion, comme l'ancienne liste :
+    les templates n'ont pas à changer. Les recherches par pseudo, par session ou
+    par rôle se font en O(1) grâce aux index tenus à jour à l'ajout et à la déconnexion.
+
+    Les votes passent par `enregistrer_vote`, qui tient à jour des compteurs
+    (votes des votants, cartes café et "?", nombre de votes par carte) : savoir si
+    tout le monde a voté ne demande plus de parcourir les participants.
+    """
+
+    def __init__(self, participants=()):
+        """
+        @brief Construit le registre à partir d'une liste de participants.
+
+        @param participants Itérable de dictionnaires participant.
+        """
+        self.par_pseudo_index = {}  # {pseudo: participant}, ordre de connexion
+        self.par_session_index = {}  # {session_id: participant}
+        self.par_fonction_index = {}  # {fonction: {pseudo: participant}}
+
+        # Compteurs de votes du tour en cours
+        self.ont_vote = {}  # {pseudo: participant} ayant voté, dans l'ordre des votes
+        self.votes_votants = 0  # votes des participants de fonction "Votant"
+        self.votes_cafe = 0  # cartes café, tous rôles confondus
+        self.votes_interrogation = 0  # cartes "?"
+        self.cartes_votants = Counter()  # {carte: nombre de votants l'ayant choisie}
+        for participant in participants:
+            self.ajouter(participant)
+
+    def ajouter(self, participant):
+        """
+        @brief Ajoute un participant et l'indexe.
+
+        @param participant Dictionnaire participant (clés pseudo, fonction, session_id...).
+
+        @throws ValueError Si le pseudo est déjà connecté.
+        """
+        if participant["pseudo"] in self.par_pseudo_index:
+            raise ValueError(f"Le participant avec le pseudo '{participant['pseudo']}' existe déjà.")
+        self.par_pseudo_index[participant["pseudo"]] = participant
+        self.par_session_index[participant["session_id"]] = participant
+        self.par_fonction_index.setdefault(participant["fonction"], {})[participant["pseudo"]] = participant
+        if participant.get("vote") is not None:
+            self.compter_vote(participant, 1)
+
+    def retirer(self, participant):
+        """
+        @brief Retire un participant de tous les index.
+
+        @param participant Dictionnaire participant présent dans le registre.
+        """
+        if self.par_pseudo_index.pop(participant["pseudo"], None) is not None and participant["vote"] is not None:
+            self.compter_vote(participant, -1)
+        if self.par_session_index.get(participant["session_id"]) is participant:
+            del self.par_session_index[participant["session_id"]]
+        self.par_fonction_index.get(participant["fonction"], {}).pop(participant["pseudo"], None)
+
+    def retirer_session(self, session_id):
+        """
+        @brief Retire le participant associé à un ID de session.
+
+        @param session_id ID de session du participant.
+
+        @return Le participant retiré, ou None s'il n'existait pas.
+        """
+        participant = self.par_session_index.get(session_id)
+        if participant is not None:
+            self.retirer(participant)
+        return participant
+
+    def vider(self):
+        """
+        @brief Retire tous les participants.
+        """
+        self.par_pseudo_index.clear()
+        self.par_session_index.clear()
+        self.par_fonction_index.clear()
+        self.vider_compteurs()
+
+    def compter_vote(self, participant, sens):
+        """
+        @brief Ajoute (sens = 1) ou retire (sens = -1) le vote d'un participant des compteurs.
+
+        @param participant Dictionnaire participant dont le vote est renseigné.
+        @param sens 1 pour compter le vote, -1 pour l'annuler.
+        """
+        vote = participant["vote"]
+        if sens > 0:
+            self.ont_vote[participant["pseudo"]] = participant
+        else:
+            self.ont_vote.pop(participant["pseudo"], None)
+        if vote == "cafe":
+            self.votes_cafe += sens
+        elif vote == "?":
+            self.votes_interrogation += sens
+        if participant["fonction"] == "Votant":
+            self.votes_votants += sens
+            self.cartes_votants[vote] += sens
+            if self.cartes_votants[vote] <= 0:
+                del self.cartes_votants[vote]
+
+    def enregistrer_vote(self, participant, vote):
+        """
+        @brief Enregistre le vote d'un participant et met à jour les compteurs en O(1).
+
+        @param participant Dictionnaire participant présent dans le registre.
+        @param vote Carte choisie.
+
+        @throws ValueError Si le participant a déjà voté.
+        """
+        if participant["vote"] is not None:
+            raise ValueError(f"{participant['pseudo']} a déjà voté.")
+        participant["vote"] = vote
+        self.compter_vote(participant, 1)
+
+    def reinitialiser_votes(self):
+        """
+        @brief Efface les votes du tour en cours (seuls les participants ayant voté sont parcourus).
+        """
+        for participant in self.ont_vote.values():
+            participant["vote"] = None
+        self.vider_compteurs()
+
+    def vider_compteurs(self):
+        """
+        @brief Remet les compteurs de votes à zéro.
+        """
+        self.ont_vote = {}
+        self.votes_votants = 0
+        self.votes_cafe = 0
+        self.votes_interrogation = 0
+        self.cartes_votants = Counter()
+
+    def tous_les_votants_ont_vote(self):
+        """
+        @brief Indique si chaque participant de fonction "Votant" a voté.
+
+        @return bool: True si tous les votants ont voté.
+        """
+        return self.votes_votants == self.compter_fonction("Votant")
+
+    def tous_cafe(self):
+        """
+        @brief Indique si tous les participants connectés ont choisi la carte café.
+
+        @return bool: True si au moins un participant est connecté et que tous ont voté café.
+        """
+        return len(self) > 0 and self.votes_cafe == len(self)
+
+    def par_pseudo(self, pseudo):
+        """
+        @brief Retourne un participant à partir de son pseudo.
+
+        @return dict: Le participant, ou None s'il n'est pas connecté.
+        """
+        return self.par_pseudo_index.get(pseudo)
+
+    def par_session(self, session_id):
+        """
+        @brief Retourne un participant à partir de son ID de session.
+
+        @return dict: Le participant, ou None si la session est inconnue.
+        """
+        return self.par_session_index.get(session_id)
+
+    def avec_fonction(self, fonction):
+        """
+        @brief Retourne les participants ayant une fonction donnée, dans l'ordre de connexion.
+
+        @param fonction "Votant", "Product Owner" ou "Scrum Master".
+
+        @return list: Participants de cette fonction.
+        """
+        return list(self.par_fonction_index.get(fonction, {}).values())
+
+    def compter_fonction(self, fonction):
+        """
+        @brief Retourne le nombre de participants ayant une fonction donnée.
+
+        @return int: Nombre de participants.
+        """
+        return len(self.par_fonction_index.get(fonction, {}))
+
+    def pseudos(self):
+        """
+        @brief Retourne les pseudos connectés, dans l'ordre de connexion.
+
+        @return list: Liste des pseudos.
+        """
+        return list(self.par_pseudo_index)
+
+    def __iter__(self):
+        return iter(list(self.par_pseudo_index.values()))
+
+    def __len__(self):
+        return len(self.par_pseudo_index)
+
+    def __contains__(self, pseudo):
+        return pseudo in self.par_pseudo_index
+
+    def __repr__(self):
+        return f"<RegistreParticipants {self.pseudos()}>"
@@ -0,0 +1,167 @@
+import cProfile
+import itertools
+import os
+import pstats
+import re
+import threading
+import time
+from constantes import *
+
+
+# Profilage cProfile de routes choisies, activable pendant l'exécution
+class Profileur:
+    """
+    @brief Profile avec cProfile les requêtes de routes choisies et enregistre un fichier `.pstats` par requête.
+
+    @details
+    Le profilage est configuré au démarrage par variables d'environnement
+    (voir `depuis_environnement`) ou pendant l'exécution par `configurer`. Seules les
+    routes sélectionnées sont profilées (toutes si la sélection est vide), et une
+    requête sur `echantillon` seulement, pour limiter le surcoût sous charge. Les
+    fichiers sont nommés `<route>-<date>-<pid>-<numéro>.pstats`.
+    """
+
+    def __init__(self, dossier, actif=False, routes=(), echantillon=1):
+        """
+        @brief Initialise le profileur.
+
+        @param dossier Dossier des fichiers `.pstats`.
+        @param actif True pour profiler dès maintenant.
+        @param routes Noms des routes (endpoints Flask) à profiler ; vide pour toutes.
+        @param echantillon Profiler une requête sur `echantillon`.
+        """
+        self.dossier = dossier
+        self.verrou = threading.Lock()
+        self.compteur = 0
+        self.numeros = itertools.count(1)
+        self.configurer(actif, routes, echantillon)
+
+    @classmethod
+    def depuis_environnement(cls, dossier, environnement=os.environ):
+        """
+        @brief Crée un profileur configuré par les variables d'environnement.
+
+        @details `PLANNING_POKER_PROFILAGE` liste les routes à profiler, séparées par
+        des virgules (`*` pour toutes) ; absente, le profilage est désactivé.
+        `PLANNING_POKER_PROFILAGE_ECHANTILLON` vaut N pour profiler une requête sur N.
+
+        @param dossier Dossier des fichiers `.pstats`.
+        @param environnement Variables d'environnement.
+
+        @return Profileur
+        """
+        routes = environnement.get(VARIABLE_PROFILAGE_ROUTES, "").strip()
+        echantillon = int(environnement.get(VARIABLE_PROFILAGE_ECHANTILLON) or 1)
+        return cls(dossier, bool(routes), [] if routes == "*" else routes.split(","), echantillon)
+
+    def configurer(self, actif, routes=(), echantillon=1):
+        """
+        @brief Change la configuration du profilage.
+
+        @param actif True pour activer le profilage, False pour l'arrêter.
+        @param routes Noms des routes à profiler ; vide pour toutes.
+        @param echantillon Profiler une requête sur `echantillon` (au moins 1).
+
+        @throws ValueError Si l'échantillon est inférieur à 1.
+        """
+        if int(echantillon) < 1:
+            raise ValueError("L'échantillon de profilage doit être au moins 1.")
+        with self.verrou:
+            self.actif = bool(actif)
+            self.routes = frozenset(r.strip() for r in routes if r.strip())
+            self.echantillon = int(echantillon)
+            self.compteur = 0
+
+    def configuration(self):
+        """
+        @brief Retourne la configuration courante.
+
+        @return dict: actif, routes (liste, vide pour toutes) et échantillon.
+        """
+        return {"actif": self.actif, "routes": sorted(self.routes), "echantillon": self.echantillon}
+
+    def doit_profiler(self, route):
+        """
+        @brief Indique si la requête en cours sur cette route doit être profilée.
+
+        @param route Nom de la route (endpoint Flask).
+
+        @return bool: True pour profiler la requête.
+        """
+        if not self.actif or (self.routes and route not in self.routes):
+            return False
+        with self.verrou:
+            self.compteur += 1
+            return self.compteur % self.echantillon == 0
+
+    @staticmethod
+    def demarrer():
+        """
+        @brief Démarre un profil cProfile dans le thread courant.
+
+        @return cProfile.Profile, ou None si un autre profileur est déjà actif.
+        """
+        profil = cProfile.Profile()
+        try:
+            profil.enable()
+        except ValueError:
+            return None
+        return profil
+
+    def terminer(self, profil, route):
+        """
+        @brief Arrête un profil et l'enregistre dans le dossier des profils.
+
+        @param profil Profil renvoyé par `demarrer`.
+        @param route Nom de la route profilée.
+
+        @return str: Chemin du fichier `.pstats`.
+        """
+        profil.disable()
+        os.makedirs(self.dossier, exist_ok=True)
+        nom = f"{route}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(self.numeros)}.pstats"
+        chemin = os.path.join(self.dossier, nom)
+        profil.dump_stats(chemin)
+        return chemin
+
+    def lister(self, route=None):
+        """
+        @brief Liste les fichiers de profils, du plus ancien au plus récent.
+
+        @param route Ne lister que les profils de cette route, si fournie.
+
+        @return list: Noms des fichiers `.pstats`.
+        """
+        if not os.path.isdir(self.dossier):
+            return []
+        fichiers = [f for f in os.listdir(self.dossier) if f.endswith(".pstats")]
+        if route:
+            fichiers = [f for f in fichiers if re.fullmatch(rf"{re.escape(route)}-\d{{8}}-\d{{6}}-\d+-\d+\.pstats", f)]
+        return sorted(fichiers, key=lambda f: os.path.getmtime(os.path.join(self.dossier, f)))
+
+    def meilleures_fonctions(self, route=None, limite=LIMITE_FONCTIONS_PROFIL, profils=PROFILS_AGREGES):
+        """
+        @brief Classe les fonctions par temps cumulé sur les profils les plus récents.
+
+        @param route Ne considérer que les profils de cette route, si fournie.
+        @param limite Nombre de fonctions retournées.
+        @param profils Nombre de profils récents agrégés.
+
+        @return list: Dictionnaires (fonction, appels, temps_propre, temps_cumule), par temps cumulé décroissant.
+        """
+        fichiers = self.lister(route)[-profils:]
+        if not fichiers:
+            return []
+        statistiques = pstats.Stats(*(os.path.join(self.dossier, f) for f in fichiers))
+        statistiques.sort_stats(pstats.SortKey.CUMULATIVE)
+        fonctions = []
+        for fonction in statistiques.fcn_list[:limite]:
+            _, appels, temps_propre, temps_cumule, _ = statistiques.stats[fonction]
+            fichier, ligne, nom = fonction
+            fonctions.append({
+                "fonction": f"{fichier}:{ligne}({nom})",
+                "appels": appels,
+                "temps_propre": round(temps_propre, 6),
+                "temps_cumule": round(temps_cumule, 6),
+            })
+        return fonctions
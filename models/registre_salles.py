@@ -0,0 +1,191 @@
+import os
+import re
+import shutil
+import threading
+from constantes import *
+from models.app_manager import AppManager
+from models.stockage_etat import StockageEtat
+
+# Registre des salles de planning poker
+class RegistreSalles:
+    """
+    @brief Registre des salles de vote indépendantes hébergées par un même serveur.
+
+    @details
+    Chaque salle possède son propre AppManager (participants, indicateurs,
+    fonctionnalité en cours et backlog). Les salles sont créées à la première
+    connexion et retrouvées en O(1) par leur identifiant.
+
+    Avec un fichier d'état partagé, l'état des salles est commun à tous les processus
+    qui utilisent ce fichier : une salle ouverte par un processus est retrouvée par les autres.
+    """
+
+    def __init__(self, backlog_file, dossier_salles=None, fichier_etat=None, moteur_stockage=MOTEUR_STOCKAGE):
+        """
+        @brief Initialise le registre des salles.
+
+        @param backlog_file Fichier backlog de la salle par défaut, copié pour initialiser les nouvelles salles.
+        @param dossier_salles Dossier contenant les fichiers des salles (par défaut : `salles` à côté du backlog).
+        @param fichier_etat Base SQLite de l'état partagé entre processus, ou None pour un état en mémoire.
+        @param moteur_stockage Moteur de stockage du backlog des salles (voir `AppManager`).
+
+        @throws ValueError Si l'état est partagé sans le moteur de stockage "sqlite" : chaque
+        processus réécrirait sinon son propre instantané du backlog.
+        """
+        if fichier_etat and moteur_stockage != "sqlite":
+            raise ValueError(f"L'état partagé ({fichier_etat}) exige le moteur de stockage \"sqlite\", pas \"{moteur_stockage}\".")
+        self.backlog_file = backlog_file
+        self.moteur_stockage = moteur_stockage
+        self.dossier_salles = dossier_salles or os.path.join(os.path.dirname(backlog_file), DOSSIER_SALLES)
+        self.salles = {}  # {id_salle: AppManager}
+        self.stockage_etat = StockageEtat(fichier_etat) if fichier_etat else None
+        self.verrou = threading.Lock()  # création et fermeture des salles
+
+    @staticmethod
+    def valider_id_salle(id_salle):
+        """
+        @brief Vérifie et normalise un identifiant de salle.
+
+        @param id_salle Identifiant saisi (URL, formulaire ou session).
+
+        @return L'identifiant normalisé en minuscules.
+
+        @throws ValueError Si l'identifiant est vide ou contient des caractères interdits.
+        """
+        id_salle = (id_salle or "").strip().lower()
+        if not re.fullmatch(MOTIF_ID_SALLE, id_salle):
+            raise ValueError(f"L'identifiant de salle '{id_salle}' n'est pas valide.")
+        return id_salle
+
+    def fichiers_salle(self, id_salle):
+        """
+        @brief Retourne les chemins du backlog et du backlog de pause d'une salle.
+
+        @details La salle par défaut conserve les fichiers historiques de l'application.
+
+        @param id_salle Identifiant de la salle.
+
+        @return Tuple (fichier backlog, fichier pause café).
+        """
+        if id_salle == SALLE_PAR_DEFAUT:
+            return self.backlog_file, "backlog_pause.json"
+        dossier = os.path.join(self.dossier_salles, id_salle)
+        return os.path.join(dossier, "backlog.json"), os.path.join(dossier, "backlog_pause.json")
+
+    def obtenir_salle(self, id_salle=SALLE_PAR_DEFAUT):
+        """
+        @brief Retourne l'AppManager d'une salle, en la créant si nécessaire.
+
+        @details
+        À la création, le backlog de la salle est initialisé par copie du backlog
+        par défaut s'il n'existe pas encore sur le disque.
+
+        @param id_salle Identifiant de la salle.
+
+        @return L'objet AppManager de la salle.
+        """
+        id_salle = self.valider_id_salle(id_salle)
+        salle = self.salles.get(id_salle)
+        if salle is not None:
+            return salle
+
+        # Une seule requête crée la salle : les autres attendent et la retrouvent
+        with self.verrou:
+            salle = self.salles.get(id_salle)
+            if salle is not None:
+                return salle
+
+            backlog_salle, pause_salle = self.fichiers_salle(id_salle)
+            if not os.path.exists(backlog_salle):
+                os.makedirs(os.path.dirname(backlog_salle), exist_ok=True)
+                shutil.copyfile(self.backlog_file, backlog_salle)
+
+            salle = AppManager(
+                backlog_file=backlog_salle, pause_file=pause_salle, id_salle=id_salle,
+                moteur_stockage=self.moteur_stockage, stockage_etat=self.stockage_etat,
+            )
+            self.salles[id_salle] = salle
+            return salle
+
+    def existe(self, id_salle):
+        """
+        @brief Indique si une salle est actuellement ouverte.
+
+        @param id_salle Identifiant de la salle.
+
+        @return bool: True si la salle est présente dans le registre.
+        """
+        return id_salle in self.salles
+
+    def salle_ouverte(self, id_salle):
+        """
+        @brief Retourne l'AppManager d'une salle ouverte, sans en créer de nouvelle.
+
+        @details Avec un état partagé, une salle ouverte par un autre processus est chargée ici.
+
+        @param id_salle Identifiant de la salle (déjà validé).
+
+        @return L'objet AppManager, ou None si la salle n'est ouverte nulle part.
+        """
+        salle = self.salles.get(id_salle)
+        if salle is None and self.stockage_etat is not None and self.stockage_etat.existe(id_salle):
+            salle = self.obtenir_salle(id_salle)
+        return salle
+
+    def fermer_salle(self, id_salle):
+        """
+        @brief Retire une salle du registre pour libérer sa mémoire.
+
+        @details Les modifications en attente sont sauvegardées. La salle par défaut
+        n'est jamais retirée ; son backlog reste sur le disque et son stockage reste
+        ouvert (seuls ses flux SSE sont terminés).
+
+        @param id_salle Identifiant de la salle à fermer.
+        """
+        with self.verrou:
+            if id_salle == SALLE_PAR_DEFAUT:
+                salle = self.salles.get(id_salle)
+                if salle is not None:
+                    salle.interrompre()
+                return
+            salle = self.salles.pop(id_salle, None)
+            if salle is not None:
+                salle.fermer()
+            if self.stockage_etat is not None:
+                self.stockage_etat.supprimer(id_salle)
+
+    def liberer_salle(self, id_salle):
+        """
+        @brief Retire de ce processus une salle confiée à un autre processus (rééquilibrage du routeur).
+
+        @details Les modifications du backlog en attente sont écrites avant que l'autre
+        processus n'ouvre la salle, et ses flux SSE sont terminés. Contrairement à
+        `fermer_salle`, l'état partagé de la salle est conservé et la salle par défaut
+        est retirée elle aussi.
+
+        @param id_salle Identifiant de la salle (déjà validé).
+
+        @return bool: True si la salle était ouverte dans ce processus.
+        """
+        with self.verrou:
+            salle = self.salles.pop(id_salle, None)
+            if salle is not None:
+                salle.fermer()
+        return salle is not None
+
+    def fermer_tout(self):
+        """
+        @brief Sauvegarde les modifications en attente de toutes les salles (arrêt du serveur).
+        """
+        for salle in list(self.salles.values()):
+            salle.fermer()
+        if self.stockage_etat is not None:
+            self.stockage_etat.fermer()
+
+    def lister_salles(self):
+        """
+        @brief Retourne les identifiants des salles ouvertes.
+
+        @return list: Liste des identifiants de salles.
+        """
+        return list(self.salles)
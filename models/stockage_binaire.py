@@ -0,0 +1,464 @@
+import heapq
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from itertools import islice
+import numpy as np
+from constantes import *
+from models.backlog import Backlog
+from models.backlog_colonnes import BacklogColonnes, TableChaines
+from models.chargement_backlog import RapportChargement, lire_backlog
+from models.fonctionnalite import Fonctionnalite
+
+journaliseur = logging.getLogger(__name__)
+
+# En-tête : signature, version du format, puis nombre de fonctionnalités, dernier id,
+# capacité de l'index et positions (en octets) des sections du fichier
+EN_TETE = struct.Struct("<8sI4xqqqqqqqqq")
+SIGNATURE = b"PPBACKLG"
+VERSION_FORMAT = 1
+
+# Enregistrement de taille fixe des champs numériques (32 octets)
+ENREGISTREMENT = np.dtype([
+    ("id", "<i8"), ("priorite", "<i8"), ("difficulte", "<i8"), ("statut", "<u2"), ("mode_de_vote", "<u2"), ("bourrage", "V4"),
+])
+# Entrée de l'index par id (table de hachage à adressage ouvert) ; position -1 : case vide
+ENTREE_INDEX = np.dtype([("id", "<i8"), ("position", "<i8")])
+DIFFICULTE_ABSENTE = np.iinfo(np.int64).min
+SEPARATEUR_PARTICIPANTS = "\x1f"
+
+
+def fichier_binaire_pour(fichier_json):
+    """
+    @brief Retourne le chemin du fichier binaire associé à un fichier backlog JSON.
+    """
+    return os.path.splitext(fichier_json)[0] + EXTENSION_BINAIRE
+
+
+def ecrire_backlog_binaire(fonctionnalites, chemin, avant_remplacement=None):
+    """
+    @brief Écrit un backlog au format binaire.
+
+    @details
+    Le fichier contient, après l'en-tête : les enregistrements de taille fixe des champs
+    numériques, triés dans l'ordre du backlog (terminée, priorité, id) ; la table des
+    positions (début du nom, de la description, des participants et fin de chaque
+    fonctionnalité dans le tas) ; l'index par id ; les tables des statuts et modes de
+    vote (JSON) ; le tas des chaînes UTF-8. Le fichier est écrit à côté puis renommé :
+    un lecteur garde l'ancienne version projetée en mémoire jusqu'à sa réouverture.
+    Windows refuse de remplacer un fichier projeté : `avant_remplacement` permet de
+    libérer la projection de l'ancien fichier une fois le nouveau entièrement écrit.
+
+    @param fonctionnalites Itérable de Fonctionnalite.
+    @param chemin Chemin du fichier binaire.
+    @param avant_remplacement Fonction sans argument appelée juste avant le renommage, optionnelle.
+
+    @return int: Nombre de fonctionnalités écrites.
+    """
+    fonctionnalites = sorted(fonctionnalites, key=Backlog.cle)
+    nombre = len(fonctionnalites)
+    statuts = TableChaines([STATUT_A_FAIRE, STATUT_EN_COURS, STATUT_TERMINE])
+    modes = TableChaines([VOTE_UNANIMITE, VOTE_MOYENNE])
+
+    enregistrements = np.zeros(nombre, dtype=ENREGISTREMENT)
+    enregistrements["id"] = np.fromiter((f.id for f in fonctionnalites), np.int64, nombre)
+    enregistrements["priorite"] = np.fromiter((int(f.priorite) for f in fonctionnalites), np.int64, nombre)
+    enregistrements["difficulte"] = np.fromiter(
+        (DIFFICULTE_ABSENTE if f.difficulte is None else int(f.difficulte) for f in fonctionnalites), np.int64, nombre
+    )
+    enregistrements["statut"] = np.fromiter(map(statuts.encoder, (f.statut for f in fonctionnalites)), np.uint16, nombre)
+    enregistrements["mode_de_vote"] = np.fromiter(
+        map(modes.encoder, (f.mode_de_vote for f in fonctionnalites)), np.uint16, nombre
+    )
+
+    # Tas des chaînes : nom, description et participants de chaque fonctionnalité, à la suite
+    morceaux = []
+    for f in fonctionnalites:
+        morceaux.append(f.nom.encode("utf-8"))
+        morceaux.append((f.description or "").encode("utf-8"))
+        morceaux.append(SEPARATEUR_PARTICIPANTS.join(f.participants).encode("utf-8"))
+    positions = np.zeros(3 * nombre + 1, dtype="<u8")
+    np.cumsum(np.fromiter(map(len, morceaux), np.uint64, 3 * nombre), out=positions[1:])
+
+    # Index par id : adressage ouvert, sondage linéaire, au plus une case sur deux occupée
+    capacite = 8
+    while capacite < 2 * nombre:
+        capacite *= 2
+    index = np.zeros(capacite, dtype=ENTREE_INDEX)
+    index["position"] = -1
+    masque = capacite - 1
+    occupees = index["position"]
+    for position, identifiant in enumerate(enregistrements["id"].tolist()):
+        case = identifiant & masque
+        while occupees[case] >= 0:
+            case = (case + 1) & masque
+        index[case] = (identifiant, position)
+
+    tables = json.dumps({"statuts": statuts.valeurs, "modes": modes.valeurs}, ensure_ascii=False).encode("utf-8")
+    debut_enregistrements = EN_TETE.size
+    debut_positions = debut_enregistrements + enregistrements.nbytes
+    debut_index = debut_positions + positions.nbytes
+    debut_tables = debut_index + index.nbytes
+    debut_tas = debut_tables + len(tables)
+    dernier_id = max((f.id for f in fonctionnalites), default=0)
+    en_tete = EN_TETE.pack(
+        SIGNATURE, VERSION_FORMAT, nombre, dernier_id, capacite,
+        debut_enregistrements, debut_positions, debut_index, debut_tables, len(tables), debut_tas,
+    )
+
+    fichier_temporaire = chemin + ".tmp"
+    with open(fichier_temporaire, "wb") as fichier:
+        fichier.write(en_tete)
+        fichier.write(enregistrements.tobytes())
+        fichier.write(positions.tobytes())
+        fichier.write(index.tobytes())
+        fichier.write(tables)
+        fichier.writelines(morceaux)
+        fichier.flush()
+        os.fsync(fichier.fileno())
+    if avant_remplacement is not None:
+        avant_remplacement()
+    os.replace(fichier_temporaire, chemin)
+    return nombre
+
+
+def convertir_json_vers_binaire(fichier_json, fichier_binaire):
+    """
+    @brief Crée le fichier binaire à partir d'un fichier backlog JSON.
+
+    @details Les enregistrements invalides du fichier JSON sont écartés et signalés (voir `lire_backlog`) ;
+    un fichier JSON absent donne un backlog binaire vide.
+
+    @return int: Nombre de fonctionnalités converties.
+    """
+    rapport = RapportChargement()
+    try:
+        fonctionnalites = lire_backlog(fichier_json, rapport)
+    except FileNotFoundError:
+        fonctionnalites = []
+    nombre = ecrire_backlog_binaire(fonctionnalites, fichier_binaire)
+    for message in rapport.messages():
+        journaliseur.warning("%s : %s", fichier_json, message)
+    return nombre
+
+
+# Backlog lu dans un fichier binaire projeté en mémoire
+class BacklogBinaire:
+    """
+    @brief Backlog adossé à un fichier binaire projeté en mémoire (`mmap`), avec les modifications en mémoire.
+
+    @details
+    Même interface que `Backlog`. L'ouverture ne lit que l'en-tête : une fonctionnalité
+    n'est décodée que lorsqu'on la demande, et seules les pages du fichier qu'elle
+    occupe sont lues. `obtenir` passe par l'index par id (O(1)), le parcours et les pages
+    suivent l'ordre des enregistrements, déjà triés dans le fichier. Plusieurs processus
+    qui ouvrent le même fichier partagent son cache de pages.
+
+    Le fichier n'est jamais modifié sur place : les fonctionnalités ajoutées ou modifiées
+    sont gardées dans un `Backlog` en mémoire (`surcharge`), les ids supprimés ou
+    remplacés du fichier dans `masques`, et le parcours fusionne les deux ordres.
+    `AppManager` réécrit le fichier à la compaction et le rouvre.
+    """
+
+    def __init__(self, chemin):
+        """
+        @brief Ouvre un fichier backlog binaire.
+
+        @param chemin Chemin du fichier écrit par `ecrire_backlog_binaire`.
+
+        @throws ValueError Si le fichier n'est pas un backlog binaire de cette version.
+        """
+        self.chemin = chemin
+        self.dernier_id = self.projeter()
+        self.surcharge = Backlog()  # fonctionnalités ajoutées ou modifiées depuis l'écriture du fichier
+        self.masques = set()  # ids du fichier supprimés ou remplacés par la surcharge
+        self.version = 0  # incrémentée à chaque modification (ETag des pages du backlog)
+
+    def projeter(self):
+        """
+        @brief Projette le fichier en mémoire et prépare les vues sur ses colonnes.
+
+        @details Appelée à l'ouverture, et pour rouvrir le même fichier après `fermer`
+        si son remplacement a échoué (les modifications en mémoire restent valables).
+
+        @return int: Dernier id enregistré dans l'en-tête du fichier.
+
+        @throws ValueError Si le fichier n'est pas un backlog binaire de cette version.
+        """
+        chemin = self.chemin
+        with open(chemin, "rb") as fichier:
+            self.memoire = mmap.mmap(fichier.fileno(), 0, access=mmap.ACCESS_READ)
+        (signature, version, self.nombre, dernier_id, capacite, debut_enregistrements, debut_positions,
+         debut_index, debut_tables, taille_tables, self.debut_tas) = EN_TETE.unpack_from(self.memoire)
+        if signature != SIGNATURE or version != VERSION_FORMAT:
+            self.memoire.close()
+            raise ValueError(f"{chemin} n'est pas un backlog binaire (version {VERSION_FORMAT}).")
+
+        enregistrements = np.frombuffer(self.memoire, ENREGISTREMENT, self.nombre, debut_enregistrements)
+        self.ids = enregistrements["id"]
+        self.priorites = enregistrements["priorite"]
+        self.difficultes = enregistrements["difficulte"]
+        self.statuts = enregistrements["statut"]
+        self.modes = enregistrements["mode_de_vote"]
+        self.positions = np.frombuffer(self.memoire, "<u8", 3 * self.nombre + 1, debut_positions)
+        index = np.frombuffer(self.memoire, ENTREE_INDEX, capacite, debut_index)
+        self.index_ids = index["id"]
+        self.index_positions = index["position"]
+        self.masque_index = capacite - 1
+        tables = json.loads(self.memoire[debut_tables:debut_tables + taille_tables].decode("utf-8"))
+        self.table_statuts = [sys.intern(s) for s in tables["statuts"]]
+        self.table_modes = [sys.intern(m) for m in tables["modes"]]
+        self.code_termine = self.table_statuts.index(STATUT_TERMINE)
+        return dernier_id
+
+    def fermer(self):
+        """
+        @brief Libère la projection du fichier.
+        """
+        self.ids = self.priorites = self.difficultes = self.statuts = self.modes = None
+        self.positions = self.index_ids = self.index_positions = None
+        try:
+            self.memoire.close()
+        except BufferError:
+            pass  # une vue est encore utilisée : la projection sera libérée avec elle
+
+    def position(self, fonctionnalite_id):
+        """
+        @brief Cherche un id dans l'index du fichier.
+
+        @return int: Position de l'enregistrement, ou None si l'id n'est pas dans le fichier.
+        """
+        case = fonctionnalite_id & self.masque_index
+        while True:
+            position = int(self.index_positions[case])
+            if position < 0:
+                return None
+            if self.index_ids[case] == fonctionnalite_id:
+                return position
+            case = (case + 1) & self.masque_index
+
+    def lire(self, position):
+        """
+        @brief Décode la fonctionnalité d'un enregistrement du fichier.
+        """
+        debut, fin_nom, fin_description, fin = (
+            self.debut_tas + p for p in self.positions[3 * position:3 * position + 4].tolist()
+        )
+        participants = self.memoire[fin_description:fin].decode("utf-8")
+        difficulte = int(self.difficultes[position])
+        return Fonctionnalite(
+            int(self.ids[position]),
+            self.memoire[debut:fin_nom].decode("utf-8"),
+            self.memoire[fin_nom:fin_description].decode("utf-8"),
+            int(self.priorites[position]),
+            None if difficulte == DIFFICULTE_ABSENTE else difficulte,
+            self.table_statuts[self.statuts[position]],
+            self.table_modes[self.modes[position]],
+            participants.split(SEPARATEUR_PARTICIPANTS) if participants else (),
+        )
+
+    def cle(self, position):
+        """
+        @brief Clé de tri (terminée, priorité, id) d'un enregistrement, sans décoder ses chaînes.
+        """
+        return (self.statuts[position] == self.code_termine, int(self.priorites[position]), int(self.ids[position]))
+
+    def parcourir(self, apres=None):
+        """
+        @brief Parcourt le backlog dans l'ordre de priorité, à partir de la clé `apres` exclue.
+
+        @details Le début est trouvé par recherche dichotomique dans le fichier et dans la
+        surcharge ; les deux suites triées sont ensuite fusionnées.
+
+        @return Générateur de Fonctionnalite.
+        """
+        debut, fin = 0, self.nombre
+        if apres is not None:
+            while debut < fin:
+                milieu = (debut + fin) // 2
+                if self.cle(milieu) <= apres:
+                    debut = milieu + 1
+                else:
+                    fin = milieu
+        fichier = (
+            self.lire(position) for position in range(debut, self.nombre)
+            if not self.masques or int(self.ids[position]) not in self.masques
+        )
+        return heapq.merge(fichier, self.surcharge.parcourir(apres), key=Backlog.cle)
+
+    def retrier(self):
+        """
+        @brief Recalcule l'ordre des fonctionnalités modifiées en mémoire (celui du fichier est fixe).
+        """
+        self.surcharge.retrier()
+        self.version += 1
+
+    def prochain_id(self):
+        """
+        @brief Réserve le prochain identifiant de la séquence.
+
+        @return int: Nouvel identifiant, jamais attribué auparavant dans ce backlog.
+        """
+        self.dernier_id = max(self.dernier_id, self.surcharge.dernier_id) + 1
+        return self.dernier_id
+
+    def ajouter(self, fonctionnalite):
+        """
+        @brief Ajoute une fonctionnalité (ou remplace celle de même ID).
+
+        @param fonctionnalite Objet Fonctionnalite.
+        """
+        if self.position(fonctionnalite.id) is not None:
+            self.masques.add(fonctionnalite.id)
+        self.surcharge.ajouter(fonctionnalite)
+        self.dernier_id = max(self.dernier_id, fonctionnalite.id)
+        self.version += 1
+
+    def supprimer(self, fonctionnalite_id):
+        """
+        @brief Retire une fonctionnalité du backlog.
+
+        @param fonctionnalite_id ID de la fonctionnalité.
+
+        @return La fonctionnalité retirée, ou None si elle n'existait pas.
+        """
+        fonctionnalite = self.obtenir(fonctionnalite_id)
+        if fonctionnalite is None:
+            return None
+        self.surcharge.supprimer(fonctionnalite_id)
+        if self.position(fonctionnalite_id) is not None:
+            self.masques.add(fonctionnalite_id)
+        self.version += 1
+        return fonctionnalite
+
+    def mettre_a_jour(self, fonctionnalite):
+        """
+        @brief Enregistre une fonctionnalité modifiée ; une fonctionnalité du fichier passe dans la surcharge.
+
+        @param fonctionnalite Objet Fonctionnalite dont l'ID est dans le backlog (ignoré sinon).
+        """
+        if self.surcharge.obtenir(fonctionnalite.id) is fonctionnalite:
+            self.surcharge.mettre_a_jour(fonctionnalite)
+            self.version += 1
+        elif fonctionnalite.id in self.surcharge.par_id or (
+            fonctionnalite.id not in self.masques and self.position(fonctionnalite.id) is not None
+        ):
+            self.ajouter(fonctionnalite)
+
+    def obtenir(self, fonctionnalite_id):
+        """
+        @brief Retourne une fonctionnalité à partir de son ID en O(1).
+
+        @return L'objet Fonctionnalite (décodé du fichier s'il n'a pas été modifié), ou None si introuvable.
+        """
+        fonctionnalite = self.surcharge.obtenir(fonctionnalite_id)
+        if fonctionnalite is not None or fonctionnalite_id in self.masques:
+            return fonctionnalite
+        position = self.position(fonctionnalite_id)
+        return None if position is None else self.lire(position)
+
+    def premiere(self):
+        """
+        @brief Retourne la première fonctionnalité dans l'ordre du backlog, sans parcours.
+
+        @details Le premier enregistrement non masqué du fichier (au plus `len(masques) + 1`
+        essais) est comparé à la première fonctionnalité de la surcharge.
+
+        @return L'objet Fonctionnalite, ou None si le backlog est vide.
+        """
+        position = 0
+        while position < self.nombre and self.masques and int(self.ids[position]) in self.masques:
+            position += 1
+        surcharge = self.surcharge[0] if len(self.surcharge) else None
+        if position == self.nombre:
+            return surcharge
+        if surcharge is not None and Backlog.cle(surcharge) < self.cle(position):
+            return surcharge
+        return self.lire(position)
+
+    def premiere_non_terminee(self):
+        """
+        @brief Retourne la fonctionnalité non terminée la plus prioritaire.
+
+        @return L'objet Fonctionnalite, ou None si toutes sont terminées.
+        """
+        premiere = self.premiere()
+        return premiere if premiere is not None and premiere.statut != STATUT_TERMINE else None
+
+    def page(self, apres=None, taille=TAILLE_PAGE_BACKLOG):
+        """
+        @brief Retourne une page du backlog dans l'ordre de priorité (pagination par clé).
+
+        @param apres Clé (terminée, priorité, id) de la dernière fonctionnalité de la page précédente, ou None.
+        @param taille Nombre maximal de fonctionnalités.
+
+        @return Tuple (liste des fonctionnalités, clé de la dernière si une page suit, sinon None).
+        """
+        fonctionnalites = list(islice(self.parcourir(apres), taille + 1))
+        suivant = Backlog.cle(fonctionnalites[taille - 1]) if len(fonctionnalites) > taille else None
+        return fonctionnalites[:taille], suivant
+
+    def difficulte_par_priorite(self, bornes=BANDES_PRIORITE, terminees=False):
+        """
+        @brief Somme des difficultés par bande de priorité, calculée sur les colonnes du fichier sans décoder les chaînes.
+
+        @details Les fonctionnalités de la surcharge sont comptées à part (voir `BacklogColonnes.difficulte_par_priorite`).
+
+        @return list: Même format que `BacklogColonnes.difficulte_par_priorite`.
+        """
+        selection = np.ones(self.nombre, dtype=bool) if terminees else self.statuts != self.code_termine
+        if self.masques:
+            selection &= ~np.isin(self.ids, np.fromiter(self.masques, np.int64, len(self.masques)))
+        bandes = np.zeros(self.nombre, dtype=np.intp)
+        for borne in bornes:
+            bandes += self.priorites > borne
+        estimees = self.difficultes != DIFFICULTE_ABSENTE
+        nombre = len(bornes) + 1
+        fonctionnalites = np.bincount(bandes, weights=selection, minlength=nombre)
+        totaux = np.bincount(bandes, weights=np.where(selection & estimees, self.difficultes, 0), minlength=nombre)
+        manquantes = np.bincount(bandes, weights=selection & ~estimees, minlength=nombre)
+        rapport = BacklogColonnes(self.surcharge).difficulte_par_priorite(bornes, terminees)
+        for i, bande in enumerate(rapport):
+            bande["fonctionnalites"] += int(fonctionnalites[i])
+            bande["difficulte_totale"] += int(totaux[i])
+            bande["non_estimees"] += int(manquantes[i])
+        return rapport
+
+    def __iter__(self):
+        return self.parcourir()
+
+    def __len__(self):
+        return self.nombre - len(self.masques) + len(self.surcharge)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return list(self)[position]
+        if position < 0:
+            position += len(self)
+        if position == 0:
+            fonctionnalite = self.premiere()
+        else:
+            fonctionnalite = next(islice(self.parcourir(), position, None), None) if position > 0 else None
+        if fonctionnalite is None:
+            raise IndexError("position hors du backlog")
+        return fonctionnalite
+
+    def __contains__(self, fonctionnalite):
+        return self.obtenir(fonctionnalite.id) is not None
+
+    def __repr__(self):
+        return f"<BacklogBinaire {len(self)} fonctionnalité(s), {len(self.surcharge)} en mémoire>"
+
+
+# Point d'entrée : conversion d'un backlog JSON au format binaire
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Usage : python -m models.stockage_binaire <backlog.json> [<backlog.bin>]")
+        sys.exit(1)
+    source = sys.argv[1]
+    destination = sys.argv[2] if len(sys.argv) == 3 else fichier_binaire_pour(source)
+    nombre = convertir_json_vers_binaire(source, destination)
+    print(f"{nombre} fonctionnalité(s) écrite(s) dans {destination}.")
@@ -0,0 +1,113 @@
+import json
+import sqlite3
+import threading
+from constantes import *
+
+# Schéma : une ligne par salle, état sérialisé en JSON et numéro de version
+SCHEMA_ETAT = """
+CREATE TABLE IF NOT EXISTS etats_salles (
+    id_salle TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    donnees TEXT NOT NULL
+);
+"""
+
+
+class ConflitEtat(Exception):
+    """
+    @brief Levée quand l'état d'une salle a été modifié par un autre processus trop de fois de suite.
+    """
+
+
+# État des salles partagé entre processus
+class StockageEtat:
+    """
+    @brief Stockage de l'état des salles (participants, votes, indicateurs) partagé entre processus.
+
+    @details
+    Chaque salle est une ligne versionnée d'une base SQLite. Une écriture n'aboutit
+    que si la version lue n'a pas changé entre-temps (compare-and-swap) : deux
+    processus ne peuvent pas écraser mutuellement leurs modifications.
+    """
+
+    def __init__(self, chemin):
+        """
+        @brief Ouvre (ou crée) la base d'état partagé.
+
+        @param chemin Chemin du fichier de base de données, commun à tous les processus.
+        """
+        self.chemin = chemin
+        self.connexion = sqlite3.connect(chemin, check_same_thread=False, timeout=10, isolation_level=None)
+        self.verrou = threading.Lock()
+        with self.verrou:
+            self.connexion.execute("PRAGMA journal_mode=WAL")
+            self.connexion.executescript(SCHEMA_ETAT)
+
+    def lire(self, id_salle, version_connue=0):
+        """
+        @brief Lit l'état d'une salle s'il est plus récent que la version connue.
+
+        @param id_salle Identifiant de la salle.
+        @param version_connue Version déjà chargée par l'appelant.
+
+        @return Tuple (version, données), ou None si la salle est absente ou déjà à jour.
+        """
+        with self.verrou:
+            ligne = self.connexion.execute(
+                "SELECT version, donnees FROM etats_salles WHERE id_salle = ? AND version > ?",
+                (id_salle, version_connue)
+            ).fetchone()
+        if ligne is None:
+            return None
+        return ligne[0], json.loads(ligne[1])
+
+    def comparer_et_ecrire(self, id_salle, version_attendue, donnees):
+        """
+        @brief Écrit l'état d'une salle si sa version est toujours celle attendue.
+
+        @param id_salle Identifiant de la salle.
+        @param version_attendue Version lue avant la modification (0 si la salle n'existe pas encore).
+        @param donnees Dictionnaire sérialisable en JSON.
+
+        @return int: Nouvelle version, ou None si un autre processus a écrit entre-temps.
+        """
+        contenu = json.dumps(donnees, ensure_ascii=False)
+        with self.verrou:
+            if version_attendue == 0:
+                curseur = self.connexion.execute(
+                    "INSERT OR IGNORE INTO etats_salles (id_salle, version, donnees) VALUES (?, 1, ?)",
+                    (id_salle, contenu)
+                )
+            else:
+                curseur = self.connexion.execute(
+                    "UPDATE etats_salles SET version = version + 1, donnees = ? WHERE id_salle = ? AND version = ?",
+                    (contenu, id_salle, version_attendue)
+                )
+        return version_attendue + 1 if curseur.rowcount == 1 else None
+
+    def existe(self, id_salle):
+        """
+        @brief Indique si une salle a un état enregistré.
+
+        @return bool: True si la salle est présente dans la base.
+        """
+        with self.verrou:
+            return self.connexion.execute(
+                "SELECT 1 FROM etats_salles WHERE id_salle = ?", (id_salle,)
+            ).fetchone() is not None
+
+    def supprimer(self, id_salle):
+        """
+        @brief Supprime l'état d'une salle fermée.
+
+        @param id_salle Identifiant de la salle.
+        """
+        with self.verrou:
+            self.connexion.execute("DELETE FROM etats_salles WHERE id_salle = ?", (id_salle,))
+
+    def fermer(self):
+        """
+        @brief Ferme la connexion à la base.
+        """
+        with self.verrou:
+            self.connexion.close()
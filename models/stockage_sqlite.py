@@ -0,0 +1,268 @@
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from constantes import *
+from models.fonctionnalite import Fonctionnalite
+from models.chargement_backlog import RapportChargement, lire_backlog
+
+journaliseur = logging.getLogger(__name__)
+
+# Schéma de la base : une ligne par fonctionnalité, participants sérialisés en JSON
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fonctionnalites (
+    id INTEGER PRIMARY KEY,
+    nom TEXT NOT NULL,
+    description TEXT,
+    priorite INTEGER NOT NULL,
+    difficulte INTEGER,
+    statut TEXT NOT NULL,
+    mode_de_vote TEXT NOT NULL,
+    participants TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS idx_statut_priorite ON fonctionnalites ((statut = 'Terminé'), priorite, id);
+CREATE TABLE IF NOT EXISTS compteurs (
+    nom TEXT PRIMARY KEY,
+    valeur INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO compteurs (nom, valeur) SELECT 'dernier_id', COALESCE(MAX(id), 0) FROM fonctionnalites;
+"""
+
+# Le dernier id attribué ne redescend jamais, même après la suppression de la fonctionnalité la plus récente
+AVANCER_DERNIER_ID = (
+    "UPDATE compteurs SET valeur = MAX(valeur, (SELECT COALESCE(MAX(id), 0) FROM fonctionnalites)) + ? "
+    "WHERE nom = 'dernier_id'"
+)
+
+# Ordre du backlog : fonctionnalités non terminées d'abord, puis par priorité
+ORDRE_BACKLOG = "ORDER BY (statut = 'Terminé'), priorite, id"
+
+COLONNES = ("id", "nom", "description", "priorite", "difficulte", "statut", "mode_de_vote", "participants")
+
+
+# Stockage du backlog dans une base SQLite locale
+class StockageSQLite:
+    """
+    @brief Moteur de stockage du backlog dans une base SQLite.
+
+    @details
+    Chaque fonctionnalité est une ligne de la table `fonctionnalites`, indexée par
+    son identifiant (clé primaire) et par (terminée, priorité). Chaque modification
+    est une transaction portant sur une seule ligne ; seules les fonctionnalités non
+    terminées sont chargées en mémoire au démarrage. Le dernier identifiant attribué
+    est conservé dans la table `compteurs`, comme `Backlog.dernier_id`.
+    """
+
+    def __init__(self, chemin):
+        """
+        @brief Ouvre (ou crée) la base SQLite.
+
+        @param chemin Chemin du fichier de base de données.
+        """
+        self.chemin = chemin
+        self.connexion = sqlite3.connect(chemin, check_same_thread=False)
+        self.connexion.row_factory = sqlite3.Row
+        self.verrou = threading.Lock()
+        with self.verrou, self.connexion:
+            self.connexion.executescript(SCHEMA)
+
+    @staticmethod
+    def vers_fonctionnalite(ligne):
+        """
+        @brief Convertit une ligne de la table en objet Fonctionnalite.
+
+        @param ligne Ligne sqlite3.Row.
+
+        @return L'objet Fonctionnalite correspondant.
+        """
+        donnees = dict(ligne)
+        donnees["participants"] = json.loads(donnees["participants"])
+        return Fonctionnalite(**donnees)
+
+    @staticmethod
+    def vers_ligne(fonctionnalite):
+        """
+        @brief Convertit une fonctionnalité en tuple de valeurs pour la table.
+
+        @param fonctionnalite Objet Fonctionnalite.
+
+        @return Tuple ordonné selon `COLONNES`.
+        """
+        return (
+            fonctionnalite.id,
+            fonctionnalite.nom,
+            fonctionnalite.description,
+            int(fonctionnalite.priorite),
+            int(fonctionnalite.difficulte) if fonctionnalite.difficulte is not None else None,
+            fonctionnalite.statut,
+            fonctionnalite.mode_de_vote,
+            json.dumps(fonctionnalite.participants or [], ensure_ascii=False),
+        )
+
+    def requete(self, sql, parametres=()):
+        """
+        @brief Exécute une requête de lecture.
+
+        @return Liste des lignes retournées.
+        """
+        with self.verrou:
+            return self.connexion.execute(sql, parametres).fetchall()
+
+    def charger_actives(self):
+        """
+        @brief Retourne les fonctionnalités non terminées, triées par priorité.
+
+        @return Liste de Fonctionnalite.
+        """
+        lignes = self.requete(f"SELECT * FROM fonctionnalites WHERE (statut = 'Terminé') = 0 {ORDRE_BACKLOG}")
+        return [self.vers_fonctionnalite(l) for l in lignes]
+
+    def lister(self):
+        """
+        @brief Retourne toutes les fonctionnalités dans l'ordre du backlog.
+
+        @return Liste de Fonctionnalite.
+        """
+        return [self.vers_fonctionnalite(l) for l in self.requete(f"SELECT * FROM fonctionnalites {ORDRE_BACKLOG}")]
+
+    def page(self, apres=None, taille=TAILLE_PAGE_BACKLOG):
+        """
+        @brief Retourne une page du backlog, à la suite de la clé `apres`, en parcourant l'index (terminée, priorité, id).
+
+        @param apres Clé de tri (terminée, priorité, id) de la dernière fonctionnalité déjà lue, ou None.
+        @param taille Nombre maximal de fonctionnalités.
+
+        @return Liste de Fonctionnalite.
+        """
+        if apres is None:
+            lignes = self.requete(f"SELECT * FROM fonctionnalites {ORDRE_BACKLOG} LIMIT ?", (taille,))
+        else:
+            lignes = self.requete(
+                f"SELECT * FROM fonctionnalites WHERE ((statut = 'Terminé'), priorite, id) > (?, ?, ?) "
+                f"{ORDRE_BACKLOG} LIMIT ?",
+                (int(apres[0]), apres[1], apres[2], taille),
+            )
+        return [self.vers_fonctionnalite(l) for l in lignes]
+
+    def obtenir(self, fonctionnalite_id):
+        """
+        @brief Retourne une fonctionnalité à partir de son ID.
+
+        @return L'objet Fonctionnalite, ou None si introuvable.
+        """
+        lignes = self.requete("SELECT * FROM fonctionnalites WHERE id = ?", (fonctionnalite_id,))
+        return self.vers_fonctionnalite(lignes[0]) if lignes else None
+
+    def prochain_id(self):
+        """
+        @brief Réserve le prochain identifiant de la séquence.
+
+        @return int: Nouvel identifiant, jamais attribué auparavant dans cette base.
+        """
+        with self.verrou, self.connexion:
+            self.connexion.execute(AVANCER_DERNIER_ID, (1,))
+            return self.connexion.execute("SELECT valeur FROM compteurs WHERE nom = 'dernier_id'").fetchone()[0]
+
+    def compter(self):
+        """
+        @brief Retourne le nombre de fonctionnalités enregistrées.
+
+        @return int: Nombre de lignes.
+        """
+        return self.requete("SELECT COUNT(*) FROM fonctionnalites")[0][0]
+
+    def enregistrer(self, fonctionnalites):
+        """
+        @brief Insère ou remplace des fonctionnalités dans une même transaction.
+
+        @param fonctionnalites Liste (ou itérable) de Fonctionnalite.
+        """
+        sql = f"INSERT OR REPLACE INTO fonctionnalites ({', '.join(COLONNES)}) VALUES ({', '.join('?' * len(COLONNES))})"
+        with self.verrou, self.connexion:
+            self.connexion.executemany(sql, (self.vers_ligne(f) for f in fonctionnalites))
+            self.connexion.execute(AVANCER_DERNIER_ID, (0,))
+
+    def appliquer(self, operation):
+        """
+        @brief Applique une opération du backlog dans une transaction d'une seule ligne.
+
+        @param operation Dictionnaire au format du journal : ajout, modification ou suppression.
+        """
+        op = operation.get("op")
+        if op == "ajout":
+            self.enregistrer([Fonctionnalite(**operation["fonctionnalite"])])
+        elif op == "modification":
+            champs = {k: v for k, v in operation["champs"].items() if k in COLONNES and k != "id"}
+            if not champs:
+                return
+            if "participants" in champs:
+                champs["participants"] = json.dumps(champs["participants"] or [], ensure_ascii=False)
+            for cle in ("priorite", "difficulte"):
+                if champs.get(cle) not in (None, ""):
+                    champs[cle] = int(champs[cle])
+            affectations = ", ".join(f"{k} = ?" for k in champs)
+            with self.verrou, self.connexion:
+                self.connexion.execute(
+                    f"UPDATE fonctionnalites SET {affectations} WHERE id = ?",
+                    (*champs.values(), operation["id"])
+                )
+        elif op == "suppression":
+            with self.verrou, self.connexion:
+                self.connexion.execute("DELETE FROM fonctionnalites WHERE id = ?", (operation["id"],))
+        else:
+            journaliseur.warning("Opération inconnue : %s", operation)
+
+    def fermer(self):
+        """
+        @brief Ferme la connexion à la base.
+        """
+        with self.verrou:
+            self.connexion.close()
+
+
+def fichier_sqlite_pour(fichier_json):
+    """
+    @brief Retourne le chemin de la base SQLite associée à un backlog JSON.
+
+    @param fichier_json Chemin du backlog JSON.
+
+    @return Chemin de la base (même nom, extension `EXTENSION_SQLITE`).
+    """
+    return os.path.splitext(fichier_json)[0] + EXTENSION_SQLITE
+
+
+def migrer_json_vers_sqlite(fichier_json, fichier_sqlite):
+    """
+    @brief Importe un backlog JSON existant dans une base SQLite.
+
+    @param fichier_json Chemin du backlog JSON (format `{"backlog": [...]}`).
+    @param fichier_sqlite Chemin de la base à créer ou compléter.
+
+    @details Le fichier est lu fonctionnalité par fonctionnalité : un backlog de
+    plusieurs centaines de Mo n'est jamais chargé en entier. Les enregistrements
+    invalides sont écartés et signalés dans le journal.
+
+    @return int: Nombre de fonctionnalités importées.
+    """
+    rapport = RapportChargement()
+    stockage = StockageSQLite(fichier_sqlite)
+    try:
+        stockage.enregistrer(lire_backlog(fichier_json, rapport))
+    finally:
+        stockage.fermer()
+    for message in rapport.messages():
+        journaliseur.warning("%s : %s", fichier_json, message)
+    return rapport.acceptees
+
+
+# Outil de migration : python -m models.stockage_sqlite data/backlog.json [data/backlog.sqlite3]
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Usage : python -m models.stockage_sqlite <backlog.json> [<backlog.sqlite3>]")
+        sys.exit(1)
+    source = sys.argv[1]
+    destination = sys.argv[2] if len(sys.argv) == 3 else fichier_sqlite_pour(source)
+    nombre = migrer_json_vers_sqlite(source, destination)
+    print(f"{nombre} fonctionnalité(s) importée(s) dans {destination}.")
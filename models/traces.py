@@ -0,0 +1,163 @@
+import contextvars
+import functools
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from constantes import *
+
+# Trace de la requête en cours dans ce thread (None : rien n'est enregistré)
+trace_courante = contextvars.ContextVar("trace_courante", default=None)
+
+# Origine des horodatages, commune à toutes les traces du processus
+ORIGINE = time.perf_counter()
+
+
+# Spans chronométrés d'une requête
+class Trace:
+    """
+    @brief Spans (intervalles chronométrés et imbriqués) enregistrés pendant une requête.
+    """
+
+    numeros = itertools.count(1)
+
+    def __init__(self, nom):
+        """
+        @brief Commence une trace.
+
+        @param nom Nom de la requête (ex. "POST soumettre_vote").
+        """
+        self.nom = nom
+        self.numero = next(self.numeros)
+        self.debut = time.perf_counter()
+        self.duree = None
+        self.profondeur = 0
+        self.spans = []  # [(nom, début, durée, profondeur)], dans l'ordre de fin
+
+    def terminer(self):
+        """
+        @brief Termine la trace (durée totale de la requête).
+        """
+        self.duree = time.perf_counter() - self.debut
+
+    def evenements(self):
+        """
+        @brief Convertit la trace en événements « complets » (phase X) du format Chrome trace-event.
+
+        @details Chaque requête occupe sa propre ligne (tid) ; les horodatages sont en microsecondes.
+
+        @return list: Événements de la trace.
+        """
+        pid = os.getpid()
+        evenements = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": self.numero,
+             "args": {"name": f"{self.nom} #{self.numero}"}},
+            {"name": self.nom, "cat": "requete", "ph": "X", "pid": pid, "tid": self.numero,
+             "ts": round((self.debut - ORIGINE) * 1e6, 3), "dur": round((self.duree or 0) * 1e6, 3)},
+        ]
+        for nom, debut, duree, profondeur in self.spans:
+            evenements.append({
+                "name": nom, "cat": "app_manager", "ph": "X", "pid": pid, "tid": self.numero,
+                "ts": round((debut - ORIGINE) * 1e6, 3), "dur": round(duree * 1e6, 3),
+                "args": {"profondeur": profondeur},
+            })
+        return evenements
+
+
+def tracer(fonction):
+    """
+    @brief Décorateur : enregistre un span pour chaque appel, si une trace est en cours.
+
+    @details Hors d'une requête tracée (tests, écriture différée, traçage désactivé),
+    l'appel n'est pas mesuré et ne coûte qu'une lecture de variable de contexte.
+    """
+    nom = fonction.__qualname__
+
+    @functools.wraps(fonction)
+    def enveloppe(*args, **kwargs):
+        trace = trace_courante.get()
+        if trace is None:
+            return fonction(*args, **kwargs)
+        profondeur = trace.profondeur
+        trace.profondeur += 1
+        debut = time.perf_counter()
+        try:
+            return fonction(*args, **kwargs)
+        finally:
+            trace.spans.append((nom, debut, time.perf_counter() - debut, profondeur))
+            trace.profondeur = profondeur
+    return enveloppe
+
+
+# Dernières requêtes tracées du processus
+class RegistreTraces:
+    """
+    @brief Démarre et conserve les traces des dernières requêtes, et les exporte au format Chrome trace-event.
+
+    @details Le JSON exporté s'ouvre dans `chrome://tracing` ou Perfetto : une ligne par
+    requête, les appels imbriqués d'AppManager sous la requête qui les a faits.
+    """
+
+    def __init__(self, actif=False, capacite=TRACES_CONSERVEES):
+        """
+        @brief Initialise le registre.
+
+        @param actif True pour tracer les requêtes dès maintenant.
+        @param capacite Nombre de traces conservées ; les plus anciennes sont oubliées.
+        """
+        self.actif = actif
+        self.traces = deque(maxlen=capacite)
+        self.verrou = threading.Lock()
+
+    @classmethod
+    def depuis_environnement(cls, environnement=os.environ):
+        """
+        @brief Crée un registre activé si `PLANNING_POKER_TRACES` vaut "1".
+
+        @return RegistreTraces
+        """
+        return cls(actif=environnement.get(VARIABLE_TRACES, "") == "1")
+
+    def demarrer(self, nom):
+        """
+        @brief Commence la trace d'une requête dans le contexte courant, si le traçage est actif.
+
+        @param nom Nom de la requête.
+
+        @return Jeton à passer à `terminer`, ou None si le traçage est désactivé.
+        """
+        if not self.actif:
+            return None
+        return trace_courante.set(Trace(nom))
+
+    def terminer(self, jeton):
+        """
+        @brief Termine la trace de la requête et la conserve.
+
+        @param jeton Jeton renvoyé par `demarrer`.
+
+        @return Trace: La trace terminée.
+        """
+        trace = trace_courante.get()
+        trace_courante.reset(jeton)
+        trace.terminer()
+        with self.verrou:
+            self.traces.append(trace)
+        return trace
+
+    def exporter_chrome(self, filtre=None):
+        """
+        @brief Exporte les traces conservées au format JSON Chrome trace-event.
+
+        @param filtre Ne garder que les requêtes dont le nom contient ce texte, si fourni.
+
+        @return dict: Document `{"traceEvents": [...], "displayTimeUnit": "ms"}`.
+        """
+        with self.verrou:
+            traces = list(self.traces)
+        evenements = []
+        for trace in traces:
+            if not filtre or filtre in trace.nom:
+                evenements.extend(trace.evenements())
+        return {"traceEvents": evenements, "displayTimeUnit": "ms"}
@@ -0,0 +1,419 @@
+# -*- coding: utf-8 -*-
+
+'''
+@file
+@brief Routeur frontal répartissant les salles de vote entre plusieurs processus Flask.
+
+@details
+Le routeur lance N workers (l'application Flask de `app.py`, chacun sur son port
+local) et leur transmet les requêtes. Chaque salle est attribuée à un seul worker
+par hachage cohérent : ses participants et ses votes restent dans la mémoire de ce
+worker, sans base partagée. Un worker arrêté est retiré de l'anneau puis relancé ;
+seules ses salles changent de worker. Quand une salle change de worker, l'ancien
+worker l'écrit sur le disque et la libère avant que le nouveau ne l'ouvre.
+
+Usage : python routeur.py [--workers N] [--port 5000]
+(SIGUSR1 ajoute un worker, SIGUSR2 retire le dernier.)
+'''
+
+import argparse
+import http.client
+import logging
+import os
+import re
+import secrets
+import signal
+import socket
+import subprocess
+import sys
+import threading
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from flask import Flask
+from itsdangerous import BadData
+
+from constantes import *
+from models.anneau_coherent import AnneauCoherent
+from models.journalisation import configurer_journalisation
+
+journaliseur = logging.getLogger(__name__)
+
+# Commande d'un worker : l'application Flask sur un port local (SIGTERM sauvegarde les salles ouvertes avant l'arrêt)
+CODE_WORKER = (
+    "import signal, sys; signal.signal(signal.SIGTERM, lambda *_: sys.exit(0)); "
+    "from app import app; app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True)"
+)
+
+# Application minimale partageant la clé secrète des workers, pour vérifier leurs cookies de session
+application_signature = Flask(__name__)
+application_signature.secret_key = CLE_SECRETE
+
+# En-têtes propres à une connexion, à ne pas retransmettre
+EN_TETES_SAUT_PAR_SAUT = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade",
+}
+
+
+def lire_session_flask(cookie):
+    """
+    @brief Décode le contenu d'un cookie de session Flask après vérification de sa signature.
+
+    @details Un cookie forgé ne doit pas permettre de choisir le worker qui sert une salle.
+
+    @param cookie Valeur du cookie `session`.
+
+    @return dict: Contenu de la session, vide si le cookie est illisible ou mal signé.
+    """
+    serialiseur = application_signature.session_interface.get_signing_serializer(application_signature)
+    try:
+        contenu = serialiseur.loads(cookie)
+    except BadData:
+        return {}
+    return contenu if isinstance(contenu, dict) else {}
+
+
+def extraire_salle(chemin, cookies="", corps=b"", type_contenu=""):
+    """
+    @brief Détermine la salle visée par une requête, comme `resoudre_salle` dans `app.py`.
+
+    @details Ordre de recherche : URL `/salle/<id>`, paramètre `salle`, champ `salle`
+    d'un formulaire, session Flask, puis salle par défaut.
+
+    @param chemin Chemin et paramètres de la requête.
+    @param cookies En-tête Cookie.
+    @param corps Corps de la requête.
+    @param type_contenu En-tête Content-Type.
+
+    @return str: Identifiant de la salle.
+    """
+    url = urlsplit(chemin)
+    candidats = []
+    correspondance = re.match(r"^/salle/([^/]+)/?$", url.path)
+    if correspondance:
+        candidats.append(correspondance.group(1))
+    candidats.extend(parse_qs(url.query).get("salle", []))
+    if corps and type_contenu.startswith("application/x-www-form-urlencoded"):
+        candidats.extend(parse_qs(corps.decode("utf-8", "replace")).get("salle", []))
+    if cookies:
+        session = SimpleCookie()
+        session.load(cookies)
+        if "session" in session:
+            candidats.append(lire_session_flask(session["session"].value).get("salle"))
+
+    for candidat in candidats:
+        candidat = (candidat or "").strip().lower()
+        if re.fullmatch(MOTIF_ID_SALLE, candidat):
+            return candidat
+    return SALLE_PAR_DEFAUT
+
+
+# Processus workers et anneau de répartition
+class Routeur:
+    """
+    @brief Lance, surveille et répartit les workers Flask.
+    """
+
+    def __init__(self, nombre_workers, port_premier_worker=PORT_PREMIER_WORKER):
+        """
+        @brief Prépare le routeur.
+
+        @param nombre_workers Nombre de workers à lancer.
+        @param port_premier_worker Port du premier worker ; les suivants utilisent les ports suivants.
+        """
+        self.anneau = AnneauCoherent()
+        self.processus = {}  # {worker "hôte:port": Popen}
+        self.salles_servies = {}  # {worker: salles qui lui ont été transmises, peut-être encore ouvertes dans sa mémoire}
+        self.jeton = secrets.token_hex(16)  # authentifie le routeur auprès des routes internes des workers
+        self.prochain_port = port_premier_worker
+        self.nombre_initial = nombre_workers
+        self.verrou = threading.Lock()
+        self.arret = threading.Event()
+
+    def lancer_worker(self, worker):
+        """
+        @brief Démarre le processus Flask d'un worker.
+
+        @details À appeler en tenant `verrou`. Un nouveau processus n'a encore ouvert aucune salle.
+
+        @param worker Identifiant "hôte:port" du worker.
+
+        @return subprocess.Popen: Le processus lancé.
+        """
+        port = worker.rsplit(":", 1)[1]
+        self.salles_servies[worker] = set()
+        environnement = {**os.environ, VARIABLE_JETON_ROUTEUR: self.jeton}
+        return subprocess.Popen([sys.executable, "-c", CODE_WORKER, port], cwd=os.path.dirname(os.path.abspath(__file__)), env=environnement)
+
+    def liberer_salles(self, worker, salles):
+        """
+        @brief Demande à un worker de libérer des salles (sauvegarde du backlog, fin des flux SSE).
+
+        @param worker Identifiant du worker.
+        @param salles Identifiants des salles à libérer.
+
+        @return set: Salles libérées ; les autres restent à libérer (worker injoignable).
+        """
+        liberees = set()
+        hote, port = worker.rsplit(":", 1)
+        for id_salle in salles:
+            connexion = http.client.HTTPConnection(hote, int(port), timeout=DELAI_LIBERATION_SALLE)
+            try:
+                connexion.request(
+                    "POST", PREFIXE_ROUTES_INTERNES + "liberer_salle", body=urlencode({"salle": id_salle}),
+                    headers={EN_TETE_JETON_ROUTEUR: self.jeton, "Content-Type": "application/x-www-form-urlencoded"},
+                )
+                if connexion.getresponse().status == 200:
+                    liberees.add(id_salle)
+            except OSError:
+                pass
+            finally:
+                connexion.close()
+        return liberees
+
+    def reequilibrer(self):
+        """
+        @brief Fait libérer par chaque worker de l'anneau les salles attribuées désormais à un autre worker.
+
+        @details À appeler en tenant `verrou`, juste après l'ajout d'un worker à l'anneau :
+        les requêtes attendent ainsi que l'ancien worker ait écrit le backlog de la salle
+        avant que le nouveau ne l'ouvre. Un worker qui ne libère pas ses salles est retiré
+        de l'anneau ; la surveillance ne l'y remet qu'après les avoir libérées.
+        """
+        while True:
+            en_echec = []
+            for worker, salles in self.salles_servies.items():
+                if worker not in self.anneau.workers:
+                    continue
+                deplacees = {s for s in salles if self.anneau.obtenir(s) != worker}
+                salles -= self.liberer_salles(worker, deplacees)
+                if deplacees & salles:
+                    en_echec.append(worker)
+            if not en_echec:
+                return
+            for worker in en_echec:
+                self.anneau.retirer(worker)
+                journaliseur.info("Worker sans réponse au rééquilibrage, retiré de l'anneau : %s", worker)
+
+    def ajouter_worker(self):
+        """
+        @brief Lance un worker supplémentaire ; il rejoint l'anneau dès qu'il répond.
+        """
+        with self.verrou:
+            worker = f"127.0.0.1:{self.prochain_port}"
+            self.prochain_port += 1
+            self.processus[worker] = self.lancer_worker(worker)
+        journaliseur.info("Worker lancé : %s", worker)
+
+    def retirer_worker(self):
+        """
+        @brief Retire le dernier worker lancé ; ses salles passent aux workers voisins sur l'anneau.
+
+        @details Le worker libère ses salles avant que leurs requêtes ne soient transmises aux voisins.
+        """
+        with self.verrou:
+            if len(self.processus) <= 1:
+                return
+            worker = list(self.processus)[-1]
+            self.anneau.retirer(worker)
+            self.liberer_salles(worker, self.salles_servies.pop(worker, set()))
+            processus = self.processus.pop(worker)
+        processus.terminate()
+        journaliseur.info("Worker retiré : %s", worker)
+
+    @staticmethod
+    def repond(worker):
+        """
+        @brief Indique si un worker accepte les connexions.
+
+        @return bool: True si le port du worker est ouvert.
+        """
+        hote, port = worker.rsplit(":", 1)
+        try:
+            socket.create_connection((hote, int(port)), timeout=0.5).close()
+            return True
+        except OSError:
+            return False
+
+    def worker_indisponible(self, worker):
+        """
+        @brief Retire de l'anneau un worker qui ne répond plus ; la surveillance le relance.
+
+        @param worker Identifiant du worker.
+        """
+        with self.verrou:
+            self.anneau.retirer(worker)
+        journaliseur.info("Worker indisponible, retiré de l'anneau : %s", worker)
+
+    def surveiller(self):
+        """
+        @brief Boucle de surveillance : relance les workers arrêtés et ajoute à l'anneau ceux qui répondent.
+
+        @details Un worker qui revient dans l'anneau sans avoir été relancé libère d'abord
+        les salles restées dans sa mémoire : elles ont pu être modifiées ailleurs entre-temps.
+        """
+        while not self.arret.wait(DELAI_SURVEILLANCE_WORKERS):
+            with self.verrou:
+                workers = list(self.processus.items())
+            for worker, processus in workers:
+                if processus.poll() is not None:
+                    with self.verrou:
+                        self.anneau.retirer(worker)
+                        if worker in self.processus:
+                            self.processus[worker] = self.lancer_worker(worker)
+                    journaliseur.info("Worker arrêté, relancé : %s", worker)
+                elif worker not in self.anneau.workers and self.repond(worker):
+                    with self.verrou:
+                        if worker not in self.processus:
+                            continue
+                        salles = self.salles_servies.setdefault(worker, set())
+                        salles -= self.liberer_salles(worker, set(salles))
+                        if salles:
+                            continue
+                        self.anneau.ajouter(worker)
+                        self.reequilibrer()
+                    journaliseur.info("Worker disponible : %s", worker)
+
+    def demarrer(self):
+        """
+        @brief Lance les workers initiaux et la surveillance.
+        """
+        for _ in range(self.nombre_initial):
+            self.ajouter_worker()
+        threading.Thread(target=self.surveiller, daemon=True).start()
+
+    def arreter(self):
+        """
+        @brief Arrête la surveillance et tous les workers.
+        """
+        self.arret.set()
+        with self.verrou:
+            processus = list(self.processus.values())
+            self.processus.clear()
+        for p in processus:
+            p.terminate()
+        for p in processus:
+            p.wait()
+
+    def worker_pour(self, id_salle):
+        """
+        @brief Retourne le worker chargé d'une salle et retient qu'il l'a servie.
+
+        @return Identifiant du worker, ou None si aucun n'est disponible.
+        """
+        with self.verrou:
+            worker = self.anneau.obtenir(id_salle)
+            if worker is not None:
+                self.salles_servies.setdefault(worker, set()).add(id_salle)
+            return worker
+
+    def verifier_attribution(self, worker, id_salle):
+        """
+        @brief Fait libérer une salle ouverte par une requête transmise juste avant un rééquilibrage.
+
+        @param worker Worker qui a traité la requête.
+        @param id_salle Identifiant de la salle de la requête.
+        """
+        with self.verrou:
+            salles = self.salles_servies.setdefault(worker, set())
+            salles.add(id_salle)
+            if self.anneau.obtenir(id_salle) != worker:
+                salles -= self.liberer_salles(worker, {id_salle})
+
+
+# Transmission des requêtes HTTP au worker de la salle
+class TransmissionRequetes(BaseHTTPRequestHandler):
+    """
+    @brief Transmet chaque requête au worker de sa salle et relaie la réponse (y compris les flux SSE).
+    """
+
+    routeur = None  # Routeur partagé, défini au démarrage
+
+    def transmettre(self):
+        """
+        @brief Transmet la requête en cours au worker de sa salle.
+        """
+        longueur = int(self.headers.get("Content-Length") or 0)
+        corps = self.rfile.read(longueur) if longueur else b""
+        if urlsplit(self.path).path.startswith(PREFIXE_ROUTES_INTERNES):
+            self.send_error(404, "Route inconnue")
+            return
+        id_salle = extraire_salle(self.path, self.headers.get("Cookie", ""), corps, self.headers.get("Content-Type", ""))
+
+        en_tetes = {k: v for k, v in self.headers.items() if k.lower() not in EN_TETES_SAUT_PAR_SAUT}
+        en_tetes["X-Forwarded-For"] = self.client_address[0]
+
+        # Un worker qui ne répond plus est retiré ; la salle passe au worker suivant
+        for _ in range(max(len(self.routeur.anneau), 1)):
+            worker = self.routeur.worker_pour(id_salle)
+            if worker is None:
+                break
+            hote, port = worker.rsplit(":", 1)
+            connexion = http.client.HTTPConnection(hote, int(port), timeout=DELAI_KEEPALIVE_SSE * 4)
+            try:
+                connexion.request(self.command, self.path, body=corps or None, headers=en_tetes)
+                reponse = connexion.getresponse()
+            except OSError:
+                connexion.close()
+                self.routeur.worker_indisponible(worker)
+                continue
+            self.routeur.verifier_attribution(worker, id_salle)
+            try:
+                self.relayer(reponse)
+            finally:
+                connexion.close()
+            return
+        self.send_error(503, "Aucun worker disponible")
+
+    def relayer(self, reponse):
+        """
+        @brief Recopie la réponse du worker au client, au fil de l'eau.
+
+        @param reponse http.client.HTTPResponse du worker.
+        """
+        self.send_response_only(reponse.status, reponse.reason)
+        for cle, valeur in reponse.getheaders():
+            if cle.lower() not in EN_TETES_SAUT_PAR_SAUT:
+                self.send_header(cle, valeur)
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            while True:
+                morceau = reponse.read1(65536)
+                if not morceau:
+                    break
+                self.wfile.write(morceau)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client parti (ex. fermeture d'un flux SSE)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = transmettre
+
+
+# Point d'entrée du routeur
+if __name__ == "__main__":
+    parseur = argparse.ArgumentParser(description="Routeur frontal des salles de planning poker.")
+    parseur.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="nombre de workers Flask")
+    parseur.add_argument("--port", type=int, default=PORT_ROUTEUR, help="port d'écoute du routeur")
+    arguments = parseur.parse_args()
+
+    configurer_journalisation()
+    routeur = Routeur(arguments.workers)
+    TransmissionRequetes.routeur = routeur
+    routeur.demarrer()
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # arrêter aussi les workers
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda *_: routeur.ajouter_worker())
+        signal.signal(signal.SIGUSR2, lambda *_: routeur.retirer_worker())
+
+    serveur = ThreadingHTTPServer(("127.0.0.1", arguments.port), TransmissionRequetes)
+    journaliseur.info("Routeur à l'écoute sur le port %s (%s workers).", arguments.port, arguments.workers)
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serveur.server_close()
+        routeur.arreter()
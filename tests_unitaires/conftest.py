@@ -0,0 +1,23 @@
+import os
+import shutil
+import pytest
+from benchmarks.micro_backlog import generer_backlog as generateur_backlog
+
+
+@pytest.fixture
+def backlog_json(tmp_path):
+    """
+    Fixture qui copie le backlog de test dans un dossier temporaire.
+    """
+    BACKLOG_ORIGINAL = os.path.join(os.path.dirname(__file__), 'data', 'backlog.json')
+    fichier_temporaire = str(tmp_path / "backlog.json")
+    shutil.copyfile(BACKLOG_ORIGINAL, fichier_temporaire)
+    return fichier_temporaire
+
+@pytest.fixture
+def generer_backlog():
+    """
+    Fixture qui fournit le générateur de backlogs synthétiques déterministes des benchmarks :
+    generer_backlog(taille, graine=42) retourne les dictionnaires des fonctionnalités.
+    """
+    return generateur_backlog
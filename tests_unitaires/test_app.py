@@ -2,7 +2,11 @@
 
 from app import app
 import pytest
+import json
+import os
+import shutil
 from app import app_manager
+from constantes import *
 from tests_unitaires.test_app_manager import gestionnaire_temporaire, gestionnaire_temporaire_vide
 
 # Ce décorateur indique que la fonction client() est une fixture pytest.
@@ -162,6 +166,31 @@ def test_soumettre_vote(client):
     assert response.status_code == 200
     assert "Tous les participants ont voté." in response.data.decode('utf-8'), "Le processus de vote n'a pas été complété correctement."
 
+# Une carte hors du jeu est refusée avant d'être enregistrée
+def test_soumettre_vote_carte_inconnue(client):
+    """
+    Vérifie qu'un vote avec une carte inconnue est refusé et n'empêche pas la validation.
+    """
+    from app import registre_salles
+    for pseudo in ('lina', 'hugo', 'sm'):
+        client.post('/login', data={'pseudo': pseudo, 'salle': 'carte-test'})
+    salle = registre_salles.obtenir_salle('carte-test')
+    with client.session_transaction() as session:
+        session['pseudo_actif'] = 'sm'
+    client.post('/initier_vote')
+    assert salle.state["indicateurs"]["vote_commence"]
+
+    response = client.post('/soumettre_vote', data={'pseudo': 'lina', 'vote': '7'}, follow_redirects=True)
+    assert response.status_code == 200
+    assert "Carte de vote inconnue : 7." in response.data.decode('utf-8')
+    assert salle.get_data_par_pseudo('lina')['vote'] is None
+
+    client.post('/soumettre_vote', data={'pseudo': 'lina', 'vote': '5'})
+    client.post('/soumettre_vote', data={'pseudo': 'hugo', 'vote': '8'})
+    assert client.post('/valider_vote').status_code == 302
+    shutil.rmtree(os.path.dirname(salle.backlog_file))
+    registre_salles.fermer_salle('carte-test')
+
 # Test pour l'accès du Scrum Master
 def test_acces_sm(client):
     """
@@ -238,3 +267,256 @@ def test_reinitialiser_vote(client):
     assert response.status_code == 200  # Vérifie que l'accès est autorisé
     assert "Les votes ont été réinitialisés avec succès".encode('utf-8') in response.data  # Vérifie le message de succès
 
+
+# Test de connexion dans une salle dédiée
+def test_login_salle(client):
+    """
+    Vérifie qu'une connexion dans une salle nommée crée la salle sans toucher à la salle par défaut.
+    """
+    from app import registre_salles
+    response = client.post('/login', data={'pseudo': 'po', 'salle': 'equipe-test'})
+    assert response.status_code == 302
+    with client.session_transaction() as sess:
+        assert sess['salle'] == 'equipe-test'
+    salle = registre_salles.obtenir_salle('equipe-test')
+    assert salle.get_data_par_pseudo('po') is not None
+    assert salle is not app_manager
+    shutil.rmtree(os.path.dirname(salle.backlog_file))
+    registre_salles.fermer_salle('equipe-test')
+
+# Test du flux SSE de la salle de vote
+def test_flux_salle(client):
+    """
+    Vérifie que le flux SSE est refusé sans session et envoie l'état courant sinon.
+    """
+    response = client.get('/flux_salle')
+    assert response.status_code == 401
+
+    from app import registre_salles
+    client.post('/login', data={'pseudo': 'po', 'salle': 'flux-test'})
+    response = client.get('/flux_salle')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    premier_message = next(iter(response.response))
+    assert premier_message.startswith(b"event: etat")
+    response.close()
+
+    salle = registre_salles.obtenir_salle('flux-test')
+    assert salle.evenements.nombre_abonnes() == 0
+    shutil.rmtree(os.path.dirname(salle.backlog_file))
+    registre_salles.fermer_salle('flux-test')
+
+# Test de la fin du flux SSE à la fermeture de la salle
+def test_flux_salle_fermeture(client):
+    """
+    Vérifie que le flux SSE se termine quand la salle est fermée.
+    """
+    from app import registre_salles
+    client.post('/login', data={'pseudo': 'po', 'salle': 'flux-fin'})
+    response = client.get('/flux_salle')
+    flux = iter(response.response)
+    assert next(flux).startswith(b"event: etat")
+
+    salle = registre_salles.obtenir_salle('flux-fin')
+    registre_salles.fermer_salle('flux-fin')
+    assert list(flux) == []
+    response.close()
+    shutil.rmtree(os.path.dirname(salle.backlog_file))
+
+# Test de l'exposition des métriques
+def test_metriques(client):
+    """
+    Vérifie que /metrics expose les requêtes mesurées et les jauges des salles.
+    """
+    client.get('/login')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    texte = response.data.decode('utf-8')
+    assert f'{PREFIXE_METRIQUES}_requetes_total{{route="login",methode="GET",statut="200"}}' in texte
+    assert f'{PREFIXE_METRIQUES}_duree_requete_secondes_count{{route="login",methode="GET"}}' in texte
+    assert f'{PREFIXE_METRIQUES}_backlog_fonctionnalites{{salle="{SALLE_PAR_DEFAUT}"}}' in texte
+    assert f'{PREFIXE_METRIQUES}_sauvegarde_backlog_secondes_count{{salle="{SALLE_PAR_DEFAUT}"}}' in texte
+
+# Test du profilage à la demande
+def test_profilage(client, tmp_path, monkeypatch):
+    """
+    Vérifie que seul le Scrum Master configure le profilage et que les requêtes choisies sont profilées.
+    """
+    from app import profileur
+    monkeypatch.setattr(profileur, 'dossier', str(tmp_path))
+    client.post('/login', data={'pseudo': 'lina'})
+    with client.session_transaction() as session:
+        session['pseudo_actif'] = 'lina'
+    assert client.post('/profilage', data={'routes': 'backlog'}).status_code == 403
+
+    client.post('/login', data={'pseudo': 'sm'})
+    with client.session_transaction() as session:
+        session['pseudo_actif'] = 'sm'
+    try:
+        response = client.post('/profilage', data={'actif': '1', 'routes': 'backlog', 'echantillon': '1'})
+        assert response.get_json()['routes'] == ['backlog']
+        client.get('/backlog')
+        assert len(client.get('/profilage').get_json()['profils']) == 1
+        fonctions = client.get('/profilage/fonctions?route=backlog&limite=3').get_json()
+        assert len(fonctions) == 3
+    finally:
+        profileur.configurer(False)
+
+# Test des traces des requêtes
+def test_traces(client):
+    """
+    Vérifie que le Scrum Master active le traçage et exporte les spans des méthodes d'AppManager.
+    """
+    from app import traces_requetes
+    client.post('/login', data={'pseudo': 'sm'})
+    with client.session_transaction() as session:
+        session['pseudo_actif'] = 'sm'
+    try:
+        assert client.post('/traces', data={'actif': '1'}).get_json() == {"actif": True}
+        client.get('/backlog')
+        evenements = client.get('/traces?requete=GET backlog').get_json()["traceEvents"]
+        noms = {e["name"] for e in evenements}
+        assert "GET backlog" in noms
+        assert "AppManager.page_backlog" in noms
+    finally:
+        traces_requetes.actif = False
+
+# Test des requêtes conditionnelles (ETag)
+def test_etag_backlog(client):
+    """
+    Vérifie que /backlog répond 304 tant que ni le backlog ni l'état de la salle ne changent.
+    """
+    client.post('/login', data={'pseudo': 'lina'})
+    client.get('/backlog')  # consomme les messages flash de la connexion
+    response = client.get('/backlog')
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+    assert 'no-store' not in response.headers['Cache-Control']
+
+    response = client.get('/backlog', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+    app_manager.trier_backlog()  # le backlog change de version
+    response = client.get('/backlog', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    app_manager.executer_transaction(lambda: None)  # l'état de la salle change de version
+    assert client.get('/backlog', headers={'If-None-Match': etag}).status_code == 200
+
+# Test du backlog paginé
+def test_backlog_pagine(client):
+    """
+    Vérifie que /backlog/liste parcourt tout le backlog page par page, et que /backlog n'affiche qu'une page.
+    """
+    client.post('/login', data={'pseudo': 'lina'})
+    lus, curseur = [], None
+    while True:
+        reponse = client.get('/backlog/liste', query_string={'taille': 2, **({'apres': curseur} if curseur else {})})
+        assert reponse.status_code == 200
+        donnees = reponse.get_json()
+        assert len(donnees["fonctionnalites"]) <= 2
+        lus += [f["id"] for f in donnees["fonctionnalites"]]
+        curseur = donnees["suivant"]
+        if curseur is None:
+            break
+    assert lus == [f.id for f in app_manager.lister_backlog()]
+    assert client.get('/backlog/liste?apres=invalide').status_code == 400
+
+    page = client.get('/backlog?taille=1').data.decode('utf-8')
+    assert page.count('<tr>') == 3  # en-tête, une fonctionnalité, pied de tableau
+    assert 'Page suivante' in page
+
+# Test de l'état de la salle en attente longue
+def test_etat_salle(client):
+    """
+    Vérifie que /etat_salle retourne l'état sans identifiant de session, et attend un changement si la version est à jour.
+    """
+    assert client.get('/etat_salle').status_code == 401
+    from app import registre_salles
+    client.post('/login', data={'pseudo': 'po', 'salle': 'etat-test'})
+    etat = client.get('/etat_salle').get_json()
+    assert [p["pseudo"] for p in etat["participants"]] == ["po"]
+    assert "session_id" not in json.dumps(etat)
+
+    response = client.get(f'/etat_salle?version={etat["version"]}&attente=0.05')
+    assert response.status_code == 204
+    response = client.get(f'/etat_salle?version={etat["version"] - 1}&attente=10')
+    assert response.get_json()["version"] == etat["version"]
+
+    salle = registre_salles.obtenir_salle('etat-test')
+    shutil.rmtree(os.path.dirname(salle.backlog_file))
+    registre_salles.fermer_salle('etat-test')
+
+# Test de la libération d'une salle demandée par le routeur
+def test_liberer_salle(client, monkeypatch):
+    """
+    Vérifie que la route interne n'accepte que le jeton du routeur et retire la salle de ce processus.
+    """
+    import app as module_app
+    from app import registre_salles
+    client.post('/login', data={'pseudo': 'po', 'salle': 'liberee-test'})
+    salle = registre_salles.obtenir_salle('liberee-test')
+    adresse = PREFIXE_ROUTES_INTERNES + 'liberer_salle'
+    assert client.post(adresse, data={'salle': 'liberee-test'}).status_code == 404
+
+    monkeypatch.setattr(module_app, "JETON_ROUTEUR", "jeton-test")
+    assert client.post(adresse, data={'salle': 'liberee-test'}, headers={EN_TETE_JETON_ROUTEUR: "faux"}).status_code == 404
+    response = client.post(adresse, data={'salle': 'liberee-test'}, headers={EN_TETE_JETON_ROUTEUR: "jeton-test"})
+    assert response.get_json() == {"liberee": True}
+    assert not registre_salles.existe('liberee-test')
+    shutil.rmtree(os.path.dirname(salle.backlog_file))
+
+# Test de la déconnexion générale dans la salle par défaut, qui reste ouverte
+@pytest.mark.parametrize("moteur_stockage", ["sqlite", "binaire"])
+def test_logout_sm_salle_par_defaut(client, backlog_json, monkeypatch, moteur_stockage):
+    """
+    Vérifie que la salle par défaut reste utilisable après la déconnexion de tous par le Scrum Master.
+    """
+    from app import registre_salles
+    from models.app_manager import AppManager
+    gestionnaire = AppManager(backlog_file=backlog_json, moteur_stockage=moteur_stockage)
+    monkeypatch.setitem(registre_salles.salles, SALLE_PAR_DEFAUT, gestionnaire)
+    client.post('/login', data={'pseudo': 'sm'})
+    with client.session_transaction() as sess:
+        sess['pseudo_actif'] = 'sm'
+    assert client.get('/logout').status_code == 302
+    assert registre_salles.salles[SALLE_PAR_DEFAUT] is gestionnaire
+
+    client.post('/login', data={'pseudo': 'po'})
+    assert client.get('/backlog').status_code == 200
+    premiere = gestionnaire.afficher_fonctionnalite_prioritaire()
+    gestionnaire.modifier_fonctionnalite(premiere.id, nom="Après déconnexion")
+    assert gestionnaire.get_fonctionnalite(premiere.id).nom == "Après déconnexion"
+    gestionnaire.fermer()
+
+# Test de la validation d'un vote : le statut n'est modifié qu'en tenant le verrou du backlog
+def test_valider_vote_sous_verrou(client, backlog_json, monkeypatch):
+    """
+    Vérifie que la route de validation marque la fonctionnalité comme terminée sous le verrou du backlog.
+    """
+    from app import registre_salles
+    from models.app_manager import AppManager
+    from models.fonctionnalite import Fonctionnalite
+    gestionnaire = AppManager(backlog_file=backlog_json, delai_sauvegarde=0)
+    monkeypatch.setitem(registre_salles.salles, SALLE_PAR_DEFAUT, gestionnaire)
+    gestionnaire.ajout_fonctionnalite("Validée", "", PRIORITE_MIN, 3, mode_de_vote="unanimite", participants=["hugo"])
+    fonctionnalite_id = gestionnaire.backlog.dernier_id
+    client.post('/login', data={'pseudo': 'sm'})
+    gestionnaire.ajouter_participant("hugo", "1234")
+    gestionnaire.initier_vote(fonctionnalite_id)
+    gestionnaire.ajouter_vote("hugo", 5)
+    with client.session_transaction() as sess:
+        sess['pseudo_actif'] = 'sm'
+
+    modifier_attribut = Fonctionnalite.__setattr__
+    def verifier_verrou(fonctionnalite, nom, valeur):
+        if nom == "statut" and hasattr(fonctionnalite, "statut"):
+            assert gestionnaire.verrou_backlog._is_owned(), "Statut modifié hors du verrou du backlog."
+        modifier_attribut(fonctionnalite, nom, valeur)
+    monkeypatch.setattr(Fonctionnalite, "__setattr__", verifier_verrou)
+    assert client.post('/valider_vote').status_code == 302
+    monkeypatch.setattr(Fonctionnalite, "__setattr__", modifier_attribut)
+    assert gestionnaire.get_fonctionnalite(fonctionnalite_id).statut == STATUT_TERMINE
+    gestionnaire.fermer()
@@ -3,6 +3,7 @@ import pytest
 import os
 import shutil
 import json
+import threading
 from constantes import *
 
 
@@ -20,6 +21,7 @@ def gestionnaire_temporaire_vide():
     yield gestionnaire
 
     # Nettoyer après le test
+    gestionnaire.fermer()
     os.remove(fichier_temporaire)
 
 @pytest.fixture
@@ -45,6 +47,7 @@ def gestionnaire_temporaire():
     yield gestionnaire  # Passe le gestionnaire au test
 
     # Nettoyer après le test
+    gestionnaire.fermer()  # Écrire les modifications en attente avant la suppression
     os.remove(fichier_temporaire)  # Supprimer le fichier temporaire
 
 # Test pour vérifier qu'un participant en double n'est pas ajouté
@@ -248,3 +251,141 @@ def test_is_team_complete(gestionnaire_temporaire_vide):
     )
     fonctionnalite = gestionnaire_temporaire_vide.backlog[0]
     assert gestionnaire_temporaire_vide.is_team_complete(fonctionnalite), "L'équipe n'est pas considérée comme complète."
+
+# Vérifie que les modifications sont regroupées en une seule écriture différée
+def test_sauvegarde_differee(gestionnaire_temporaire):
+    with open(gestionnaire_temporaire.backlog_file) as fichier:
+        contenu_initial = fichier.read()
+    fonctionnalite_id = gestionnaire_temporaire.backlog[0].id
+    gestionnaire_temporaire.modifier_fonctionnalite(fonctionnalite_id, nom="Nom 1")
+    gestionnaire_temporaire.modifier_fonctionnalite(fonctionnalite_id, nom="Nom 2")
+    assert gestionnaire_temporaire.modifie, "Le backlog devrait être marqué comme modifié."
+    with open(gestionnaire_temporaire.backlog_file) as fichier:
+        assert fichier.read() == contenu_initial, "Le fichier ne doit pas être réécrit avant le délai."
+
+    assert gestionnaire_temporaire.sauvegarder_si_modifie()
+    assert not gestionnaire_temporaire.sauvegarder_si_modifie(), "Aucune écriture attendue sans modification."
+    recharge = gestionnaire_temporaire.charger_backlog()
+    assert any(f.nom == "Nom 2" for f in recharge)
+
+# Vérifie que le journal est rejoué au chargement après un arrêt sans compaction
+def test_journal_rejoue_au_chargement(gestionnaire_temporaire):
+    fonctionnalite_id = gestionnaire_temporaire.backlog[0].id
+    gestionnaire_temporaire.modifier_fonctionnalite(fonctionnalite_id, nom="Journalisée")
+    gestionnaire_temporaire.supprimer_fonctionnalite(gestionnaire_temporaire.backlog[-1].id)
+    gestionnaire_temporaire.ajout_fonctionnalite("Nouvelle", "Depuis le journal", 1, 3)
+    assert os.path.exists(gestionnaire_temporaire.journal.chemin)
+
+    # Ligne tronquée par un arrêt brutal pendant l'écriture
+    with open(gestionnaire_temporaire.journal.chemin, "a") as journal:
+        journal.write('{"op": "suppr')
+
+    redemarre = AppManager(backlog_file=gestionnaire_temporaire.backlog_file)
+    assert [f.to_dict() for f in redemarre.backlog] == [f.to_dict() for f in gestionnaire_temporaire.backlog]
+
+# Vérifie que la compaction réécrit l'instantané et supprime le journal
+def test_journal_compaction(gestionnaire_temporaire):
+    fonctionnalite_id = gestionnaire_temporaire.backlog[0].id
+    gestionnaire_temporaire.modifier_fonctionnalite(fonctionnalite_id, nom="Compactée")
+    gestionnaire_temporaire.fermer()
+    assert not os.path.exists(gestionnaire_temporaire.journal.chemin)
+    with open(gestionnaire_temporaire.backlog_file) as fichier:
+        assert "Compactée" in fichier.read()
+
+# Vérifie qu'un participant ne peut voter qu'une fois, même avec des requêtes simultanées
+def test_vote_concurrent(gestionnaire_temporaire):
+    gestionnaire_temporaire.ajouter_participant("hugo", "1234")
+    gestionnaire_temporaire.initier_vote(gestionnaire_temporaire.backlog[0].id)
+    acceptes = []
+
+    def voter(carte):
+        try:
+            gestionnaire_temporaire.ajouter_vote("hugo", carte)
+            acceptes.append(carte)
+        except ValueError:
+            pass
+
+    threads = [threading.Thread(target=voter, args=(carte,)) for carte in LISTE_CARTE_NUMERIQUE]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(acceptes) == 1
+    assert gestionnaire_temporaire.participants.votes_votants == 1
+    assert gestionnaire_temporaire.get_data_par_pseudo("hugo")["vote"] == acceptes[0]
+
+# Vérifie que des ajouts simultanés reçoivent des identifiants distincts et restent triés
+def test_ajout_concurrent(gestionnaire_temporaire_vide):
+    threads = [
+        threading.Thread(target=gestionnaire_temporaire_vide.ajout_fonctionnalite, args=(f"F{i}", "", i % 10 + 1, 3))
+        for i in range(50)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    backlog = gestionnaire_temporaire_vide.lister_backlog()
+    assert len({f.id for f in backlog}) == 50
+    assert [int(f.priorite) for f in backlog] == sorted(int(f.priorite) for f in backlog)
+
+# Vérifie qu'un client en attente est réveillé par une modification de l'état
+def test_attendre_changement(gestionnaire_temporaire):
+    revision = gestionnaire_temporaire.revision_etat
+    assert gestionnaire_temporaire.attendre_changement(revision, 0.05) is False
+    assert gestionnaire_temporaire.attendre_changement(revision - 1, 10) is True
+
+    minuterie = threading.Timer(0.05, gestionnaire_temporaire.ajouter_participant, args=("hugo", "1234"))
+    minuterie.start()
+    assert gestionnaire_temporaire.attendre_changement(revision, 10) is True
+    minuterie.join()
+    etat = gestionnaire_temporaire.etat_public()
+    assert etat["version"] > revision
+    assert etat["participants"] == [{"pseudo": "hugo", "fonction": "Votant", "avatar": etat["participants"][0]["avatar"]}]
+
+# Le moteur en colonnes donne le même backlog et le même rapport que le moteur par objets
+def test_moteur_colonnes(gestionnaire_temporaire, tmp_path):
+    fichier = str(tmp_path / "backlog.json")
+    shutil.copyfile(gestionnaire_temporaire.backlog_file, fichier)
+    colonnes = AppManager(backlog_file=fichier, moteur_backlog="colonnes")
+    for gestionnaire in (gestionnaire_temporaire, colonnes):
+        premiere = gestionnaire.backlog[0].id
+        gestionnaire.modifier_fonctionnalite(premiere, priorite=9, statut=STATUT_EN_COURS)
+        gestionnaire.ajout_fonctionnalite("Nouvelle", "Colonnes", 2, 5, participants=["hugo"])
+        gestionnaire.supprimer_fonctionnalite(gestionnaire.backlog[-1].id)
+    assert [f.to_dict() for f in colonnes.lister_backlog()] == [f.to_dict() for f in gestionnaire_temporaire.lister_backlog()]
+    assert colonnes.passer_a_fonctionnalite_suivante().id == gestionnaire_temporaire.passer_a_fonctionnalite_suivante().id
+    assert colonnes.rapport_difficulte() == gestionnaire_temporaire.rapport_difficulte()
+    colonnes.fermer()
+
+# les lectures du backlog attendent la fin d'une modification en cours (verrou du backlog)
+def test_lectures_verrouillees(gestionnaire_temporaire):
+    premiere = gestionnaire_temporaire.backlog[0].id
+    resultats = []
+    lecteurs = [
+        threading.Thread(target=lambda: resultats.append(gestionnaire_temporaire.get_fonctionnalite(premiere))),
+        threading.Thread(target=lambda: resultats.append(gestionnaire_temporaire.afficher_fonctionnalite_prioritaire())),
+    ]
+    with gestionnaire_temporaire.verrou_backlog:
+        for lecteur in lecteurs:
+            lecteur.start()
+            lecteur.join(0.05)
+            assert lecteur.is_alive(), "La lecture doit attendre le verrou du backlog."
+    for lecteur in lecteurs:
+        lecteur.join()
+    assert [f.id for f in resultats] == [premiere, premiere]
+
+# la fonctionnalité prioritaire est la première non terminée, sans recalculer l'ordre du moteur en colonnes
+def test_fonctionnalite_prioritaire(gestionnaire_temporaire, tmp_path):
+    fichier = str(tmp_path / "backlog.json")
+    shutil.copyfile(gestionnaire_temporaire.backlog_file, fichier)
+    colonnes = AppManager(backlog_file=fichier, moteur_backlog="colonnes")
+    premiere = colonnes.backlog[0].id
+    for gestionnaire in (gestionnaire_temporaire, colonnes):
+        gestionnaire.modifier_fonctionnalite(premiere, statut=STATUT_TERMINE)
+    assert colonnes.afficher_fonctionnalite_prioritaire().id == gestionnaire_temporaire.backlog[0].id != premiere
+    assert colonnes.backlog.ordre_cache is None
+    colonnes.fermer()
+
+    for fonctionnalite in gestionnaire_temporaire.lister_backlog():
+        gestionnaire_temporaire.modifier_fonctionnalite(fonctionnalite.id, statut=STATUT_TERMINE)
+    assert gestionnaire_temporaire.afficher_fonctionnalite_prioritaire() is None
@@ -0,0 +1,103 @@
+from models.backlog import Backlog, ListeTriee, decoder_curseur, encoder_curseur
+from models.fonctionnalite import Fonctionnalite
+import pytest
+import random
+from constantes import *
+
+
+@pytest.fixture
+def backlog_indexe():
+    """
+    Fixture qui crée un backlog indexé de quatre fonctionnalités dans le désordre.
+    """
+    return Backlog([
+        Fonctionnalite(4, "D", "", 2, 1, STATUT_TERMINE),
+        Fonctionnalite(1, "A", "", 5, 1),
+        Fonctionnalite(3, "C", "", 1, 1),
+        Fonctionnalite(2, "B", "", 5, 1),
+    ])
+
+# l'ordre suit (terminée, priorité, id)
+def test_ordre_initial(backlog_indexe):
+    assert [f.id for f in backlog_indexe] == [3, 1, 2, 4]
+    assert backlog_indexe[0].id == 3
+    assert backlog_indexe.premiere_non_terminee().id == 3
+
+# accès direct par identifiant
+def test_obtenir(backlog_indexe):
+    assert backlog_indexe.obtenir(2).nom == "B"
+    assert backlog_indexe.obtenir(99) is None
+
+# la mise à jour repositionne une seule fonctionnalité
+def test_mettre_a_jour(backlog_indexe):
+    fonctionnalite = backlog_indexe.obtenir(3)
+    fonctionnalite.statut = STATUT_TERMINE
+    backlog_indexe.mettre_a_jour(fonctionnalite)
+    assert [f.id for f in backlog_indexe] == [1, 2, 3, 4]
+    fonctionnalite = backlog_indexe.obtenir(2)
+    fonctionnalite.priorite = "1"
+    backlog_indexe.mettre_a_jour(fonctionnalite)
+    assert [f.id for f in backlog_indexe] == [2, 1, 3, 4]
+
+# ajout, suppression et séquence d'identifiants sans réutilisation
+def test_ajouter_supprimer(backlog_indexe):
+    assert backlog_indexe.supprimer(4).nom == "D"
+    assert backlog_indexe.supprimer(4) is None
+    nouvel_id = backlog_indexe.prochain_id()
+    assert nouvel_id == 5, "Un identifiant supprimé ne doit pas être réutilisé."
+    backlog_indexe.ajouter(Fonctionnalite(nouvel_id, "E", "", 3, 1))
+    assert [f.id for f in backlog_indexe] == [3, 5, 1, 2]
+    assert len(backlog_indexe) == 4
+
+# chaque modification incrémente la version, une lecture ne la change pas
+def test_version(backlog_indexe):
+    versions = [backlog_indexe.version]
+    backlog_indexe.obtenir(1)
+    list(backlog_indexe)
+    assert backlog_indexe.version == versions[-1]
+    backlog_indexe.mettre_a_jour(backlog_indexe.obtenir(1))
+    versions.append(backlog_indexe.version)
+    backlog_indexe.ajouter(Fonctionnalite(backlog_indexe.prochain_id(), "E", "", 3, 1))
+    versions.append(backlog_indexe.version)
+    backlog_indexe.supprimer(99)
+    assert backlog_indexe.version == versions[-1]
+    backlog_indexe.supprimer(5)
+    versions.append(backlog_indexe.version)
+    backlog_indexe.retrier()
+    versions.append(backlog_indexe.version)
+    assert versions == sorted(set(versions))
+
+# pagination par clé : une page reprend après la dernière fonctionnalité lue, même si le backlog change
+def test_page(backlog_indexe):
+    page, suivant = backlog_indexe.page(taille=2)
+    assert [f.id for f in page] == [3, 1]
+    assert decoder_curseur(encoder_curseur(suivant)) == suivant
+    backlog_indexe.supprimer(3)
+    backlog_indexe.ajouter(Fonctionnalite(backlog_indexe.prochain_id(), "E", "", 1, 1))
+    page, suivant = backlog_indexe.page(suivant, 2)
+    assert [f.id for f in page] == [2, 4]
+    assert suivant is None
+    with pytest.raises(ValueError):
+        decoder_curseur("0.abc.1")
+
+# la liste par blocs reste identique à une liste triée, blocs coupés et vidés compris
+def test_liste_triee():
+    aleatoire = random.Random(5)
+    attendu = sorted(aleatoire.sample(range(1000), 50))
+    liste = ListeTriee(attendu, [str(c) for c in attendu], taille_bloc=4)
+    for _ in range(2000):
+        cle = aleatoire.randrange(1000)
+        if cle in attendu:
+            liste.retirer(cle)
+            attendu.remove(cle)
+        else:
+            liste.inserer(cle, str(cle))
+            attendu.append(cle)
+            attendu.sort()
+    assert list(liste) == [str(c) for c in attendu]
+    assert len(liste) == len(attendu)
+    assert [liste[i] for i in (0, 7, -1)] == [str(attendu[i]) for i in (0, 7, -1)]
+    assert [c for c, _ in liste.paires(attendu[10])] == attendu[11:]
+    assert max(len(bloc) for bloc in liste.blocs) <= 8
+    with pytest.raises(KeyError):
+        liste.retirer(1000)
@@ -0,0 +1,77 @@
+import random
+from models.backlog import Backlog
+from models.backlog_colonnes import BacklogColonnes
+from models.fonctionnalite import Fonctionnalite
+from constantes import *
+
+
+def identiques(colonnes, objets):
+    """
+    Vérifie que les deux moteurs donnent le même backlog, dans le même ordre.
+    """
+    assert [f.to_dict() for f in colonnes] == [f.to_dict() for f in objets]
+    assert len(colonnes) == len(objets)
+    premiere = colonnes.premiere_non_terminee()
+    attendue = objets.premiere_non_terminee()
+    assert (premiere and premiere.id) == (attendue and attendue.id)
+
+# les deux moteurs restent identiques après des ajouts, modifications et suppressions aléatoires
+def test_equivalence_backlog(generer_backlog):
+    donnees = generer_backlog(3000)
+    objets = Backlog(Fonctionnalite(**d) for d in donnees)
+    colonnes = BacklogColonnes(Fonctionnalite(**d) for d in donnees)
+    identiques(colonnes, objets)
+    aleatoire = random.Random(7)
+    for i in range(2500):
+        choix = aleatoire.random()
+        if choix < 0.2:
+            nouvelle = {**donnees[0], "id": objets.prochain_id(), "priorite": aleatoire.randint(1, 10), "difficulte": None}
+            assert colonnes.prochain_id() == nouvelle["id"]
+            objets.ajouter(Fonctionnalite(**nouvelle))
+            colonnes.ajouter(Fonctionnalite(**nouvelle))
+        elif choix < 0.6:
+            identifiant = aleatoire.randint(1, objets.dernier_id)
+            assert (objets.supprimer(identifiant) is None) == (colonnes.supprimer(identifiant) is None)
+        else:
+            identifiant = aleatoire.choice(objets.ordre).id
+            champs = {"priorite": aleatoire.randint(1, 10), "statut": aleatoire.choice([STATUT_A_FAIRE, STATUT_TERMINE])}
+            for backlog in (objets, colonnes):
+                fonctionnalite = backlog.obtenir(identifiant)
+                fonctionnalite.modifier(**champs)
+                backlog.mettre_a_jour(fonctionnalite)
+        if i % 500 == 0:
+            identiques(colonnes, objets)
+    identiques(colonnes, objets)
+    for identifiant in [f.id for f in objets if f.id % 4]:
+        objets.supprimer(identifiant)
+        colonnes.supprimer(identifiant)
+    assert colonnes.lignes < len(objets) * 2, "Les lignes supprimées doivent avoir été compactées."
+    identiques(colonnes, objets)
+
+    # pages : mêmes fonctionnalités et mêmes curseurs
+    curseur_objets = curseur_colonnes = None
+    while True:
+        page_objets, curseur_objets = objets.page(curseur_objets, 97)
+        page_colonnes, curseur_colonnes = colonnes.page(curseur_colonnes, 97)
+        assert [f.id for f in page_colonnes] == [f.id for f in page_objets]
+        assert curseur_colonnes == curseur_objets
+        if curseur_objets is None:
+            break
+
+# les rapports vectorisés donnent les mêmes totaux qu'un calcul fonctionnalité par fonctionnalité
+def test_rapports(generer_backlog):
+    fonctionnalites = [Fonctionnalite(**d) for d in generer_backlog(1000)]
+    fonctionnalites.append(Fonctionnalite(1001, "Sans estimation", "", 2))
+    colonnes = BacklogColonnes(fonctionnalites)
+    rapport = colonnes.difficulte_par_priorite((3, 6))
+    restantes = [f for f in fonctionnalites if f.statut != STATUT_TERMINE]
+    bandes = [(1, 3), (4, 6), (7, PRIORITE_MAX)]
+    for bande, (minimum, maximum) in zip(rapport, bandes):
+        dans_bande = [f for f in restantes if minimum <= f.priorite <= maximum]
+        assert bande["fonctionnalites"] == len(dans_bande)
+        assert bande["difficulte_totale"] == sum(f.difficulte or 0 for f in dans_bande)
+    assert rapport[0]["non_estimees"] == 1
+    assert rapport[-1]["priorite_max"] is None
+    assert colonnes.compter_par_statut() == {
+        statut: sum(f.statut == statut for f in fonctionnalites) for statut in (STATUT_A_FAIRE, STATUT_EN_COURS, STATUT_TERMINE)
+    }
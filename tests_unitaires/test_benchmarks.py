@@ -0,0 +1,24 @@
+from benchmarks.micro_backlog import generer_backlog, comparer, mesurer_taille
+
+
+# le backlog synthétique est identique d'une exécution à l'autre
+def test_generer_backlog_deterministe():
+    assert generer_backlog(200) == generer_backlog(200)
+    assert [f["id"] for f in generer_backlog(5)] == [1, 2, 3, 4, 5]
+
+# une opération plus lente que la référence au-delà du seuil est signalée
+def test_comparer_regression():
+    reference = {"tailles": {"1000": {"operations": {"trier_backlog": {"par_op_us": 100.0}}}}}
+    resultats = {"tailles": {"1000": {"operations": {"trier_backlog": {"par_op_us": 125.0}}}}}
+    assert comparer(resultats, reference, 0.2) == ["trier_backlog (1000) : 100.0 -> 125.0 µs/op"]
+    assert comparer(resultats, reference, 0.3) == []
+
+# chaque opération est mesurée sur un petit backlog
+def test_mesurer_taille(tmp_path):
+    mesures = mesurer_taille(50, str(tmp_path))
+    assert set(mesures["operations"]) == {
+        "charger_backlog", "sauvegarder_backlog", "trier_backlog", "rapport_difficulte", "get_fonctionnalite",
+        "modifier_fonctionnalite", "ajout_fonctionnalite", "supprimer_fonctionnalite",
+    }
+    assert mesures["memoire_pic_mo"] > 0
+    assert mesures["octets_par_fonctionnalite"] > 0
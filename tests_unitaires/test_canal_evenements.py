@@ -0,0 +1,38 @@
+from models.canal_evenements import CanalEvenements, FIN_DU_FLUX, formater_sse
+import json
+
+
+# un abonné reçoit les événements publiés au format SSE
+def test_publier_abonne():
+    canal = CanalEvenements()
+    file = canal.abonner()
+    canal.publier("vote", {"pseudo": "hugo"})
+    message = file.get_nowait()
+    assert message.startswith("event: vote\n")
+    assert json.loads(message.split("data: ", 1)[1]) == {"pseudo": "hugo"}
+
+# un abonné désabonné ne reçoit plus rien
+def test_desabonner():
+    canal = CanalEvenements()
+    file = canal.abonner()
+    canal.desabonner(file)
+    canal.publier("vote", {})
+    assert file.empty()
+    assert canal.nombre_abonnes() == 0
+
+# un abonné lent ne bloque pas la publication et garde les événements les plus récents
+def test_abonne_lent():
+    canal = CanalEvenements(taille_file=2)
+    file = canal.abonner()
+    for i in range(5):
+        canal.publier("vote", {"n": i})
+    assert [file.get_nowait() for _ in range(2)] == [formater_sse("vote", {"n": 3}), formater_sse("vote", {"n": 4})]
+
+# la fermeture termine le flux de tous les abonnés, même ceux dont la file est pleine
+def test_fermer():
+    canal = CanalEvenements(taille_file=1)
+    files = [canal.abonner(), canal.abonner()]
+    canal.publier("vote", {})
+    canal.fermer()
+    assert [file.get_nowait() for file in files] == [FIN_DU_FLUX, FIN_DU_FLUX]
+    assert canal.nombre_abonnes() == 0
@@ -0,0 +1,111 @@
+import json
+import os
+from models.app_manager import AppManager
+from models.chargement_backlog import RapportChargement, lire_backlog, parcourir_backlog
+from constantes import *
+
+BACKLOG_TEST = os.path.join(os.path.dirname(__file__), 'data', 'backlog.json')
+
+
+def ecrire(chemin, contenu):
+    with open(chemin, "w", encoding="utf-8") as fichier:
+        fichier.write(contenu if isinstance(contenu, str) else json.dumps(contenu, ensure_ascii=False))
+    return str(chemin)
+
+# la lecture par petits blocs donne les mêmes fonctionnalités que le décodage complet
+def test_lecture_par_blocs():
+    with open(BACKLOG_TEST, encoding="utf-8") as fichier:
+        attendu = json.load(fichier)["backlog"]
+    for taille_bloc in (1, 7, TAILLE_BLOC_LECTURE):
+        rapport = RapportChargement()
+        lues = [f.to_dict() for f in lire_backlog(BACKLOG_TEST, rapport, taille_bloc)]
+        assert lues == attendu
+        assert rapport.acceptees == len(attendu) and not rapport.rejets and rapport.erreur is None
+
+# les enregistrements invalides sont écartés et signalés, sans interrompre le chargement
+def test_enregistrements_invalides(tmp_path):
+    chemin = ecrire(tmp_path / "backlog.json", {
+        "version": 2,
+        "backlog": [
+            {"id": 1, "nom": "A", "priorite": "3", "difficulte": 5, "commentaire": "clé inconnue"},
+            {"id": 2, "priorite": 1},
+            {"id": 1, "nom": "doublon", "priorite": 1},
+            "pas un objet",
+            {"id": 3, "nom": "C", "priorite": 2, "participants": "lina"},
+            {"id": 4, "nom": "D", "priorite": 12345678901234567890, "statut": "Bloqué"},
+        ],
+        "fin": None,
+    })
+    rapport = RapportChargement()
+    fonctionnalites = list(lire_backlog(chemin, rapport, taille_bloc=5))
+    assert [f.id for f in fonctionnalites] == [1, 4]
+    assert fonctionnalites[0].priorite == 3
+    assert [(position, raison.split(" ")[0]) for position, _, raison in rapport.rejets] == [
+        (1, "nom"), (2, "id"), (3, "l'enregistrement"), (4, "participants")
+    ]
+    assert len(rapport.avertissements) == 3  # clé inconnue, priorité hors limites, statut inconnu
+    assert len(rapport.messages(limite=1)) == 3
+    assert rapport.messages()[0].startswith("Fonctionnalité n°2 (id 2) rejetée")
+
+# un document tronqué garde les fonctionnalités déjà lues ; un fichier vide est signalé
+def test_document_tronque_ou_vide(tmp_path):
+    contenu = json.dumps({"backlog": [{"id": 1, "nom": "A", "priorite": 1}, {"id": 2, "nom": "B", "priorite": 1}]})
+    rapport = RapportChargement()
+    lues = list(lire_backlog(ecrire(tmp_path / "tronque.json", contenu[:-20]), rapport, taille_bloc=4))
+    assert [f.id for f in lues] == [1]
+    assert rapport.erreur is not None
+
+    rapport = RapportChargement()
+    assert list(lire_backlog(ecrire(tmp_path / "vide.json", "  \n"), rapport)) == []
+    assert rapport.vide
+
+# AppManager charge le reste du backlog malgré un enregistrement inattendu
+def test_charger_backlog_tolerant(tmp_path):
+    chemin = ecrire(tmp_path / "backlog.json", {"backlog": [
+        {"id": 1, "nom": "A", "priorite": 2, "estimation": 3},
+        {"id": 2, "nom": "B"},
+    ]})
+    gestionnaire = AppManager(backlog_file=chemin, journalisation=False)
+    assert [f.id for f in gestionnaire.lister_backlog()] == [1]
+    assert len(gestionnaire.rapport_chargement.rejets) == 1
+    gestionnaire.fermer()
+
+# une erreur de syntaxe au début d'un gros fichier arrête la lecture sans lire la suite
+def test_erreur_sans_lecture_complete(tmp_path):
+    fonctionnalites = [{"id": i, "nom": f"F{i}", "priorite": 1} for i in range(1, 20001)]
+    contenu = json.dumps({"backlog": fonctionnalites}).replace('"id": 3,', '"id": 3', 1)
+    chemin = ecrire(tmp_path / "invalide.json", contenu)
+    rapport = RapportChargement()
+    fichier = open(chemin, encoding="utf-8")
+    lectures = []
+    lire = fichier.read
+    fichier.read = lambda taille: lectures.append(taille) or lire(taille)
+    lues = list(parcourir_backlog(fichier, rapport, taille_bloc=1024))
+    assert [f.id for f in lues] == [1, 2]
+    assert rapport.erreur is not None
+    assert len(lectures) <= 2 and len(contenu) > 100 * 1024
+
+# le backlog sauvegardé est relu quelle que soit la locale du système (écrit en UTF-8)
+def test_sauvegarde_utf8(tmp_path, monkeypatch):
+    import builtins
+    import models.app_manager as module_app_manager
+    chemin = ecrire(tmp_path / "backlog.json", {"backlog": []})
+    ouvrir = builtins.open
+    def ouvrir_latin1(fichier, mode="r", *args, **kwargs):
+        if "b" not in mode and not args:
+            kwargs.setdefault("encoding", "latin-1")  # locale non UTF-8
+        return ouvrir(fichier, mode, *args, **kwargs)
+    monkeypatch.setattr(module_app_manager, "open", ouvrir_latin1, raising=False)
+    gestionnaire = AppManager(backlog_file=chemin, delai_sauvegarde=0, journalisation=False)
+    gestionnaire.ajout_fonctionnalite("Échéance « été »", "Café", 2, 3)
+    rapport = RapportChargement()
+    assert [f.nom for f in lire_backlog(chemin, rapport)] == ["Échéance « été »"]
+    assert rapport.erreur is None
+
+# un fichier qui n'est pas en UTF-8 arrête la lecture sans exception
+def test_fichier_non_utf8(tmp_path):
+    chemin = tmp_path / "latin1.json"
+    chemin.write_bytes('{"backlog": [{"id": 1, "nom": "A", "priorite": 1}, {"id": 2, "nom": "Été", "priorite": 1}]}'.encode("latin-1"))
+    rapport = RapportChargement()
+    assert list(lire_backlog(str(chemin), rapport, taille_bloc=16)) == []  # décodage par blocs d'octets
+    assert "UTF-8" in rapport.erreur
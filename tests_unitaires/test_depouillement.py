@@ -0,0 +1,46 @@
+from models.depouillement import depouiller, depouiller_lot, encoder_votes, cartes_les_plus_proches
+import numpy as np
+import pytest
+
+
+# statistiques d'un tour : moyenne, médiane, mode, écart et carte la plus proche
+def test_depouiller():
+    resultat = depouiller(["3", "5", "5", "13", "cafe", "?"])
+    assert resultat["nombre"] == 6 and resultat["numeriques"] == 4
+    assert resultat["cafe"] == 1 and resultat["interrogation"] == 1
+    assert resultat["moyenne"] == 6.5
+    assert resultat["mediane"] == 5
+    assert resultat["mode"] == "5"
+    assert resultat["ecart"] == 10
+    assert resultat["carte_moyenne"] == "5"
+    assert not resultat["unanime"]
+
+# les compteurs d'une salle ({carte: nombre}) donnent le même résultat qu'une liste de votes
+def test_depouiller_comptes():
+    assert depouiller({"8": 2, "13": 1}) == depouiller(["8", 13, "8"])
+    assert depouiller({"8": 3})["unanime"]
+
+# un tour sans carte numérique n'a ni moyenne ni carte retenue
+def test_depouiller_sans_numerique():
+    resultat = depouiller(["cafe", "cafe"])
+    assert resultat["moyenne"] is None and resultat["carte_moyenne"] is None
+    assert resultat["mode"] == "cafe"
+
+# le dépouillement par lot correspond au dépouillement tour par tour
+def test_depouiller_lot():
+    tours = [["1", "2"], ["100", "40", "40"], [], {"20": 1, "?": 2}]
+    lot = depouiller_lot(tours)
+    for i, tour in enumerate(tours):
+        attendu = depouiller(tour)
+        assert lot["nombre"][i] == attendu["nombre"]
+        assert lot["carte_moyenne"][i] == attendu["carte_moyenne"]
+    assert list(lot["mediane"][:2]) == [1.5, 40]
+
+# carte la plus proche : égalité au profit de la carte la plus basse
+def test_cartes_les_plus_proches():
+    assert list(cartes_les_plus_proches([1.5, 4, 60, 250, 0])) == ["1", "3", "40", "100", "1"]
+
+# une carte inconnue est refusée
+def test_carte_inconnue():
+    with pytest.raises(ValueError):
+        encoder_votes(["7"])
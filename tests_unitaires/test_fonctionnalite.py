@@ -0,0 +1,25 @@
+from models.fonctionnalite import Fonctionnalite
+import pytest
+from constantes import *
+
+
+# représentation compacte : pas de __dict__, chaînes répétées partagées, participants en tuple
+def test_representation_compacte():
+    a = Fonctionnalite(1, "A", "", 1, participants=["".join(["li", "na"])])
+    b = Fonctionnalite(2, "B", "", 2, statut="".join(["En ", "cours"]), participants=["lina", "hugo"])
+    assert not hasattr(a, "__dict__")
+    assert a.participants == ("lina",) and a.participants[0] is b.participants[0]
+    assert b.statut is Fonctionnalite(3, "C", "", 3, statut="".join(["En c", "ours"])).statut
+    assert Fonctionnalite(4, "D", "", 4).participants == ()
+    with pytest.raises(AttributeError):
+        a.inconnu = 1
+
+# les modifications gardent les conversions, to_dict reste sérialisable tel quel
+def test_modifier_et_to_dict():
+    fonctionnalite = Fonctionnalite(1, "A", "", 1)
+    fonctionnalite.modifier(participants=["hugo"], mode_de_vote="".join(["moy", "enne"]), priorite=4)
+    assert fonctionnalite.mode_de_vote is VOTE_MOYENNE
+    assert fonctionnalite.to_dict() == {
+        "id": 1, "nom": "A", "description": "", "priorite": 4, "difficulte": None,
+        "statut": STATUT_A_FAIRE, "mode_de_vote": VOTE_MOYENNE, "participants": ["hugo"],
+    }
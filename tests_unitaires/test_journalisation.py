@@ -0,0 +1,35 @@
+import io
+import logging
+from models import journalisation
+from models.journalisation import configurer_journalisation, arreter_journalisation
+
+
+class Formatage:
+    """Objet qui compte ses conversions en texte."""
+
+    def __init__(self):
+        self.appels = 0
+
+    def __str__(self):
+        self.appels += 1
+        return "formaté"
+
+
+# les messages passent par la file et sont écrits par l'écouteur ; le niveau debug n'est pas formaté
+def test_journalisation_par_file():
+    arreter_journalisation()
+    sortie = io.StringIO()
+    try:
+        assert configurer_journalisation("INFO", sortie) is configurer_journalisation("INFO")
+        journaliseur = logging.getLogger("test_journalisation")
+        detail = Formatage()
+        journaliseur.debug("état : %s", detail)
+        journaliseur.info("vote ajouté : %s", Formatage())
+        arreter_journalisation()  # vide la file
+        assert detail.appels == 0
+        assert "INFO test_journalisation : vote ajouté : formaté" in sortie.getvalue()
+        assert "état" not in sortie.getvalue()
+        assert journalisation.ecouteur is None
+    finally:
+        arreter_journalisation()
+        configurer_journalisation()
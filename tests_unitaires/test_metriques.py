@@ -0,0 +1,26 @@
+from models.metriques import Metriques, formater_etiquettes
+from constantes import *
+
+
+# les requêtes sont comptées par route et statut, et réparties dans l'histogramme
+def test_histogramme_requetes():
+    metriques = Metriques(seuils=(0.1, 1))
+    metriques.observer_requete("login", "POST", 302, 0.05)
+    metriques.observer_requete("login", "POST", 302, 0.5)
+    metriques.observer_requete("login", "POST", 200, 2)
+    texte = metriques.exporter()
+    assert f'{PREFIXE_METRIQUES}_requetes_total{{route="login",methode="POST",statut="302"}} 2' in texte
+    assert f'{PREFIXE_METRIQUES}_requetes_total{{route="login",methode="POST",statut="200"}} 1' in texte
+    nom = f"{PREFIXE_METRIQUES}_duree_requete_secondes"
+    assert f'{nom}_bucket{{route="login",methode="POST",le="0.1"}} 1' in texte
+    assert f'{nom}_bucket{{route="login",methode="POST",le="1"}} 2' in texte
+    assert f'{nom}_bucket{{route="login",methode="POST",le="+Inf"}} 3' in texte
+    assert f'{nom}_count{{route="login",methode="POST"}} 3' in texte
+    assert f'{nom}_sum{{route="login",methode="POST"}} 2.55' in texte
+
+# les jauges sont exportées avec leur type et les valeurs d'étiquettes échappées
+def test_jauges():
+    texte = Metriques().exporter([("salles", "gauge", "Salles.", [("", [], 3)])])
+    assert f"# TYPE {PREFIXE_METRIQUES}_salles gauge" in texte
+    assert f"{PREFIXE_METRIQUES}_salles 3" in texte
+    assert formater_etiquettes([("salle", 'a"b\\')]) == '{salle="a\\"b\\\\"}'
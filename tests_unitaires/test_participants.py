@@ -0,0 +1,51 @@
+from models.participants import RegistreParticipants
+import pytest
+
+
+def participant(pseudo, session_id, fonction="Votant"):
+    return {"pseudo": pseudo, "fonction": fonction, "avatar": "", "vote": None, "session_id": session_id}
+
+# les index par pseudo, session et fonction sont tenus à jour
+def test_index():
+    registre = RegistreParticipants([participant("po", "s1", "Product Owner"), participant("hugo", "s2")])
+    registre.ajouter(participant("lina", "s3"))
+    assert registre.par_pseudo("lina")["session_id"] == "s3"
+    assert registre.par_session("s1")["pseudo"] == "po"
+    assert [p["pseudo"] for p in registre.avec_fonction("Votant")] == ["hugo", "lina"]
+    assert registre.compter_fonction("Scrum Master") == 0
+    assert [p["pseudo"] for p in registre] == ["po", "hugo", "lina"]
+
+# un pseudo ne peut être connecté qu'une fois
+def test_doublon():
+    registre = RegistreParticipants([participant("hugo", "s1")])
+    with pytest.raises(ValueError):
+        registre.ajouter(participant("hugo", "s2"))
+
+# la déconnexion retire le participant de tous les index
+def test_retirer_session():
+    registre = RegistreParticipants([participant("hugo", "s1"), participant("lina", "s2")])
+    assert registre.retirer_session("s1")["pseudo"] == "hugo"
+    assert registre.retirer_session("s1") is None
+    assert "hugo" not in registre
+    assert registre.par_session("s1") is None
+    assert registre.avec_fonction("Votant") == [registre.par_pseudo("lina")]
+    registre.vider()
+    assert len(registre) == 0
+
+# les compteurs de votes suivent les votes, les déconnexions et la réinitialisation
+def test_compteurs_votes():
+    registre = RegistreParticipants([participant("sm", "s1", "Scrum Master"), participant("hugo", "s2"), participant("lina", "s3")])
+    registre.enregistrer_vote(registre.par_pseudo("hugo"), "5")
+    assert not registre.tous_les_votants_ont_vote()
+    with pytest.raises(ValueError):
+        registre.enregistrer_vote(registre.par_pseudo("hugo"), "8")
+    registre.enregistrer_vote(registre.par_pseudo("lina"), "5")
+    assert registre.tous_les_votants_ont_vote()
+    assert registre.cartes_votants == {"5": 2}
+    registre.retirer_session("s3")
+    assert registre.votes_votants == 1 and registre.cartes_votants == {"5": 1}
+    registre.enregistrer_vote(registre.par_pseudo("sm"), "cafe")
+    assert registre.votes_cafe == 1 and not registre.tous_cafe()
+    registre.reinitialiser_votes()
+    assert registre.par_pseudo("hugo")["vote"] is None
+    assert registre.votes_votants == 0 and registre.votes_cafe == 0 and not registre.ont_vote
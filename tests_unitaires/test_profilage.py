@@ -0,0 +1,32 @@
+from models.profilage import Profileur
+from constantes import *
+
+
+# seules les routes choisies sont profilées, une requête sur N
+def test_selection_et_echantillon(tmp_path):
+    profileur = Profileur.depuis_environnement(str(tmp_path), {})
+    assert not profileur.doit_profiler("soumettre_vote")
+
+    profileur = Profileur.depuis_environnement(str(tmp_path), {
+        VARIABLE_PROFILAGE_ROUTES: "soumettre_vote", VARIABLE_PROFILAGE_ECHANTILLON: "3"
+    })
+    assert not profileur.doit_profiler("backlog")
+    assert [profileur.doit_profiler("soumettre_vote") for _ in range(6)] == [False, False, True] * 2
+
+    profileur.configurer(True, [])
+    assert profileur.doit_profiler("backlog")
+
+# un profil est enregistré par requête et les fonctions sont classées par temps cumulé
+def test_profil_enregistre(tmp_path):
+    profileur = Profileur(str(tmp_path), actif=True)
+    profil = profileur.demarrer()
+    sorted(range(10000), key=lambda x: -x)
+    chemin = profileur.terminer(profil, "backlog")
+    assert chemin.endswith(".pstats")
+    assert profileur.lister("backlog") == [chemin.split("/")[-1]]
+    assert profileur.lister("valider_vote") == []
+
+    fonctions = profileur.meilleures_fonctions("backlog", limite=5)
+    assert 0 < len(fonctions) <= 5
+    assert fonctions[0]["temps_cumule"] >= fonctions[-1]["temps_cumule"]
+    assert any("sorted" in f["fonction"] for f in fonctions)
@@ -0,0 +1,60 @@
+from models.registre_salles import RegistreSalles
+import pytest
+import os
+from constantes import *
+
+
+@pytest.fixture
+def registre_temporaire(backlog_json):
+    """
+    Fixture qui crée un registre de salles dont le backlog par défaut est une copie
+    du backlog de test, dans un dossier temporaire.
+    """
+    return RegistreSalles(backlog_file=backlog_json)
+
+# une salle est créée à la première demande puis réutilisée
+def test_obtenir_salle_creation_paresseuse(registre_temporaire):
+    assert not registre_temporaire.existe("equipe-a")
+    salle = registre_temporaire.obtenir_salle("equipe-a")
+    assert registre_temporaire.existe("equipe-a")
+    assert registre_temporaire.obtenir_salle("EQUIPE-A") is salle
+    assert os.path.exists(salle.backlog_file), "Le backlog de la salle n'a pas été initialisé."
+
+# les états de deux salles sont indépendants
+def test_salles_independantes(registre_temporaire):
+    salle_a = registre_temporaire.obtenir_salle("equipe-a")
+    salle_b = registre_temporaire.obtenir_salle("equipe-b")
+    salle_a.ajouter_participant("hugo", "1234")
+    salle_a.initier_vote(salle_a.backlog[0].id)
+    assert salle_b.get_data_par_pseudo("hugo") is None
+    assert not salle_b.state["indicateurs"]["vote_commence"]
+    assert salle_a.backlog is not salle_b.backlog
+
+# identifiant de salle invalide
+def test_id_salle_invalide(registre_temporaire):
+    with pytest.raises(ValueError):
+        registre_temporaire.obtenir_salle("../etc")
+
+# la fermeture libère la salle, sauf la salle par défaut
+def test_fermer_salle(registre_temporaire):
+    registre_temporaire.obtenir_salle("equipe-a")
+    registre_temporaire.obtenir_salle(SALLE_PAR_DEFAUT)
+    registre_temporaire.fermer_salle("equipe-a")
+    registre_temporaire.fermer_salle(SALLE_PAR_DEFAUT)
+    assert registre_temporaire.lister_salles() == [SALLE_PAR_DEFAUT]
+
+# la libération retire aussi la salle par défaut, après avoir écrit son backlog
+def test_liberer_salle(registre_temporaire):
+    salle = registre_temporaire.obtenir_salle(SALLE_PAR_DEFAUT)
+    salle.ajout_fonctionnalite("Libérée", "Écrite avant la libération", 2, 5)
+    assert registre_temporaire.liberer_salle(SALLE_PAR_DEFAUT)
+    assert not registre_temporaire.liberer_salle(SALLE_PAR_DEFAUT)
+    assert registre_temporaire.lister_salles() == []
+    reouverte = registre_temporaire.obtenir_salle(SALLE_PAR_DEFAUT)
+    assert reouverte is not salle
+    assert any(f.nom == "Libérée" for f in reouverte.backlog)
+
+# un état partagé entre processus exige le stockage SQLite du backlog
+def test_etat_partage_sans_sqlite(tmp_path):
+    with pytest.raises(ValueError):
+        RegistreSalles(backlog_file=str(tmp_path / "backlog.json"), fichier_etat=str(tmp_path / "etat.sqlite3"), moteur_stockage="json")
@@ -0,0 +1,84 @@
+from models.anneau_coherent import AnneauCoherent
+from routeur import Routeur, extraire_salle, lire_session_flask
+from app import app
+from constantes import *
+
+SALLES = [f"salle-{i}" for i in range(2000)]
+
+
+# chaque worker reçoit une part comparable des salles
+def test_repartition():
+    anneau = AnneauCoherent(["w1", "w2", "w3", "w4"])
+    parts = {}
+    for salle in SALLES:
+        worker = anneau.obtenir(salle)
+        parts[worker] = parts.get(worker, 0) + 1
+    assert set(parts) == {"w1", "w2", "w3", "w4"}
+    assert min(parts.values()) > len(SALLES) / 4 * 0.6
+
+# ajouter ou retirer un worker ne déplace que les salles concernées
+def test_reequilibrage():
+    anneau = AnneauCoherent(["w1", "w2", "w3"])
+    avant = {salle: anneau.obtenir(salle) for salle in SALLES}
+    anneau.ajouter("w4")
+    apres = {salle: anneau.obtenir(salle) for salle in SALLES}
+    deplacees = [s for s in SALLES if avant[s] != apres[s]]
+    assert all(apres[s] == "w4" for s in deplacees)
+    assert len(deplacees) < len(SALLES) / 2
+    anneau.retirer("w4")
+    assert {salle: anneau.obtenir(salle) for salle in SALLES} == avant
+    assert AnneauCoherent().obtenir("equipe") is None
+
+# la salle est lue dans l'URL, le formulaire ou la session Flask
+def test_extraire_salle():
+    cookie = app.session_interface.get_signing_serializer(app).dumps({"salle": "equipe", "pseudo": "hugo" * 50})
+    assert lire_session_flask(cookie)["salle"] == "equipe"
+    assert extraire_salle("/salle_de_vote", f"session={cookie}") == "equipe"
+    assert extraire_salle("/salle/Alpha") == "alpha"
+    assert extraire_salle("/flux_salle?salle=beta", f"session={cookie}") == "beta"
+    assert extraire_salle("/login", "", b"pseudo=po&salle=gamma", "application/x-www-form-urlencoded") == "gamma"
+    assert extraire_salle("/login", "session=illisible") == SALLE_PAR_DEFAUT
+
+# un cookie de session non signé par la clé de l'application est ignoré
+def test_cookie_forge():
+    cookie = app.session_interface.get_signing_serializer(app).dumps({"salle": "equipe"})
+    charge, horodatage, signature = cookie.rsplit(".", 2)
+    forge = app.session_interface.get_signing_serializer(app).dumps({"salle": "cible"}).rsplit(".", 2)[0]
+    assert lire_session_flask(f"{forge}.{horodatage}.{signature}") == {}
+    assert extraire_salle("/salle_de_vote", f"session={forge}.{horodatage}.{signature}") == SALLE_PAR_DEFAUT
+
+# un worker ajouté à l'anneau fait libérer par les anciens workers les salles qu'il reprend
+def test_liberation_salles_deplacees(monkeypatch):
+    routeur = Routeur(0)
+    routeur.anneau.ajouter("w1")
+    for salle in SALLES:
+        assert routeur.worker_pour(salle) == "w1"
+    liberations = []
+    def liberer_salles(worker, salles):
+        liberations.append((worker, set(salles)))
+        return set(salles)
+    monkeypatch.setattr(routeur, "liberer_salles", liberer_salles)
+
+    routeur.anneau.ajouter("w2")
+    routeur.reequilibrer()
+    deplacees = {s for s in SALLES if routeur.anneau.obtenir(s) == "w2"}
+    assert liberations == [("w1", deplacees)]
+    assert routeur.salles_servies["w1"] == set(SALLES) - deplacees
+
+    # une requête transmise à w1 juste avant le rééquilibrage fait libérer sa salle aussitôt
+    salle = next(iter(deplacees))
+    routeur.verifier_attribution("w1", salle)
+    assert liberations[-1] == ("w1", {salle})
+    assert salle not in routeur.salles_servies["w1"]
+
+# un worker qui ne libère pas ses salles est retiré de l'anneau
+def test_liberation_impossible(monkeypatch):
+    routeur = Routeur(0)
+    routeur.anneau.ajouter("w1")
+    for salle in SALLES:
+        routeur.worker_pour(salle)
+    monkeypatch.setattr(routeur, "liberer_salles", lambda worker, salles: set())
+    routeur.anneau.ajouter("w2")
+    routeur.reequilibrer()
+    assert routeur.anneau.workers == {"w2"}
+    assert routeur.salles_servies["w1"] == set(SALLES)
@@ -0,0 +1,145 @@
+from models.app_manager import AppManager
+from models.backlog import Backlog
+from models.backlog_colonnes import BacklogColonnes
+from models.fonctionnalite import Fonctionnalite
+from models.stockage_binaire import BacklogBinaire, ecrire_backlog_binaire, fichier_binaire_pour
+import random
+import pytest
+import os
+from constantes import *
+
+
+# le fichier binaire restitue les fonctionnalités à l'identique, dans l'ordre du backlog
+def test_aller_retour(tmp_path, generer_backlog):
+    fonctionnalites = [Fonctionnalite(**d) for d in generer_backlog(500)]
+    fonctionnalites.append(Fonctionnalite(501, "Échéance « été »", "", 1, None, STATUT_EN_COURS, VOTE_MOYENNE, ["zoé", "li"]))
+    chemin = str(tmp_path / "backlog.bin")
+    assert ecrire_backlog_binaire(fonctionnalites, chemin) == 501
+    binaire = BacklogBinaire(chemin)
+    objets = Backlog(fonctionnalites)
+    assert [f.to_dict() for f in binaire] == [f.to_dict() for f in objets]
+    assert binaire.obtenir(501).to_dict() == fonctionnalites[-1].to_dict()
+    assert binaire.obtenir(502) is None
+    assert binaire[-1].id == objets[-1].id
+    assert binaire.prochain_id() == 502
+    binaire.fermer()
+
+# les modifications en mémoire donnent le même backlog et les mêmes pages que le moteur "objets"
+def test_equivalence_backlog(tmp_path, generer_backlog):
+    donnees = generer_backlog(2000)
+    chemin = str(tmp_path / "backlog.bin")
+    ecrire_backlog_binaire((Fonctionnalite(**d) for d in donnees), chemin)
+    binaire = BacklogBinaire(chemin)
+    objets = Backlog(Fonctionnalite(**d) for d in donnees)
+    aleatoire = random.Random(3)
+    for i in range(1500):
+        choix = aleatoire.random()
+        if choix < 0.2:
+            nouvelle = {**donnees[0], "id": objets.prochain_id(), "priorite": aleatoire.randint(1, 10)}
+            assert binaire.prochain_id() == nouvelle["id"]
+            objets.ajouter(Fonctionnalite(**nouvelle))
+            binaire.ajouter(Fonctionnalite(**nouvelle))
+        elif choix < 0.5:
+            identifiant = aleatoire.randint(1, objets.dernier_id)
+            assert (objets.supprimer(identifiant) is None) == (binaire.supprimer(identifiant) is None)
+        else:
+            identifiant = aleatoire.choice(objets.ordre).id
+            champs = {"priorite": aleatoire.randint(1, 10), "statut": aleatoire.choice([STATUT_A_FAIRE, STATUT_TERMINE])}
+            for backlog in (objets, binaire):
+                fonctionnalite = backlog.obtenir(identifiant)
+                fonctionnalite.modifier(**champs)
+                backlog.mettre_a_jour(fonctionnalite)
+    assert [f.to_dict() for f in binaire] == [f.to_dict() for f in objets]
+    assert len(binaire) == len(objets)
+    assert binaire.premiere_non_terminee().id == objets.premiere_non_terminee().id
+    assert binaire[0].id == objets[0].id
+    assert binaire.difficulte_par_priorite() == BacklogColonnes(objets).difficulte_par_priorite()
+
+    curseur_objets = curseur_binaire = None
+    while True:
+        page_objets, curseur_objets = objets.page(curseur_objets, 97)
+        page_binaire, curseur_binaire = binaire.page(curseur_binaire, 97)
+        assert [f.id for f in page_binaire] == [f.id for f in page_objets]
+        assert curseur_binaire == curseur_objets
+        if curseur_objets is None:
+            break
+    binaire.fermer()
+
+# le gestionnaire convertit le backlog JSON, journalise les modifications et réécrit le fichier à la compaction
+def test_gestionnaire_binaire(backlog_json):
+    gestionnaire = AppManager(backlog_file=backlog_json, moteur_stockage="binaire", journalisation=True)
+    assert os.path.exists(fichier_binaire_pour(backlog_json))
+    attendu = AppManager(backlog_file=backlog_json, delai_sauvegarde=0)
+    assert [f.to_dict() for f in gestionnaire.backlog] == [f.to_dict() for f in attendu.backlog]
+
+    premiere = gestionnaire.backlog[0].id
+    gestionnaire.modifier_fonctionnalite(premiere, nom="Modifiée", priorite=9)
+    gestionnaire.ajout_fonctionnalite("Nouvelle", "Ajout binaire", 2, 5, participants=["hugo"])
+    nouvel_id = gestionnaire.backlog.dernier_id
+    gestionnaire.supprimer_fonctionnalite(gestionnaire.backlog[-1].id)
+    modifie = [f.to_dict() for f in gestionnaire.backlog]
+
+    # redémarrage : le journal est appliqué au fichier binaire inchangé
+    redemarre = AppManager(backlog_file=backlog_json, moteur_stockage="binaire", journalisation=True)
+    assert [f.to_dict() for f in redemarre.backlog] == modifie
+    assert redemarre.get_fonctionnalite(nouvel_id).participants == ("hugo",)
+    redemarre.fermer()
+
+    # compaction : le fichier est réécrit et le journal vidé
+    gestionnaire.fermer()
+    assert gestionnaire.journal.taille == 0
+    compacte = AppManager(backlog_file=backlog_json, moteur_stockage="binaire", journalisation=True)
+    assert isinstance(compacte.backlog, BacklogBinaire)
+    assert not compacte.backlog.surcharge and not compacte.backlog.masques
+    assert [f.to_dict() for f in compacte.backlog] == modifie
+    assert compacte.get_fonctionnalite(premiere).nom == "Modifiée"
+    compacte.fermer()
+    attendu.fermer()
+
+# la première fonctionnalité est trouvée sans parcourir le backlog, masques et surcharge compris
+def test_premiere_sans_parcours(tmp_path, monkeypatch, generer_backlog):
+    donnees = generer_backlog(300)
+    chemin = str(tmp_path / "backlog.bin")
+    ecrire_backlog_binaire((Fonctionnalite(**d) for d in donnees), chemin)
+    binaire = BacklogBinaire(chemin)
+    objets = Backlog(Fonctionnalite(**d) for d in donnees)
+    monkeypatch.setattr(binaire, "parcourir", lambda apres=None: pytest.fail("parcours complet"))
+    for _ in range(3):
+        assert binaire[0].id == objets[0].id
+        assert binaire.premiere_non_terminee().id == objets.premiere_non_terminee().id
+        premiere = objets[0].id
+        for backlog in (objets, binaire):
+            backlog.supprimer(premiere)
+    nouvelle = Fonctionnalite(**{**donnees[0], "id": 1000, "priorite": PRIORITE_MIN - 1, "statut": STATUT_A_FAIRE})
+    for backlog in (objets, binaire):
+        backlog.ajouter(nouvelle)
+    assert binaire[0].id == objets[0].id == 1000
+    binaire.fermer()
+
+# la projection de l'ancien fichier est libérée avant son remplacement (refusé sous Windows sinon)
+def test_remplacement_apres_fermeture(backlog_json, monkeypatch):
+    import models.stockage_binaire as stockage_binaire
+    gestionnaire = AppManager(backlog_file=backlog_json, moteur_stockage="binaire", journalisation=True)
+    ancien = gestionnaire.backlog
+    remplacer = os.replace
+    def remplacer_si_ferme(source, destination):
+        assert ancien.memoire.closed, "Le fichier projeté ne doit pas être remplacé."
+        remplacer(source, destination)
+    monkeypatch.setattr(stockage_binaire.os, "replace", remplacer_si_ferme)
+    gestionnaire.modifier_fonctionnalite(ancien[0].id, nom="Avant remplacement")
+    attendu = [f.to_dict() for f in gestionnaire.backlog]
+    assert gestionnaire.sauvegarder_backlog()
+    assert [f.to_dict() for f in gestionnaire.backlog] == attendu
+
+    # remplacement impossible : l'ancien fichier est projeté de nouveau, sans perte des modifications
+    def refuser(source, destination):
+        raise PermissionError("fichier utilisé")
+    monkeypatch.setattr(stockage_binaire.os, "replace", refuser)
+    courant = gestionnaire.backlog
+    gestionnaire.modifier_fonctionnalite(courant[0].id, nom="Remplacement refusé")
+    attendu = [f.to_dict() for f in gestionnaire.backlog]
+    assert not gestionnaire.sauvegarder_backlog()
+    assert gestionnaire.backlog is courant
+    assert [f.to_dict() for f in gestionnaire.backlog] == attendu
+    monkeypatch.setattr(stockage_binaire.os, "replace", remplacer)
+    gestionnaire.fermer()
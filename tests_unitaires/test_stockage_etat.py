@@ -0,0 +1,137 @@
+from models.stockage_etat import StockageEtat
+from models.app_manager import AppManager
+import json
+import pytest
+from constantes import *
+
+
+@pytest.fixture
+def stockage(tmp_path):
+    stockage = StockageEtat(str(tmp_path / "etat.sqlite3"))
+    yield stockage
+    stockage.fermer()
+
+@pytest.fixture
+def deux_processus(backlog_json, stockage):
+    """
+    Deux gestionnaires de la même salle partageant le même stockage d'état,
+    comme deux workers servant la même salle.
+    """
+    gestionnaires = [
+        AppManager(backlog_file=backlog_json, id_salle="equipe", moteur_stockage="sqlite", stockage_etat=stockage) for _ in range(2)
+    ]
+    yield gestionnaires
+    for gestionnaire in gestionnaires:
+        gestionnaire.fermer()
+
+# une écriture n'aboutit que si la version lue est toujours la version courante
+def test_compare_and_swap(stockage):
+    assert stockage.comparer_et_ecrire("equipe", 0, {"a": 1}) == 1
+    assert stockage.comparer_et_ecrire("equipe", 0, {"a": 2}) is None
+    assert stockage.comparer_et_ecrire("equipe", 1, {"a": 3}) == 2
+    assert stockage.comparer_et_ecrire("equipe", 1, {"a": 4}) is None
+    assert stockage.lire("equipe") == (2, {"a": 3})
+    assert stockage.lire("equipe", 2) is None
+    stockage.supprimer("equipe")
+    assert not stockage.existe("equipe")
+
+# un vote reçu par un processus est visible par l'autre
+def test_etat_partage(deux_processus):
+    a, b = deux_processus
+    a.ajouter_participant("hugo", "s1")
+    b.ajouter_participant("lina", "s2")
+    a.initier_vote(a.backlog[0].id)
+    b.ajouter_vote("hugo", "5")
+    assert a.etat_public()["ont_vote"] == ["hugo"]
+    assert not a.tout_le_monde_a_vote()
+    a.ajouter_vote("lina", "5")
+    b.synchroniser_etat()
+    assert b.tout_le_monde_a_vote()
+    # le vote déjà publié par l'autre processus est refusé
+    with pytest.raises(ValueError):
+        a.ajouter_vote("hugo", "8")
+
+# une modification faite sur un état périmé est rejouée sur l'état à jour
+def test_conflit_rejoue(deux_processus):
+    a, b = deux_processus
+    a.ajouter_participant("hugo", "s1")
+    tentatives = []
+
+    def ajouter_sm():
+        tentatives.append(b.participants.pseudos())
+        if len(tentatives) == 1:
+            a.ajouter_participant("lina", "s2")  # publié par l'autre processus pendant la transaction
+        b.ajouter_participant("sm", "s3")
+
+    b.executer_transaction(ajouter_sm)
+    assert tentatives == [["hugo"], ["hugo", "lina"]]
+    a.synchroniser_etat()
+    assert a.participants.pseudos() == ["hugo", "lina", "sm"]
+
+# les événements d'une transaction ne sont diffusés qu'une fois, après la publication de l'état
+def test_evenements_apres_publication(deux_processus):
+    a, b = deux_processus
+    file = b.evenements.abonner()
+    tentatives = []
+
+    def voter():
+        tentatives.append(True)
+        if len(tentatives) == 1:
+            a.ajouter_participant("lina", "s2")  # conflit : la première tentative est abandonnée
+        b.ajouter_participant("sm", "s3")
+        b.notifier("vote", pseudo="sm")
+        assert not any(m.startswith("event: vote") for m in list(file.queue)), "Événement diffusé avant la publication."
+
+    b.executer_transaction(voter)
+    votes = [m for m in list(file.queue) if m.startswith("event: vote")]
+    assert len(tentatives) == 2 and len(votes) == 1
+    donnees = json.loads(votes[0].split("data: ", 1)[1])
+    assert [p["pseudo"] for p in donnees["participants"]] == ["lina", "sm"]
+    assert donnees["pseudo"] == "sm"
+
+# un état publié par un autre processus est diffusé aux abonnés SSE de ce processus
+def test_diffusion_etat_distant(deux_processus):
+    a, b = deux_processus
+    file = b.evenements.abonner()
+    a.ajouter_participant("hugo", "s1")
+    assert file.empty()
+    b.synchroniser_etat()
+    message = file.get_nowait()
+    assert message.startswith("event: etat")
+    assert [p["pseudo"] for p in json.loads(message.split("data: ", 1)[1])["participants"]] == ["hugo"]
+    b.synchroniser_etat()
+    assert file.empty(), "Un état déjà chargé ne doit pas être diffusé à nouveau."
+
+# une tentative abandonnée ne laisse aucune modification du backlog, qui n'est enregistrée qu'après la publication
+def test_backlog_apres_publication(deux_processus):
+    a, b = deux_processus
+    premiere = b.backlog.premiere_non_terminee()
+    premiere_id, statut = premiere.id, premiere.statut
+    tentatives = []
+
+    def terminer():
+        tentatives.append(b.get_fonctionnalite(premiere_id).statut)
+        if len(tentatives) == 1:
+            a.ajouter_participant("lina", "s2")  # conflit : la première tentative est abandonnée
+        b.modifier_fonctionnalite(premiere_id, statut=STATUT_TERMINE)
+        assert b.stockage.obtenir(premiere_id).statut == statut, "Modification enregistrée avant la publication."
+        return b.passer_a_fonctionnalite_suivante()
+
+    suivante = b.executer_transaction(terminer)
+    assert tentatives == [statut, statut]
+    assert suivante.id != premiere_id
+    assert b.stockage.obtenir(premiere_id).statut == STATUT_TERMINE
+    assert b.backlog.premiere_non_terminee().id == suivante.id
+
+    # une transaction qui échoue rétablit le backlog en mémoire sans rien enregistrer
+    nom = suivante.nom
+    def echouer():
+        b.modifier_fonctionnalite(suivante.id, nom="Jamais enregistré")
+        b.ajout_fonctionnalite("Jamais ajoutée", "", 1)
+        raise ValueError("Tous les participants n'ont pas voté.")
+    nombre = len(b.backlog)
+    with pytest.raises(ValueError):
+        b.executer_transaction(echouer)
+    assert b.get_fonctionnalite(suivante.id).nom == nom
+    assert len(b.backlog) == nombre
+    assert b.stockage.obtenir(suivante.id).nom == nom
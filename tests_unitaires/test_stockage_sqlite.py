@@ -0,0 +1,79 @@
+from models.app_manager import AppManager
+from models.stockage_sqlite import StockageSQLite, migrer_json_vers_sqlite, fichier_sqlite_pour
+import pytest
+import os
+import json
+from constantes import *
+
+
+@pytest.fixture
+def gestionnaire_sqlite(backlog_json):
+    """
+    Fixture qui crée un gestionnaire utilisant le moteur SQLite.
+    """
+    gestionnaire = AppManager(backlog_file=backlog_json, moteur_stockage="sqlite")
+    yield gestionnaire
+    gestionnaire.fermer()
+
+# la migration importe toutes les fonctionnalités du fichier JSON
+def test_migration_json(backlog_json):
+    with open(backlog_json) as fichier:
+        attendu = json.load(fichier)["backlog"]
+    fichier_sqlite = fichier_sqlite_pour(backlog_json)
+    assert migrer_json_vers_sqlite(backlog_json, fichier_sqlite) == len(attendu)
+    stockage = StockageSQLite(fichier_sqlite)
+    assert stockage.compter() == len(attendu)
+    assert stockage.obtenir(attendu[0]["id"]).to_dict() == attendu[0]
+    stockage.fermer()
+
+# seules les fonctionnalités non terminées sont chargées en mémoire
+def test_chargement_actives(gestionnaire_sqlite):
+    assert all(f.statut != "Terminé" for f in gestionnaire_sqlite.backlog)
+    tout = gestionnaire_sqlite.lister_backlog()
+    assert len(tout) == gestionnaire_sqlite.stockage.compter()
+    termines = [f for f in tout if f.statut == "Terminé"]
+    assert termines, "Le backlog de test doit contenir des fonctionnalités terminées."
+    assert gestionnaire_sqlite.get_fonctionnalite(termines[0].id).nom == termines[0].nom
+
+# les modifications sont persistées ligne par ligne
+def test_persistance_modifications(backlog_json, gestionnaire_sqlite):
+    fonctionnalite_id = gestionnaire_sqlite.backlog[0].id
+    gestionnaire_sqlite.modifier_fonctionnalite(fonctionnalite_id, nom="Modifiée", priorite="2")
+    gestionnaire_sqlite.ajout_fonctionnalite("Nouvelle", "Ajout SQLite", 3, 5, participants=["hugo"])
+    nouvel_id = max(f.id for f in gestionnaire_sqlite.lister_backlog())
+    gestionnaire_sqlite.supprimer_fonctionnalite(gestionnaire_sqlite.backlog[-1].id)
+    attendu = [f.to_dict() for f in gestionnaire_sqlite.lister_backlog()]
+
+    redemarre = AppManager(backlog_file=backlog_json, moteur_stockage="sqlite")
+    assert redemarre.get_fonctionnalite(fonctionnalite_id).priorite == 2
+    assert redemarre.get_fonctionnalite(nouvel_id).participants == ("hugo",)
+    assert [f.to_dict() for f in redemarre.lister_backlog()] == [
+        {**f, "priorite": int(f["priorite"])} for f in attendu
+    ]
+    redemarre.fermer()
+
+# les pages lues dans la base suivent l'ordre du backlog complet
+def test_page_backlog(gestionnaire_sqlite):
+    tout = [f.id for f in gestionnaire_sqlite.lister_backlog()]
+    lus, curseur = [], None
+    while True:
+        page, curseur = gestionnaire_sqlite.page_backlog(curseur, 2)
+        lus += [f.id for f in page]
+        if curseur is None:
+            break
+    assert lus == tout
+
+# un id supprimé n'est jamais réattribué, même après un redémarrage
+def test_ids_non_reutilises(backlog_json, gestionnaire_sqlite):
+    dernier_id = max(f.id for f in gestionnaire_sqlite.lister_backlog())
+    gestionnaire_sqlite.supprimer_fonctionnalite(dernier_id)
+    gestionnaire_sqlite.ajout_fonctionnalite("Après suppression", "", 3)
+    assert gestionnaire_sqlite.stockage.obtenir(dernier_id + 1).nom == "Après suppression"
+    gestionnaire_sqlite.supprimer_fonctionnalite(dernier_id + 1)
+    gestionnaire_sqlite.fermer()
+
+    redemarre = AppManager(backlog_file=backlog_json, moteur_stockage="sqlite")
+    redemarre.ajout_fonctionnalite("Après redémarrage", "", 3)
+    assert redemarre.stockage.obtenir(dernier_id + 2).nom == "Après redémarrage"
+    assert redemarre.stockage.obtenir(dernier_id) is None
+    redemarre.fermer()
@@ -0,0 +1,42 @@
+from models.traces import RegistreTraces, tracer, trace_courante
+
+
+class Service:
+    @tracer
+    def externe(self):
+        return self.interne() + 1
+
+    @tracer
+    def interne(self):
+        return 1
+
+
+# sans trace en cours, les méthodes décorées ne sont pas mesurées
+def test_sans_trace():
+    assert trace_courante.get() is None
+    assert Service().externe() == 2
+    assert RegistreTraces(actif=False).demarrer("GET backlog") is None
+
+# les spans imbriqués sont enregistrés et exportés au format Chrome trace-event
+def test_spans_imbriques():
+    registre = RegistreTraces(actif=True, capacite=2)
+    jeton = registre.demarrer("POST soumettre_vote")
+    Service().externe()
+    trace = registre.terminer(jeton)
+    assert trace_courante.get() is None
+    assert [(nom, profondeur) for nom, _, _, profondeur in trace.spans] == [
+        ("Service.interne", 1), ("Service.externe", 0)
+    ]
+
+    evenements = registre.exporter_chrome()["traceEvents"]
+    complets = [e for e in evenements if e["ph"] == "X"]
+    requete, interne, externe = complets
+    assert requete["name"] == "POST soumettre_vote"
+    assert requete["ts"] <= externe["ts"] <= interne["ts"]
+    assert interne["ts"] + interne["dur"] <= externe["ts"] + externe["dur"] <= requete["ts"] + requete["dur"]
+    assert {e["tid"] for e in evenements} == {trace.numero}
+
+    for nom in ("GET backlog", "GET login"):
+        registre.terminer(registre.demarrer(nom))
+    assert registre.exporter_chrome("soumettre_vote")["traceEvents"] == []
+    assert len(registre.exporter_chrome("GET")["traceEvents"]) == 4